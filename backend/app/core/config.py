@@ -4,6 +4,9 @@ This module manages all application settings including database connections,
 API keys, and security configurations.
 """
 
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -16,17 +19,82 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Finance Assistant"
     PROJECT_VERSION: str = "1.0.0"
     
+    # Storage backend: "supabase" (production) or "sqlite" (embedded, offline load testing)
+    STORAGE_BACKEND: str = "supabase"
+    SQLITE_PATH: str = "financeflow.db"  # Database file for the sqlite backend (":memory:" for a throwaway one)
+
     # Supabase configuration - Database and authentication backend
-    SUPABASE_URL: str  # URL of your Supabase project
-    SUPABASE_KEY: str  # Supabase anon/public API key
+    SUPABASE_URL: str = ""  # URL of your Supabase project (required for the supabase backend)
+    SUPABASE_KEY: str = ""  # Supabase anon/public API key
+    # Shared HTTP transport behind the Supabase client (per worker process)
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_MAX_CONNECTIONS: int = 50
+    SUPABASE_MAX_KEEPALIVE: int = 20  # Idle connections kept open
+    SUPABASE_KEEPALIVE_SECONDS: float = 30
+    SUPABASE_TIMEOUT_SECONDS: float = 10
+    SUPABASE_RETRIES: int = 3  # Per read (writes only when the connection was never made)
+    SUPABASE_RETRY_BASE_SECONDS: float = 0.1  # Backoff doubles per retry, with full jitter...
+    SUPABASE_RETRY_MAX_SECONDS: float = 2  # ...up to this
+    SUPABASE_BREAKER_THRESHOLD: int = 5  # Consecutive failed requests that open the breaker
+    SUPABASE_BREAKER_RESET_SECONDS: float = 10  # Fail fast this long before probing again
     
     # Google Gemini AI configuration
-    GOOGLE_API_KEY: str  # API key for Google's Gemini AI model
+    GOOGLE_API_KEY: str = ""  # API key for Google's Gemini AI model (AI features are disabled without it)
     
     # JWT (JSON Web Token) Configuration for user authentication
     SECRET_KEY: str = "CHANGE_THIS_TO_A_SECURE_SECRET_KEY_IN_PRODUCTION"  # Must be changed in production!
     ALGORITHM: str = "HS256"  # Algorithm used for JWT encoding
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # Token validity: 1 day
+    TOKEN_CACHE_SIZE: int = 10000  # Verified tokens remembered per worker (entries expire with the token)
+
+    # Password hashing: Argon2id cost parameters (existing hashes keep their own)
+    ARGON2_TIME_COST: int = 3  # Iterations
+    ARGON2_MEMORY_COST: int = 65536  # KiB per hash
+    ARGON2_PARALLELISM: int = 4  # Lanes per hash
+    # Hashing runs on a dedicated process pool; logins beyond the pending limit get 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+
+    # Monthly summary cache (per worker process)
+    SUMMARY_CACHE_SIZE: int = 10000  # Max cached (user, month) summaries
+    SUMMARY_CACHE_TTL_SECONDS: int = 300  # Bounds staleness from other workers
+
+    # Bulk statement import
+    IMPORT_BATCH_SIZE: int = 500  # Rows per multi-row insert
+
+    # Batch create/update/delete endpoints
+    BATCH_MAX_ITEMS: int = 500  # Items per request
+
+    # Streaming export
+    EXPORT_PAGE_SIZE: int = 1000  # Rows per keyset page (bounds memory per export)
+
+    # Cache for opt-in deterministic AI prompts (e.g. budget plan explanations)
+    AI_CACHE_SIZE: int = 1000
+    AI_CACHE_TTL_SECONDS: int = 60 * 60 * 24
+
+    # Gemini gateway (per worker process); calls beyond the wait queue get 503
+    AI_MAX_CONCURRENT: int = 8  # Calls in flight at once
+    AI_MAX_WAITING: int = 32  # Calls waiting for a slot
+    AI_QUEUE_TIMEOUT_SECONDS: float = 10  # Longest wait for a slot
+    AI_TIMEOUT_SECONDS: float = 30  # Per call (per chunk when streaming)
+
+    # Background chat_history writer
+    CHAT_WRITE_BATCH_SIZE: int = 50  # Flush as soon as this many messages are queued
+    CHAT_WRITE_FLUSH_SECONDS: float = 0.5  # ...or at least this often
+    CHAT_WRITE_MAX_PENDING: int = 10000  # Enqueue waits when the queue is this full
+    CHAT_WRITE_MAX_RETRIES: int = 5  # Retries per batch on transport errors and 5xx responses
+
+    # Chat prompt context: financial digest plus recent turns (cached per worker process)
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 1000  # Approximate tokens for the whole context block
+    CHAT_CONTEXT_MAX_TURNS: int = 10  # Most recent chat messages considered
+    CHAT_CONTEXT_CACHE_SIZE: int = 10000  # Users whose digest and turns are kept
+    CHAT_CONTEXT_CACHE_TTL_SECONDS: int = 300  # Bounds staleness from other workers
+
+    # Request, storage and LLM latency metrics served at /metrics (per worker process)
+    METRICS_ENABLED: bool = True
+
+    # Expense auto-categorization rules (JSON, see app/core/category_rules.json)
+    CATEGORY_RULES_FILE: str = str(Path(__file__).with_name("category_rules.json"))
 
     class Config:
         """Pydantic configuration - loads settings from .env file"""
@@ -35,6 +103,41 @@ class Settings(BaseSettings):
 # Global settings instance - used throughout the application
 settings = Settings()
 
-# Initialize Supabase client for database operations
-from supabase import create_client, Client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+    from app.core.http_transport import ResilientTransport
+
+@lru_cache(maxsize=1)
+def get_supabase() -> "AsyncClient":
+    """
+    Async Supabase client for database operations, created on first use.
+    
+    All queries are awaited so request handlers never block a threadpool thread
+    while waiting on a PostgREST round trip. Importing the supabase package is
+    slow, so it is deferred until the supabase backend actually needs it;
+    services go through app.repositories rather than using the client directly.
+    """
+    import httpx
+    from supabase import AsyncClient, AsyncClientOptions
+    http_client = httpx.AsyncClient(transport=get_supabase_transport(), timeout=settings.SUPABASE_TIMEOUT_SECONDS, follow_redirects=True)
+    return AsyncClient(settings.SUPABASE_URL, settings.SUPABASE_KEY, options=AsyncClientOptions(httpx_client=http_client))
+
+@lru_cache(maxsize=1)
+def get_supabase_transport() -> "ResilientTransport":
+    """
+    Pooled HTTP/2 transport shared by every Supabase request.
+    
+    Retries transient failures and fails fast through a circuit breaker
+    while the backend is unhealthy; see app.core.http_transport.
+    """
+    from app.core.http_transport import CircuitBreaker, ResilientTransport
+    return ResilientTransport(
+        max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+        max_keepalive=settings.SUPABASE_MAX_KEEPALIVE,
+        keepalive_seconds=settings.SUPABASE_KEEPALIVE_SECONDS,
+        http2=settings.SUPABASE_HTTP2,
+        retries=settings.SUPABASE_RETRIES,
+        backoff_base=settings.SUPABASE_RETRY_BASE_SECONDS,
+        backoff_max=settings.SUPABASE_RETRY_MAX_SECONDS,
+        breaker=CircuitBreaker(settings.SUPABASE_BREAKER_THRESHOLD, settings.SUPABASE_BREAKER_RESET_SECONDS)
+    )
@@ -0,0 +1,175 @@
+"""
+Resilient HTTP transport for the Supabase client.
+Wraps httpx's pooled HTTP/2 transport with retries (jittered exponential
+backoff) and a circuit breaker, so transient network errors are absorbed
+below the repositories and a degraded backend is not hammered.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Methods that may be re-sent after the request could have reached the server
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Gateway errors worth retrying; every 5xx counts against the backend's health
+RETRY_STATUSES = frozenset({502, 503, 504})
+# Raised before the request was written, so any method can be retried safely
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class BackendUnavailable(httpx.TransportError):
+    """Raised without a network call while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: requests flow. After `threshold` consecutive failures it opens
+    and rejects everything for `reset_seconds`. Then it lets a single probe
+    through (half-open): success closes it, failure opens it again.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self.rejected += 1
+                return False
+            self.state = "half-open"
+        if self.state == "half-open":
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("Storage backend recovered; closing the circuit breaker")
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == "half-open" or (self.state == "closed" and self.failures >= self.threshold):
+            if self.state == "closed":
+                logger.error("Storage backend failing (%d consecutive errors); opening the circuit breaker", self.failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+
+    def abandon(self) -> None:
+        """Release the probe slot of a request that ended without an outcome."""
+        self._probing = False
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe through."""
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at)) if self.state == "open" else 0.0
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """
+    Pooled HTTP/2 transport with retries and a circuit breaker.
+
+    Idempotent requests are retried on transport errors and gateway errors
+    (502/503/504); other methods only when the connection was never made,
+    since an insert or RPC may already have been applied. Each request
+    counts once towards the breaker, after its retries are used up: any
+    5xx (including a 500 that is not retried) or transport error is a
+    failure.
+    """
+
+    def __init__(self, max_connections: int, max_keepalive: int, keepalive_seconds: float, http2: bool,
+                 retries: int, backoff_base: float, backoff_max: float, breaker: CircuitBreaker):
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                              keepalive_expiry=keepalive_seconds)
+        self._transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self.breaker.allow():
+            raise BackendUnavailable(f"Storage backend unavailable; retry in {self.breaker.retry_after():.0f}s", request=request)
+        self.requests += 1
+        try:
+            return await self._send(request)
+        except asyncio.CancelledError:
+            # The caller went away; that says nothing about the backend's health
+            self.breaker.abandon()
+            raise
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                if attempt < self.retries and (request.method in IDEMPOTENT_METHODS or isinstance(e, UNSENT_ERRORS)):
+                    attempt = await self._backoff(attempt, request, e)
+                    continue
+                self.failed += 1
+                self.breaker.record_failure()
+                raise
+            if response.status_code in RETRY_STATUSES and attempt < self.retries and request.method in IDEMPOTENT_METHODS:
+                await response.aclose()
+                attempt = await self._backoff(attempt, request, response.status_code)
+                continue
+            if response.status_code >= 500:
+                self.failed += 1
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            return response
+
+    async def _backoff(self, attempt: int, request: httpx.Request, reason: Any) -> int:
+        # Full jitter: spreads retries from many requests instead of synchronizing them
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        logger.warning("%s %s failed (%s); retry %d in %.2fs", request.method, request.url.path, reason, attempt + 1, delay)
+        self.retried += 1
+        await asyncio.sleep(delay)
+        return attempt + 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        # httpcore's pool is internal; report what it exposes and skip it if that changes
+        connections = getattr(getattr(self._transport, "_pool", None), "connections", None)
+        pool: Optional[Dict[str, int]] = None
+        if connections is not None:
+            idle = sum(1 for c in connections if c.is_idle())
+            pool = {"connections": len(connections), "idle": idle, "active": len(connections) - idle,
+                    "max_connections": self.max_connections}
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "failed": self.failed,
+            "pool": pool,
+            "breaker": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.failures,
+                "times_opened": self.breaker.times_opened,
+                "rejected": self.breaker.rejected,
+                "retry_after": round(self.breaker.retry_after(), 1)
+            }
+        }
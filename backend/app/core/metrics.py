@@ -0,0 +1,211 @@
+"""
+In-process metrics in the Prometheus text format.
+A pure ASGI middleware records per-route latency and status counts, storage
+and LLM calls record their own durations, and each request also reports how
+many backend calls it made. /metrics renders everything for a scraper. The
+numbers are per worker process; Prometheus sums them across workers.
+"""
+
+import inspect
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Default Prometheus latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Buckets for backend calls made by one request
+CALL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Kinds of backend call counted per request
+CALL_KINDS = ("db", "llm", "password_hash")
+
+# Backend calls of the request being handled, by kind; a dict so calls made
+# in child tasks (asyncio.gather copies the context) still land in it
+_request_calls: ContextVar[Optional[Dict[str, int]]] = ContextVar("request_calls", default=None)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in values]
+        return lines
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label set.
+
+    Observing is one bisect and two additions under a lock; buckets are
+    stored per bucket and only made cumulative when rendered.
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Labels, list] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+class Metrics:
+    """The application's metrics and the helpers that record them."""
+
+    def __init__(self):
+        self.requests = Counter("financeflow_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"])
+        self.request_seconds = Histogram("financeflow_http_request_duration_seconds", "HTTP request latency by route.", ["method", "route"])
+        self.call_seconds = Histogram("financeflow_backend_call_duration_seconds", "Storage, LLM and password hashing call latency.", ["kind", "operation"])
+        self.call_errors = Counter("financeflow_backend_call_errors_total", "Backend calls that raised.", ["kind", "operation"])
+        self.calls_per_request = Histogram("financeflow_backend_calls_per_request", "Backend calls made while handling one request.",
+                                           ["kind", "route"], buckets=CALL_COUNT_BUCKETS)
+
+    @contextmanager
+    def track(self, kind: str, operation: str) -> Iterator[None]:
+        """Time one backend call and count it towards the current request."""
+        calls = _request_calls.get()
+        if calls is not None:
+            calls[kind] = calls.get(kind, 0) + 1
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.call_errors.inc(kind, operation)
+            raise
+        finally:
+            self.call_seconds.observe(time.perf_counter() - start, kind, operation)
+
+    def timed(self, kind: str, operation: str) -> Callable:
+        """Decorator form of track() for coroutine functions."""
+        def decorate(fn: Callable) -> Callable:
+            @wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with self.track(kind, operation):
+                    return await fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.request_seconds, self.call_seconds, self.call_errors, self.calls_per_request):
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+class InstrumentedRepository:
+    """
+    Proxy that times every coroutine method of a repository.
+
+    Calls a repository makes on itself are not proxied, so each call from a
+    service or router counts once however it is implemented.
+    """
+
+    def __init__(self, name: str, repository: Any, metrics: "Metrics"):
+        self._name = name
+        self._repository = repository
+        self._metrics = metrics
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._repository, attr)
+        if not attr.startswith("_") and inspect.iscoroutinefunction(value):
+            value = self._metrics.timed("db", f"{self._name}.{attr}")(value)
+            # Cache the wrapper on the proxy so later lookups skip __getattr__
+            setattr(self, attr, value)
+        return value
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status and backend calls per route.
+
+    Routes are labelled by their path template (e.g. /finance/expenses/{id})
+    so the number of series stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        calls: Dict[str, int] = {}
+        token = _request_calls.set(calls)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_calls.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            self.metrics.requests.inc(method, path, str(status))
+            self.metrics.request_seconds.observe(elapsed, method, path)
+            for kind in CALL_KINDS:
+                self.metrics.calls_per_request.observe(calls.get(kind, 0), kind, path)
+
+# Global metrics of this worker process
+metrics = Metrics()
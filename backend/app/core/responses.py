@@ -0,0 +1,17 @@
+"""
+Response helpers.
+Handlers that already hold a validated model, or a payload built from
+trusted rows, return a Response directly: FastAPI then skips response_model
+validation and jsonable_encoder and sends the bytes as they are.
+"""
+
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+
+def model_response(model: BaseModel) -> Response:
+    """Serialize an already-validated model to JSON in pydantic-core."""
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+def json_response(content) -> ORJSONResponse:
+    """Serialize trusted dicts/lists (e.g. database rows) with orjson."""
+    return ORJSONResponse(content)
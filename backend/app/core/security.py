@@ -10,7 +10,14 @@ from passlib.context import CryptContext
 from app.core.config import settings
 
 # Password hashing context using Argon2 algorithm (industry standard for security)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Cost parameters come from settings so hashing can be tuned per deployment
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -0,0 +1,17 @@
+"""
+Shared FastAPI dependencies.
+"""
+
+from fastapi import Header, HTTPException
+from app.services.auth_service import get_user_by_token
+
+async def get_optional_user(authorization: str | None = Header(default=None)) -> str | None:
+    """Resolve the bearer token to a user id, or None for anonymous requests."""
+    return get_user_by_token(authorization) if authorization else None
+
+async def get_current_user(authorization: str | None = Header(default=None)) -> str:
+    """Resolve the bearer token to a user id, rejecting the request if it is missing or invalid."""
+    user_id = await get_optional_user(authorization)
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Login required")
+    return user_id
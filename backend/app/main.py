@@ -1,9 +1,45 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.config import settings
+from fastapi.responses import ORJSONResponse, Response
+from app.core.config import settings, get_supabase, get_supabase_transport
+from app.core.http_transport import BackendUnavailable
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, metrics
 from app.routers import finance, chat, auth
+from app.services.summary_cache import summary_cache
+from app.services.ai_service import response_cache, llm_gateway, get_chain
+from app.services.chat_writer import chat_writer
+from app.services.chat_context import chat_context
+from app.services.token_cache import token_cache
+from app.services.password_hasher import password_hasher
 
-app = FastAPI(title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION)
+logger = logging.getLogger(__name__)
+
+def warm_up() -> None:
+    """Build the slow-to-import clients before the first request needs them."""
+    try:
+        if settings.STORAGE_BACKEND == "supabase":
+            get_supabase()
+        if settings.GOOGLE_API_KEY:
+            get_chain()
+    except Exception:
+        logger.exception("Client warm-up failed; clients will be created on first use")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the worker starts serving immediately
+    app.state.warm_up = asyncio.get_running_loop().run_in_executor(None, warm_up)
+    chat_writer.start()
+    password_hasher.start()
+    yield
+    # Drain queued chat messages before the worker exits
+    await chat_writer.stop()
+    password_hasher.shutdown()
+
+# orjson renders every response that is not returned as a Response already
+app = FastAPI(title=settings.PROJECT_NAME, version=settings.PROJECT_VERSION, lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS Configuration
 origins = [
@@ -19,6 +55,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    # Outermost, so its latency includes CORS handling and every route
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+@app.exception_handler(BackendUnavailable)
+async def backend_unavailable(request: Request, exc: BackendUnavailable):
+    # The storage circuit breaker is open: fail fast instead of a 500
+    retry_after = max(1, round(get_supabase_transport().breaker.retry_after()))
+    return ORJSONResponse({"detail": "Storage is temporarily unavailable, please retry shortly"}, status_code=503,
+                          headers={"Retry-After": str(retry_after)})
+
 # Include Routers
 app.include_router(finance.router)
 app.include_router(chat.router)
@@ -30,4 +77,19 @@ def read_root():
 
 @app.get("/status")
 def check_status():
-    return {"message": "it working"}
+    return {
+        "message": "it working",
+        "llm_gateway": llm_gateway.stats(),
+        "chat_writer": chat_writer.stats(),
+        "password_hasher": password_hasher.stats(),
+        "supabase_transport": get_supabase_transport().stats() if settings.STORAGE_BACKEND == "supabase" else None,
+        # Caches
+        "summary_cache": summary_cache.stats(),
+        "ai_cache": response_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "chat_context": chat_context.stats()
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
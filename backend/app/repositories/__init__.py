@@ -0,0 +1,28 @@
+"""
+Storage repositories.
+`repos` is the backend selected by settings.STORAGE_BACKEND; import it
+instead of talking to a database client directly.
+"""
+
+from app.core.config import settings, get_supabase
+from app.core.metrics import InstrumentedRepository, metrics
+from app.repositories.base import Repositories
+
+def create_repositories() -> Repositories:
+    """Build the repositories of the configured storage backend."""
+    if settings.STORAGE_BACKEND == "supabase":
+        from app.repositories.supabase_backend import create_supabase_repositories
+        repositories = create_supabase_repositories(get_supabase)
+    elif settings.STORAGE_BACKEND == "sqlite":
+        from app.repositories.sqlite_backend import create_sqlite_repositories
+        repositories = create_sqlite_repositories(settings.SQLITE_PATH)
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND!r}")
+    if settings.METRICS_ENABLED:
+        # Time every query, labelled by repository and method (e.g. expenses.list_range)
+        for name, repository in list(vars(repositories).items()):
+            setattr(repositories, name, InstrumentedRepository(name, repository, metrics))
+    return repositories
+
+# Global repositories instance - used throughout the application
+repos = create_repositories()
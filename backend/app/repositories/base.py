@@ -0,0 +1,217 @@
+"""
+Repository interfaces.
+Every storage backend implements these so services and routers never build
+backend-specific queries themselves. Rows are plain dicts keyed by column
+name, matching the tables in database_schema.sql.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Row = Dict[str, Any]
+Columns = Optional[Sequence[str]]  # None selects every column
+
+class UserRepository(ABC):
+    """Accounts in the users table."""
+
+    @abstractmethod
+    async def get_by_username(self, username: str) -> Optional[Row]:
+        """Return the user with this username, or None."""
+
+    @abstractmethod
+    async def create(self, row: Row) -> Optional[Row]:
+        """Insert a user and return the stored row."""
+
+class ProfileRepository(ABC):
+    """Per-user settings in the profiles table (one row per user)."""
+
+    @abstractmethod
+    async def get(self, user_id: str) -> Optional[Row]:
+        """Return the user's profile, or None if they have not saved one."""
+
+    @abstractmethod
+    async def save(self, row: Row) -> None:
+        """Create or replace the profile of row["user_id"]."""
+
+class TransactionRepository(ABC):
+    """Dated, user-owned amounts: the income and expenses tables."""
+
+    table: str
+
+    @abstractmethod
+    async def get(self, user_id: str, id: str, columns: Columns = None) -> Optional[Row]:
+        """Return one of the user's rows by id, or None."""
+
+    @abstractmethod
+    async def list_range(self, user_id: str, start_date: str, end_date: str, columns: Columns = None) -> List[Row]:
+        """
+        Return every row of the user dated within [start_date, end_date].
+
+        Implementations must not truncate large ranges.
+        """
+
+    @abstractmethod
+    async def list_page(self, user_id: str, limit: int, after: Optional[Tuple[str, str]] = None, columns: Columns = None,
+                        start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Row]:
+        """
+        Return up to `limit` rows of the user, newest first by (date, id).
+
+        `after` is the (date, id) of the last row of the previous page; only
+        rows strictly past it in that order are returned (keyset paging).
+        Returned rows always include date and id.
+        """
+
+    @abstractmethod
+    async def list_on_dates(self, user_id: str, dates: Iterable[str], columns: Columns = None) -> List[Row]:
+        """Return the user's rows dated on any of the given days."""
+
+    @abstractmethod
+    async def scan(self, columns: Columns = None, user_id: Optional[str] = None) -> List[Row]:
+        """Return every row (optionally of one user), for maintenance jobs."""
+
+    @abstractmethod
+    async def insert(self, row: Row) -> Optional[Row]:
+        """Insert one row and return it as stored."""
+
+    @abstractmethod
+    async def insert_many(self, rows: List[Row]) -> List[Row]:
+        """Insert rows in a single statement and return them as stored."""
+
+    @abstractmethod
+    async def update(self, user_id: str, id: str, data: Row) -> Optional[Tuple[Row, Row]]:
+        """
+        Update one of the user's rows in one statement.
+
+        Returns:
+            tuple: (row before, row after), or None if the user has no such row
+        """
+
+    @abstractmethod
+    async def update_many(self, user_id: str, rows: List[Row]) -> List[Tuple[Row, Row]]:
+        """
+        Update several of the user's rows in one statement.
+
+        Every row carries its id and the same set of columns. Ids the user
+        does not own are skipped.
+
+        Returns:
+            list: (row before, row after) for each updated row
+        """
+
+    @abstractmethod
+    async def delete(self, user_id: str, id: str) -> List[Row]:
+        """Delete one of the user's rows and return what was deleted."""
+
+    @abstractmethod
+    async def delete_many(self, user_id: str, ids: Sequence[str]) -> List[Row]:
+        """Delete several of the user's rows in one statement and return what was deleted."""
+
+class BudgetRepository(ABC):
+    """Monthly budgets, unique per (user_id, month)."""
+
+    @abstractmethod
+    async def get(self, user_id: str, month: str) -> Optional[Row]:
+        """Return the budget of a month, or None."""
+
+    @abstractmethod
+    async def list(self, user_id: str, limit: int, columns: Columns = None) -> List[Row]:
+        """Return up to `limit` budgets, oldest month first."""
+
+    @abstractmethod
+    async def list_range(self, user_id: str, start_month: str, end_month: str, columns: Columns = None) -> List[Row]:
+        """Return the budgets of months within [start_month, end_month]."""
+
+    @abstractmethod
+    async def upsert(self, row: Row) -> Optional[Row]:
+        """Create or replace the budget of (row["user_id"], row["month"])."""
+
+class ChatHistoryRepository(ABC):
+    """Persisted chat messages."""
+
+    @abstractmethod
+    async def list(self, user_id: str, limit: int) -> List[Row]:
+        """Return up to `limit` messages, oldest first."""
+
+    @abstractmethod
+    async def list_recent(self, user_id: str, limit: int) -> List[Row]:
+        """Return the `limit` most recent messages, oldest first."""
+
+    @abstractmethod
+    async def insert_many(self, rows: List[Row]) -> None:
+        """Insert messages; rows whose id already exists are skipped."""
+
+    @abstractmethod
+    async def clear(self, user_id: str) -> None:
+        """Delete all messages of a user."""
+
+class AggregateRepository(ABC):
+    """Incrementally maintained totals in monthly_aggregates and daily_spend."""
+
+    @abstractmethod
+    async def list_month(self, user_id: str, month: str) -> List[Row]:
+        """Return the aggregate rows of one user's month."""
+
+    @abstractmethod
+    async def list_range(self, user_id: str, start_month: str, end_month: str) -> List[Row]:
+        """Return the aggregate rows of months within [start_month, end_month]."""
+
+    @abstractmethod
+    async def scan(self, user_id: Optional[str] = None) -> List[Row]:
+        """Return every aggregate row (optionally of one user)."""
+
+    @abstractmethod
+    async def recompute(self, user_id: Optional[str] = None) -> List[Row]:
+        """
+        Sum income and expenses per (user_id, month, kind, category) in the database.
+
+        Rows have the aggregate key plus total and entry_count, computed from
+        the transaction tables rather than read from monthly_aggregates.
+        """
+
+    @abstractmethod
+    async def list_daily(self, user_id: str, start_day: str, end_day: str) -> List[Row]:
+        """Return the daily_spend rows of days within [start_day, end_day], oldest first."""
+
+    @abstractmethod
+    async def scan_daily(self, user_id: Optional[str] = None) -> List[Row]:
+        """Return every daily_spend row (optionally of one user)."""
+
+    @abstractmethod
+    async def recompute_daily(self, user_id: Optional[str] = None) -> List[Row]:
+        """Sum expenses per (user_id, day, category) in the database, like recompute."""
+
+    @abstractmethod
+    async def apply_deltas(self, deltas: List[Row], daily: List[Row] = ()) -> None:
+        """
+        Atomically add signed deltas to the aggregates.
+
+        Each delta has user_id, month, kind, category, amount and count;
+        each daily delta has user_id, day, category, amount and count.
+        Keys must be unique within one call.
+        """
+
+    @abstractmethod
+    async def upsert_many(self, rows: List[Row]) -> None:
+        """Overwrite aggregate rows (total, entry_count) by key."""
+
+    @abstractmethod
+    async def upsert_daily(self, rows: List[Row]) -> None:
+        """Overwrite daily_spend rows (total, entry_count) by key."""
+
+class Repositories:
+    """The set of repositories of one storage backend."""
+
+    def __init__(self, users: UserRepository, profiles: ProfileRepository, income: TransactionRepository,
+                 expenses: TransactionRepository, budgets: BudgetRepository, chat_history: ChatHistoryRepository,
+                 aggregates: AggregateRepository):
+        self.users = users
+        self.profiles = profiles
+        self.income = income
+        self.expenses = expenses
+        self.budgets = budgets
+        self.chat_history = chat_history
+        self.aggregates = aggregates
+
+    def transactions(self, table: str) -> TransactionRepository:
+        """Look up the income or expenses repository by table name."""
+        return {"income": self.income, "expenses": self.expenses}[table]
@@ -0,0 +1,341 @@
+"""
+Embedded SQLite storage backend.
+Creates its tables from database_schema.sql (translated from the Postgres
+dialect) so the full API can run and be profiled without network access.
+All statements run on one dedicated thread, which serializes access to the
+connection and keeps blocking I/O off the event loop.
+"""
+
+import asyncio
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+from uuid import uuid4
+from app.repositories.base import (
+    Columns, Row, Repositories, UserRepository, ProfileRepository, TransactionRepository,
+    BudgetRepository, ChatHistoryRepository, AggregateRepository
+)
+
+SCHEMA_PATH = Path(__file__).resolve().parents[2] / "database_schema.sql"
+
+SQLITE_NOW = "(strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))"
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def translate_schema(sql: str) -> str:
+    """
+    Convert the Postgres schema into SQLite DDL.
+
+    Drops extensions and functions, and replaces server-side defaults
+    (UUIDs are generated by the repositories instead).
+    """
+    sql = re.sub(r"--[^\n]*", "", sql)
+    sql = re.sub(r"CREATE EXTENSION[^;]*;", "", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"DROP FUNCTION[^;]*;", "", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"CREATE (OR REPLACE )?FUNCTION.*?\$\$\s*LANGUAGE[^;]*;", "", sql, flags=re.IGNORECASE | re.DOTALL)
+    sql = re.sub(r"DEFAULT gen_random_uuid\(\)", "", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"timezone\('utc'::text, now\(\)\)", SQLITE_NOW, sql, flags=re.IGNORECASE)
+    return sql
+
+def _columns(columns: Columns) -> str:
+    if not columns:
+        return "*"
+    for name in columns:
+        if not IDENTIFIER.match(name):
+            raise ValueError(f"Invalid column name: {name!r}")
+    return ", ".join(columns)
+
+def _with_id(row: Row) -> Row:
+    return row if row.get("id") else {**row, "id": str(uuid4())}
+
+class SQLiteDatabase:
+    """A single SQLite connection driven from one worker thread."""
+
+    def __init__(self, path: str, schema_path: Path = SCHEMA_PATH):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = self._executor.submit(self._connect, path, schema_path).result()
+
+    @staticmethod
+    def _connect(path: str, schema_path: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(translate_schema(schema_path.read_text()))
+        # Index Postgres would use for the same access path
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_history_user ON chat_history (user_id, created_at)")
+        conn.commit()
+        return conn
+
+    async def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(connection) on the database thread inside a transaction."""
+        def call():
+            with self._conn:
+                return fn(self._conn)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def fetch(self, sql: str, params: Sequence = ()) -> List[Row]:
+        return await self.run(lambda c: [dict(r) for r in c.execute(sql, params).fetchall()])
+
+    async def fetch_one(self, sql: str, params: Sequence = ()) -> Optional[Row]:
+        rows = await self.fetch(sql, params)
+        return rows[0] if rows else None
+
+    async def insert_returning(self, sql_for: Callable[[Row], str], rows: List[Row]) -> List[Row]:
+        """Insert rows in one transaction, returning each stored row."""
+        def call(c: sqlite3.Connection):
+            out = []
+            for row in rows:
+                out.extend(dict(r) for r in c.execute(sql_for(row), list(row.values())).fetchall())
+            return out
+        return await self.run(call)
+
+def _insert_sql(table: str, row: Row, conflict: str = "") -> str:
+    cols = _columns(list(row))
+    marks = ", ".join("?" for _ in row)
+    return f"INSERT INTO {table} ({cols}) VALUES ({marks}) {conflict} RETURNING *"
+
+class SQLiteUserRepository(UserRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def get_by_username(self, username: str) -> Optional[Row]:
+        return await self.db.fetch_one("SELECT * FROM users WHERE username = ?", (username,))
+
+    async def create(self, row: Row) -> Optional[Row]:
+        try:
+            created = await self.db.insert_returning(lambda r: _insert_sql("users", r), [_with_id(row)])
+        except sqlite3.IntegrityError:
+            return None
+        return created[0] if created else None
+
+class SQLiteProfileRepository(ProfileRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def get(self, user_id: str) -> Optional[Row]:
+        return await self.db.fetch_one("SELECT * FROM profiles WHERE user_id = ?", (user_id,))
+
+    async def save(self, row: Row) -> None:
+        updates = ", ".join(f"{c} = excluded.{c}" for c in _columns([c for c in row if c not in ("id", "user_id")]).split(", "))
+        await self.db.insert_returning(lambda r: _insert_sql("profiles", r, f"ON CONFLICT(user_id) DO UPDATE SET {updates}"), [_with_id(row)])
+
+class SQLiteTransactionRepository(TransactionRepository):
+    def __init__(self, db: SQLiteDatabase, table: str):
+        self.db = db
+        self.table = table
+
+    async def get(self, user_id: str, id: str, columns: Columns = None) -> Optional[Row]:
+        return await self.db.fetch_one(f"SELECT {_columns(columns)} FROM {self.table} WHERE id = ? AND user_id = ?", (id, user_id))
+
+    async def list_range(self, user_id: str, start_date: str, end_date: str, columns: Columns = None) -> List[Row]:
+        return await self.db.fetch(
+            f"SELECT {_columns(columns)} FROM {self.table} WHERE user_id = ? AND date >= ? AND date <= ? ORDER BY date, id",
+            (user_id, start_date, end_date))
+
+    async def list_page(self, user_id: str, limit: int, after: Optional[Tuple[str, str]] = None, columns: Columns = None,
+                        start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Row]:
+        if columns:
+            columns = [*columns, *(c for c in ("date", "id") if c not in columns)]
+        where, params = ["user_id = ?"], [user_id]
+        if start_date:
+            where.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            where.append("date <= ?")
+            params.append(end_date)
+        if after:
+            # A row-value comparison is an index range scan; the equivalent OR is not
+            where.append("(date, id) < (?, ?)")
+            params.extend(after)
+        return await self.db.fetch(
+            f"SELECT {_columns(columns)} FROM {self.table} WHERE {' AND '.join(where)} ORDER BY date DESC, id DESC LIMIT ?",
+            (*params, limit))
+
+    async def list_on_dates(self, user_id: str, dates: Iterable[str], columns: Columns = None) -> List[Row]:
+        dates = list(dates)
+        if not dates:
+            return []
+        marks = ", ".join("?" for _ in dates)
+        return await self.db.fetch(f"SELECT {_columns(columns)} FROM {self.table} WHERE user_id = ? AND date IN ({marks})", (user_id, *dates))
+
+    async def scan(self, columns: Columns = None, user_id: Optional[str] = None) -> List[Row]:
+        if user_id:
+            return await self.db.fetch(f"SELECT {_columns(columns)} FROM {self.table} WHERE user_id = ? ORDER BY id", (user_id,))
+        return await self.db.fetch(f"SELECT {_columns(columns)} FROM {self.table} ORDER BY id")
+
+    async def insert(self, row: Row) -> Optional[Row]:
+        created = await self.insert_many([row])
+        return created[0] if created else None
+
+    async def insert_many(self, rows: List[Row]) -> List[Row]:
+        return await self.db.insert_returning(lambda r: _insert_sql(self.table, r), [_with_id(r) for r in rows])
+
+    async def update(self, user_id: str, id: str, data: Row) -> Optional[Tuple[Row, Row]]:
+        pairs = await self.update_many(user_id, [{**data, "id": id}])
+        return pairs[0] if pairs else None
+
+    async def update_many(self, user_id: str, rows: List[Row]) -> List[Tuple[Row, Row]]:
+        if not rows:
+            return []
+        columns = [c for c in rows[0] if c != "id"]
+        sets = ", ".join(f"{c} = ?" for c in _columns(columns).split(", "))
+
+        # RETURNING cannot see the old values, so read them first in the same transaction
+        def call(c: sqlite3.Connection):
+            ids = [str(row["id"]) for row in rows]
+            marks = ", ".join("?" for _ in ids)
+            old = {r["id"]: dict(r) for r in c.execute(f"SELECT * FROM {self.table} WHERE user_id = ? AND id IN ({marks})", (user_id, *ids))}
+            owned = [row for row in rows if str(row["id"]) in old]
+            c.executemany(f"UPDATE {self.table} SET {sets} WHERE id = ? AND user_id = ?",
+                          [(*(row[col] for col in columns), str(row["id"]), user_id) for row in owned])
+            new = {r["id"]: dict(r) for r in c.execute(f"SELECT * FROM {self.table} WHERE user_id = ? AND id IN ({marks})", (user_id, *ids))}
+            return [(old[str(row["id"])], new[str(row["id"])]) for row in owned]
+        return await self.db.run(call)
+
+    async def delete(self, user_id: str, id: str) -> List[Row]:
+        return await self.db.fetch(f"DELETE FROM {self.table} WHERE id = ? AND user_id = ? RETURNING *", (id, user_id))
+
+    async def delete_many(self, user_id: str, ids: Sequence[str]) -> List[Row]:
+        if not ids:
+            return []
+        marks = ", ".join("?" for _ in ids)
+        return await self.db.fetch(f"DELETE FROM {self.table} WHERE user_id = ? AND id IN ({marks}) RETURNING *", (user_id, *ids))
+
+class SQLiteBudgetRepository(BudgetRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def get(self, user_id: str, month: str) -> Optional[Row]:
+        return await self.db.fetch_one("SELECT * FROM budgets WHERE user_id = ? AND month = ?", (user_id, month))
+
+    async def list(self, user_id: str, limit: int, columns: Columns = None) -> List[Row]:
+        return await self.db.fetch(f"SELECT {_columns(columns)} FROM budgets WHERE user_id = ? ORDER BY month LIMIT ?", (user_id, limit))
+
+    async def list_range(self, user_id: str, start_month: str, end_month: str, columns: Columns = None) -> List[Row]:
+        return await self.db.fetch(f"SELECT {_columns(columns)} FROM budgets WHERE user_id = ? AND month >= ? AND month <= ?",
+                                   (user_id, start_month, end_month))
+
+    async def upsert(self, row: Row) -> Optional[Row]:
+        conflict = "ON CONFLICT(user_id, month) DO UPDATE SET total_budget = excluded.total_budget"
+        created = await self.db.insert_returning(lambda r: _insert_sql("budgets", r, conflict), [_with_id(row)])
+        return created[0] if created else None
+
+class SQLiteChatHistoryRepository(ChatHistoryRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def list(self, user_id: str, limit: int) -> List[Row]:
+        return await self.db.fetch("SELECT * FROM chat_history WHERE user_id = ? ORDER BY created_at LIMIT ?", (user_id, limit))
+
+    async def list_recent(self, user_id: str, limit: int) -> List[Row]:
+        rows = await self.db.fetch("SELECT id, role, content, created_at FROM chat_history WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit))
+        return rows[::-1]
+
+    async def insert_many(self, rows: List[Row]) -> None:
+        await self.db.insert_returning(lambda r: _insert_sql("chat_history", r, "ON CONFLICT(id) DO NOTHING"), [_with_id(r) for r in rows])
+
+    async def clear(self, user_id: str) -> None:
+        await self.db.fetch("DELETE FROM chat_history WHERE user_id = ?", (user_id,))
+
+class SQLiteAggregateRepository(AggregateRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def list_month(self, user_id: str, month: str) -> List[Row]:
+        return await self.db.fetch("SELECT month, kind, category, total, entry_count FROM monthly_aggregates WHERE user_id = ? AND month = ?",
+                                   (user_id, month))
+
+    async def list_range(self, user_id: str, start_month: str, end_month: str) -> List[Row]:
+        return await self.db.fetch(
+            "SELECT month, kind, category, total, entry_count FROM monthly_aggregates "
+            "WHERE user_id = ? AND month >= ? AND month <= ? ORDER BY month",
+            (user_id, start_month, end_month)
+        )
+
+    async def scan(self, user_id: Optional[str] = None) -> List[Row]:
+        sql = "SELECT user_id, month, kind, category, total, entry_count FROM monthly_aggregates"
+        if user_id:
+            return await self.db.fetch(sql + " WHERE user_id = ? ORDER BY id", (user_id,))
+        return await self.db.fetch(sql + " ORDER BY id")
+
+    async def recompute(self, user_id: Optional[str] = None) -> List[Row]:
+        where = "WHERE user_id = ? " if user_id else ""
+        sql = (
+            "SELECT user_id, substr(date, 1, 7) AS month, 'income' AS kind, '' AS category, "
+            f"SUM(amount) AS total, COUNT(*) AS entry_count FROM income {where}GROUP BY 1, 2 "
+            "UNION ALL "
+            "SELECT user_id, substr(date, 1, 7), 'expense', COALESCE(NULLIF(category, ''), 'Other'), "
+            f"SUM(amount), COUNT(*) FROM expenses {where}GROUP BY 1, 2, 4"
+        )
+        return await self.db.fetch(sql, (user_id, user_id) if user_id else ())
+
+    async def list_daily(self, user_id: str, start_day: str, end_day: str) -> List[Row]:
+        return await self.db.fetch(
+            "SELECT day, category, total, entry_count FROM daily_spend WHERE user_id = ? AND day >= ? AND day <= ? ORDER BY day",
+            (user_id, start_day, end_day)
+        )
+
+    async def scan_daily(self, user_id: Optional[str] = None) -> List[Row]:
+        sql = "SELECT user_id, day, category, total, entry_count FROM daily_spend"
+        if user_id:
+            return await self.db.fetch(sql + " WHERE user_id = ? ORDER BY id", (user_id,))
+        return await self.db.fetch(sql + " ORDER BY id")
+
+    async def recompute_daily(self, user_id: Optional[str] = None) -> List[Row]:
+        where = "WHERE user_id = ? " if user_id else ""
+        return await self.db.fetch(
+            "SELECT user_id, date AS day, COALESCE(NULLIF(category, ''), 'Other') AS category, "
+            f"SUM(amount) AS total, COUNT(*) AS entry_count FROM expenses {where}GROUP BY 1, 2, 3",
+            (user_id,) if user_id else ()
+        )
+
+    async def apply_deltas(self, deltas: List[Row], daily: List[Row] = ()) -> None:
+        add = "total = total + excluded.total, entry_count = entry_count + excluded.entry_count"
+        monthly_sql, monthly_params = self._monthly(deltas, add)
+        daily_sql, daily_params = self._daily(daily, add)
+        def write(c):
+            # Both tables change in the same transaction
+            c.executemany(monthly_sql, monthly_params)
+            c.executemany(daily_sql, daily_params)
+        await self.db.run(write)
+
+    async def upsert_many(self, rows: List[Row]) -> None:
+        sql, params = self._monthly([{**r, "amount": r["total"], "count": r["entry_count"]} for r in rows],
+                                    "total = excluded.total, entry_count = excluded.entry_count")
+        await self.db.run(lambda c: c.executemany(sql, params))
+
+    async def upsert_daily(self, rows: List[Row]) -> None:
+        sql, params = self._daily([{**r, "amount": r["total"], "count": r["entry_count"]} for r in rows],
+                                  "total = excluded.total, entry_count = excluded.entry_count")
+        await self.db.run(lambda c: c.executemany(sql, params))
+
+    @staticmethod
+    def _monthly(rows: List[Row], assignment: str) -> Tuple[str, List[tuple]]:
+        sql = (
+            "INSERT INTO monthly_aggregates (id, user_id, month, kind, category, total, entry_count) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT(user_id, month, kind, category) DO UPDATE SET {assignment}, updated_at = {SQLITE_NOW}"
+        )
+        return sql, [(str(uuid4()), r["user_id"], r["month"], r["kind"], r["category"], r["amount"], r["count"]) for r in rows]
+
+    @staticmethod
+    def _daily(rows: List[Row], assignment: str) -> Tuple[str, List[tuple]]:
+        sql = (
+            "INSERT INTO daily_spend (id, user_id, day, category, total, entry_count) VALUES (?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT(user_id, day, category) DO UPDATE SET {assignment}, updated_at = {SQLITE_NOW}"
+        )
+        return sql, [(str(uuid4()), r["user_id"], r["day"], r["category"], r["amount"], r["count"]) for r in rows]
+
+def create_sqlite_repositories(path: str) -> Repositories:
+    """Open (or create) a SQLite database and build repositories on it."""
+    db = SQLiteDatabase(path)
+    return Repositories(
+        users=SQLiteUserRepository(db),
+        profiles=SQLiteProfileRepository(db),
+        income=SQLiteTransactionRepository(db, "income"),
+        expenses=SQLiteTransactionRepository(db, "expenses"),
+        budgets=SQLiteBudgetRepository(db),
+        chat_history=SQLiteChatHistoryRepository(db),
+        aggregates=SQLiteAggregateRepository(db)
+    )
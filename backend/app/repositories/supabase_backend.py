@@ -0,0 +1,234 @@
+"""
+Supabase storage backend.
+Implements the repositories with PostgREST queries on the async Supabase
+client from app.core.config.
+"""
+
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Sequence, Tuple
+from app.repositories.base import (
+    Columns, Row, Repositories, UserRepository, ProfileRepository, TransactionRepository,
+    BudgetRepository, ChatHistoryRepository, AggregateRepository
+)
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
+# Page size for unbounded reads (matches PostgREST's default max-rows)
+PAGE_SIZE = 1000
+
+def _select(columns: Columns) -> str:
+    return ", ".join(columns) if columns else "*"
+
+def _with_keys(columns: Columns) -> Columns:
+    """Add the (date, id) sort key to a projection."""
+    return [*columns, *(c for c in ("date", "id") if c not in columns)] if columns else None
+
+async def _fetch_all(build_query) -> List[Row]:
+    """
+    Page through a query until a short page comes back.
+
+    Args:
+        build_query: Callable returning a fresh, ordered query builder
+    """
+    rows = []
+    offset = 0
+    while True:
+        page = (await build_query().range(offset, offset + PAGE_SIZE - 1).execute()).data
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+class SupabaseRepository:
+    """Base for the Supabase repositories; the client is resolved on first query."""
+
+    def __init__(self, get_client: Callable[[], "AsyncClient"]):
+        self._get_client = get_client
+
+    @property
+    def client(self) -> "AsyncClient":
+        return self._get_client()
+
+class SupabaseUserRepository(SupabaseRepository, UserRepository):
+    async def get_by_username(self, username: str) -> Optional[Row]:
+        res = (await self.client.table("users").select("*").eq("username", username).execute()).data
+        return res[0] if res else None
+
+    async def create(self, row: Row) -> Optional[Row]:
+        created = (await self.client.table("users").insert(row).execute()).data
+        return created[0] if created else None
+
+class SupabaseProfileRepository(SupabaseRepository, ProfileRepository):
+    async def get(self, user_id: str) -> Optional[Row]:
+        res = (await self.client.table("profiles").select("*").eq("user_id", user_id).execute()).data
+        return res[0] if res else None
+
+    async def save(self, row: Row) -> None:
+        await self.client.table("profiles").upsert(row, on_conflict="user_id").execute()
+
+class SupabaseTransactionRepository(SupabaseRepository, TransactionRepository):
+    def __init__(self, get_client: Callable[[], "AsyncClient"], table: str):
+        super().__init__(get_client)
+        self.table = table
+
+    async def get(self, user_id: str, id: str, columns: Columns = None) -> Optional[Row]:
+        res = (await self.client.table(self.table).select(_select(columns)).eq("id", id).eq("user_id", user_id).execute()).data
+        return res[0] if res else None
+
+    async def list_range(self, user_id: str, start_date: str, end_date: str, columns: Columns = None) -> List[Row]:
+        return await _fetch_all(lambda: self.client.table(self.table).select(_select(columns))
+                                .eq("user_id", user_id).gte("date", start_date).lte("date", end_date)
+                                .order("date").order("id"))
+
+    async def list_page(self, user_id: str, limit: int, after: Optional[Tuple[str, str]] = None, columns: Columns = None,
+                        start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Row]:
+        query = self.client.table(self.table).select(_select(_with_keys(columns))).eq("user_id", user_id)
+        if start_date:
+            query = query.gte("date", start_date)
+        if end_date:
+            query = query.lte("date", end_date)
+        if after:
+            date, id = after
+            # The redundant date bound lets Postgres start an index range scan at the cursor
+            query = query.lte("date", date).or_(f"date.lt.{date},and(date.eq.{date},id.lt.{id})")
+        return (await query.order("date", desc=True).order("id", desc=True).limit(limit).execute()).data
+
+    async def list_on_dates(self, user_id: str, dates: Iterable[str], columns: Columns = None) -> List[Row]:
+        dates = list(dates)
+        if not dates:
+            return []
+        # Busy dates can hold more rows than one PostgREST response
+        return await _fetch_all(lambda: self.client.table(self.table).select(_select(columns))
+                                .eq("user_id", user_id).in_("date", dates).order("id"))
+
+    async def scan(self, columns: Columns = None, user_id: Optional[str] = None) -> List[Row]:
+        def build():
+            query = self.client.table(self.table).select(_select(columns))
+            if user_id:
+                query = query.eq("user_id", user_id)
+            return query.order("id")
+        return await _fetch_all(build)
+
+    async def insert(self, row: Row) -> Optional[Row]:
+        res = (await self.client.table(self.table).insert(row).execute()).data
+        return res[0] if res else None
+
+    async def insert_many(self, rows: List[Row]) -> List[Row]:
+        if not rows:
+            return []
+        return (await self.client.table(self.table).insert(rows).execute()).data
+
+    async def update(self, user_id: str, id: str, data: Row) -> Optional[Tuple[Row, Row]]:
+        # A plain PATCH cannot return the old row; the batch RPC reads and updates it in one statement
+        pairs = await self.update_many(user_id, [{**data, "id": id}])
+        return pairs[0] if pairs else None
+
+    async def update_many(self, user_id: str, rows: List[Row]) -> List[Tuple[Row, Row]]:
+        if not rows:
+            return []
+        # One UPDATE ... FROM statement; see update_<table>_batch in database_schema.sql
+        res = (await self.client.rpc(f"update_{self.table}_batch", {"p_user_id": user_id, "p_rows": rows}).execute()).data
+        return [(r["old"], r["new"]) for r in res]
+
+    async def delete(self, user_id: str, id: str) -> List[Row]:
+        return (await self.client.table(self.table).delete().eq("id", id).eq("user_id", user_id).execute()).data
+
+    async def delete_many(self, user_id: str, ids: Sequence[str]) -> List[Row]:
+        if not ids:
+            return []
+        return (await self.client.table(self.table).delete().eq("user_id", user_id).in_("id", list(ids)).execute()).data
+
+class SupabaseBudgetRepository(SupabaseRepository, BudgetRepository):
+    async def get(self, user_id: str, month: str) -> Optional[Row]:
+        res = (await self.client.table("budgets").select("*").eq("user_id", user_id).eq("month", month).execute()).data
+        return res[0] if res else None
+
+    async def list(self, user_id: str, limit: int, columns: Columns = None) -> List[Row]:
+        return (await self.client.table("budgets").select(_select(columns)).eq("user_id", user_id)
+                .order("month", desc=False).limit(limit).execute()).data
+
+    async def list_range(self, user_id: str, start_month: str, end_month: str, columns: Columns = None) -> List[Row]:
+        return (await self.client.table("budgets").select(_select(columns)).eq("user_id", user_id)
+                .gte("month", start_month).lte("month", end_month).execute()).data
+
+    async def upsert(self, row: Row) -> Optional[Row]:
+        res = (await self.client.table("budgets").upsert(row, on_conflict="user_id, month").execute()).data
+        return res[0] if res else None
+
+class SupabaseChatHistoryRepository(SupabaseRepository, ChatHistoryRepository):
+    async def list(self, user_id: str, limit: int) -> List[Row]:
+        return (await self.client.table("chat_history").select("*").eq("user_id", user_id)
+                .order("created_at", desc=False).limit(limit).execute()).data
+
+    async def list_recent(self, user_id: str, limit: int) -> List[Row]:
+        rows = (await self.client.table("chat_history").select("id, role, content, created_at").eq("user_id", user_id)
+                .order("created_at", desc=True).limit(limit).execute()).data
+        return rows[::-1]
+
+    async def insert_many(self, rows: List[Row]) -> None:
+        await self.client.table("chat_history").upsert(rows, on_conflict="id", ignore_duplicates=True).execute()
+
+    async def clear(self, user_id: str) -> None:
+        await self.client.table("chat_history").delete().eq("user_id", user_id).execute()
+
+class SupabaseAggregateRepository(SupabaseRepository, AggregateRepository):
+    async def list_month(self, user_id: str, month: str) -> List[Row]:
+        return (await self.client.table("monthly_aggregates").select("month, kind, category, total, entry_count")
+                .eq("user_id", user_id).eq("month", month).execute()).data
+
+    async def list_range(self, user_id: str, start_month: str, end_month: str) -> List[Row]:
+        return await _fetch_all(lambda: self.client.table("monthly_aggregates").select("month, kind, category, total, entry_count")
+                                .eq("user_id", user_id).gte("month", start_month).lte("month", end_month)
+                                .order("month").order("kind").order("category"))
+
+    async def scan(self, user_id: Optional[str] = None) -> List[Row]:
+        def build():
+            query = self.client.table("monthly_aggregates").select("user_id, month, kind, category, total, entry_count")
+            if user_id:
+                query = query.eq("user_id", user_id)
+            return query.order("id")
+        return await _fetch_all(build)
+
+    async def recompute(self, user_id: Optional[str] = None) -> List[Row]:
+        # GROUP BY runs in Postgres; only one row per key comes back
+        return await _fetch_all(lambda: self.client.rpc("transaction_monthly_totals", {"p_user_id": user_id})
+                                .order("user_id").order("month").order("kind").order("category"))
+
+    async def list_daily(self, user_id: str, start_day: str, end_day: str) -> List[Row]:
+        return await _fetch_all(lambda: self.client.table("daily_spend").select("day, category, total, entry_count")
+                                .eq("user_id", user_id).gte("day", start_day).lte("day", end_day)
+                                .order("day").order("category"))
+
+    async def scan_daily(self, user_id: Optional[str] = None) -> List[Row]:
+        def build():
+            query = self.client.table("daily_spend").select("user_id, day, category, total, entry_count")
+            if user_id:
+                query = query.eq("user_id", user_id)
+            return query.order("id")
+        return await _fetch_all(build)
+
+    async def recompute_daily(self, user_id: Optional[str] = None) -> List[Row]:
+        return await _fetch_all(lambda: self.client.rpc("expense_daily_totals", {"p_user_id": user_id})
+                                .order("user_id").order("day").order("category"))
+
+    async def apply_deltas(self, deltas: List[Row], daily: List[Row] = ()) -> None:
+        # Upsert-and-add happens server side so concurrent writers don't race
+        await self.client.rpc("apply_aggregate_deltas", {"p_deltas": deltas, "p_daily": list(daily)}).execute()
+
+    async def upsert_many(self, rows: List[Row]) -> None:
+        await self.client.table("monthly_aggregates").upsert(rows, on_conflict="user_id, month, kind, category").execute()
+
+    async def upsert_daily(self, rows: List[Row]) -> None:
+        await self.client.table("daily_spend").upsert(rows, on_conflict="user_id, day, category").execute()
+
+def create_supabase_repositories(get_client: Callable[[], "AsyncClient"]) -> Repositories:
+    """Build the Supabase-backed repositories around one (lazily created) client."""
+    return Repositories(
+        users=SupabaseUserRepository(get_client),
+        profiles=SupabaseProfileRepository(get_client),
+        income=SupabaseTransactionRepository(get_client, "income"),
+        expenses=SupabaseTransactionRepository(get_client, "expenses"),
+        budgets=SupabaseBudgetRepository(get_client),
+        chat_history=SupabaseChatHistoryRepository(get_client),
+        aggregates=SupabaseAggregateRepository(get_client)
+    )
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from app.services.auth_service import signup, login, get_user_by_token
-from app.core.config import supabase
+from app.services.auth_service import signup, login
+from app.services.password_hasher import PasswordHasherBusy
+from app.dependencies import get_current_user
+from app.repositories import repos
 from app.schemas.profile import ProfileData
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+# Returned when the password hashing pool is saturated
+HASHER_BUSY = HTTPException(status_code=503, detail="Too many sign-in attempts in progress, please retry shortly", headers={"Retry-After": "1"})
+
 class SignupRequest(BaseModel):
     username: str
     password: str
@@ -15,44 +20,40 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/signup")
-def signup_endpoint(req: SignupRequest):
-    created = signup(req.username, req.password)
+async def signup_endpoint(req: SignupRequest):
+    try:
+        created = await signup(req.username, req.password)
+    except PasswordHasherBusy:
+        raise HASHER_BUSY
     # If signup failed, it likely means username exists
     if not created:
         raise HTTPException(status_code=400, detail="Username already exists")
     return {"message": "Account created"}
 
 @router.post("/login")
-def login_endpoint(req: LoginRequest):
-    token_data = login(req.username, req.password)
+async def login_endpoint(req: LoginRequest):
+    try:
+        token_data = await login(req.username, req.password)
+    except PasswordHasherBusy:
+        raise HASHER_BUSY
     if not token_data:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     return token_data
 
 @router.get("/profile")
-def get_profile(authorization: str | None = Header(default=None)):
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
-    res = supabase.table("profiles").select("*").eq("user_id", user_id).execute().data
-    if not res:
+async def get_profile(user_id: str = Depends(get_current_user)):
+    prof = await repos.profiles.get(user_id)
+    if not prof:
         return {"monthly_income": 0, "savings_rate": 0.2}
-    return {"monthly_income": float(res[0].get("monthly_income") or 0), "savings_rate": float(res[0].get("savings_rate") or 0.2)}
+    return {"monthly_income": float(prof.get("monthly_income") or 0), "savings_rate": float(prof.get("savings_rate") or 0.2)}
 
 @router.put("/profile")
-def update_profile(data: ProfileData, authorization: str | None = Header(default=None)):
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
-    existing = supabase.table("profiles").select("*").eq("user_id", user_id).execute().data
+async def update_profile(data: ProfileData, user_id: str = Depends(get_current_user)):
     MAX_VAL = 99999999.99
     income = data.monthly_income or 0
     if income > MAX_VAL:
          raise HTTPException(status_code=400, detail="Monthly income is too large (max 99,999,999.99)")
     
     payload = {"user_id": user_id, "monthly_income": income, "savings_rate": data.savings_rate or 0.2}
-    if existing:
-        supabase.table("profiles").update(payload).eq("user_id", user_id).execute()
-    else:
-        supabase.table("profiles").insert(payload).execute()
+    await repos.profiles.save(payload)
     return {"message": "Profile saved"}
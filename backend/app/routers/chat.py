@@ -1,74 +1,106 @@
-from fastapi import APIRouter, Header, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from app.schemas.chat import ChatRequest, ChatResponse
-from app.services.ai_service import get_ai_response
-from app.services.finance_service import calculate_summary
-from datetime import date
+from app.services.ai_service import LLMBusy, get_ai_response, stream_ai_response, ttft_window
+from app.services.chat_writer import chat_writer
+from app.services.chat_context import chat_context
+from app.dependencies import get_current_user, get_optional_user
+import json
 import time
-import httpx
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
-from app.core.config import supabase
+# Returned when the LLM gateway sheds the call
+AI_BUSY = HTTPException(status_code=503, detail="AI service is busy, please retry shortly", headers={"Retry-After": "2"})
 
-def safe_db_insert(table: str, data: dict):
-    for attempt in range(3):
-        try:
-            supabase.table(table).insert(data).execute()
-            break
-        except (httpx.ReadError, httpx.ConnectError, httpx.RemoteProtocolError):
-            if attempt == 2:
-                raise
-            time.sleep(0.5)
+from app.repositories import repos
 
 @router.get("/history")
-def get_chat_history(authorization: str | None = Header(default=None)):
-    from app.services.auth_service import get_user_by_token
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-         raise HTTPException(status_code=401, detail="Login required")
+async def get_chat_history(user_id: str = Depends(get_current_user)):
+    # Snapshot unflushed messages before querying so none fall in between
+    pending = chat_writer.pending_for(user_id)
     
     # Fetch last 50 messages
-    response = supabase.table("chat_history").select("*").eq("user_id", user_id).order("created_at", desc=False).limit(50).execute()
-    return response.data
+    stored = await repos.chat_history.list(user_id, 50)
+    stored_ids = {str(row["id"]) for row in stored}
+    return stored + [row for row in pending if row["id"] not in stored_ids]
 
 @router.delete("/history")
-def clear_chat_history(authorization: str | None = Header(default=None)):
-    from app.services.auth_service import get_user_by_token
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-         raise HTTPException(status_code=401, detail="Login required")
-    
-    supabase.table("chat_history").delete().eq("user_id", user_id).execute()
+async def clear_chat_history(user_id: str = Depends(get_current_user)):
+    # Drop queued messages first so they are not written back after the delete
+    await chat_writer.discard(user_id)
+    await repos.chat_history.clear(user_id)
+    chat_context.forget(user_id)
     return {"message": "Chat history cleared"}
 
 @router.post("/generate", response_model=ChatResponse)
-def chat_endpoint(request: ChatRequest, authorization: str | None = Header(default=None)):
-    from app.services.auth_service import get_user_by_token
-    
-    user_id = get_user_by_token(authorization) if authorization else None
+async def chat_endpoint(request: ChatRequest, user_id: str | None = Depends(get_optional_user)):
     if not user_id:
         context_str = "User is not logged in."
     else:
-        # Fetch context (current month's summary)
-        current_month = date.today().strftime("%Y-%m")
-        summary = calculate_summary(user_id, current_month)
-        context_str = f"User's Financial Status for {current_month}: {summary.model_dump_json()}"
-        
-        # Save User Message
-        safe_db_insert("chat_history", {
-            "user_id": user_id,
-            "role": "user",
-            "content": request.message
-        })
+        # Compact digest of the current month plus recent turns
+        context_str = await chat_context.build(user_id)
     
-    response_text = get_ai_response(request.message, context=context_str)
+    try:
+        response_text = await get_ai_response(request.message, context=context_str)
+    except LLMBusy:
+        # Nothing is saved, so a retry does not duplicate the question
+        raise AI_BUSY
     
     if user_id:
+        # Save User Message
+        await chat_writer.enqueue(user_id, "user", request.message)
+        chat_context.record(user_id, "user", request.message)
+        
         # Save AI Response
-        safe_db_insert("chat_history", {
-            "user_id": user_id,
-            "role": "assistant",
-            "content": response_text
-        })
+        await chat_writer.enqueue(user_id, "assistant", response_text)
+        chat_context.record(user_id, "assistant", response_text)
 
     return ChatResponse(response=response_text)
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    """Format one server-sent event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, user_id: str | None = Depends(get_optional_user)):
+    if not user_id:
+        context_str = "User is not logged in."
+    else:
+        context_str = await chat_context.build(user_id)
+        
+        await chat_writer.enqueue(user_id, "user", request.message)
+        chat_context.record(user_id, "user", request.message)
+    
+    async def events():
+        # Starlette cancels this generator when the client disconnects,
+        # which cancels the in-flight Gemini request with it
+        started = time.perf_counter()
+        ttft_ms = None
+        parts = []
+        try:
+            async for token in stream_ai_response(request.message, context=context_str):
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                parts.append(token)
+                yield sse_event({"token": token})
+        except Exception as e:
+            yield sse_event({"error": f"Error communicating with AI: {str(e)}"}, event="error")
+            return
+        
+        # Persist the full answer only once the stream completed
+        if user_id:
+            answer = "".join(parts)
+            await chat_writer.enqueue(user_id, "assistant", answer)
+            chat_context.record(user_id, "assistant", answer)
+        yield sse_event({"ttft_ms": ttft_ms}, event="done")
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@router.get("/stream/stats")
+async def chat_stream_stats():
+    return {"ttft_ms": ttft_window.stats()}
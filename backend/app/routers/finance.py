@@ -1,187 +1,254 @@
-from fastapi import APIRouter, HTTPException, Header
-from app.schemas.finance import IncomeCreate, IncomeResponse, ExpenseCreate, ExpenseResponse, BudgetCreate, BudgetResponse, BudgetSummary, BudgetPlanRequest, BudgetPlanResponse
-from app.core.config import supabase
-from app.services import finance_service
-from app.services.auth_service import get_user_by_token
-from app.services.ai_service import get_ai_response
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from app.schemas.finance import IncomeCreate, IncomeResponse, ExpenseCreate, ExpenseResponse, BudgetCreate, BudgetResponse, BudgetSummary, BudgetPlanRequest, BudgetPlanResponse, ImportResult, TransactionPage, AnalyticsResponse, BatchRequest, BatchResult
+from app.repositories import repos
+from app.services import finance_service, aggregate_service, import_service, export_service, batch_service
+from app.dependencies import get_current_user
+from app.services.ai_service import LLMBusy, get_templated_ai_response
+from app.services.summary_cache import summary_cache, month_of
+from app.services.categorizer import auto_categorize
+from app.core.responses import model_response, json_response
 from typing import List
+import datetime
 
 router = APIRouter(prefix="/finance", tags=["Finance"])
 
 # Helper to check DB
 def check_db():
-    if not supabase:
+    if not repos:
         raise HTTPException(status_code=500, detail="Database connection not configured")
 
+def check_kind(kind: str):
+    if kind not in ("income", "expenses"):
+        raise HTTPException(status_code=404, detail="Unknown transaction kind (expected income or expenses)")
+
 @router.post("/income", response_model=IncomeResponse)
-def add_income(income: IncomeCreate, authorization: str | None = Header(default=None)):
+async def add_income(income: IncomeCreate, user_id: str = Depends(get_current_user)):
     check_db()
     data = income.model_dump()
     data['date'] = str(data.pop('entry_date'))
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
     data['user_id'] = user_id 
     
-    response = supabase.table("income").insert(data).execute()
-    if not response.data:
+    created = await repos.income.insert(data)
+    if not created:
         raise HTTPException(status_code=400, detail="Failed to add income")
-    return response.data[0]
+    await aggregate_service.apply_write_deltas(aggregate_service.income_delta(created, 1))
+    summary_cache.invalidate(user_id, [month_of(data['date'])])
+    return created
 
 @router.post("/expenses", response_model=ExpenseResponse)
-def add_expense(expense: ExpenseCreate, authorization: str | None = Header(default=None)):
+async def add_expense(expense: ExpenseCreate, user_id: str = Depends(get_current_user)):
     check_db()
     data = expense.model_dump()
     data['date'] = str(data.pop('entry_date'))
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
     data['user_id'] = user_id
-    desc = (data.get('description') or '').lower()
-    cat = data.get('category') or 'Other'
-    mapping = [
-        ('Food', ['food', 'restaurant', 'grocer', 'meal', 'coffee']),
-        ('Transport', ['uber', 'bus', 'train', 'taxi', 'cab', 'fuel']),
-        ('Utilities', ['electric', 'water', 'internet', 'utility', 'wifi']),
-        ('Entertainment', ['movie', 'netflix', 'game', 'concert']),
-        ('Housing', ['rent', 'mortgage'])
-    ]
-    if cat == 'Other' and desc:
-        for mcat, kws in mapping:
-            if any(k in desc for k in kws):
-                data['category'] = mcat
-                break
+    data['category'] = auto_categorize(data.get('description'), data.get('category'))
     
-    response = supabase.table("expenses").insert(data).execute()
-    if not response.data:
+    created = await repos.expenses.insert(data)
+    if not created:
         raise HTTPException(status_code=400, detail="Failed to add expense")
-    return response.data[0]
+    await aggregate_service.apply_write_deltas(aggregate_service.expense_delta(created, 1))
+    summary_cache.invalidate(user_id, [month_of(data['date'])])
+    return created
 
 @router.post("/budget", response_model=BudgetResponse)
-def set_budget(budget: BudgetCreate, authorization: str | None = Header(default=None)):
+async def set_budget(budget: BudgetCreate, user_id: str = Depends(get_current_user)):
     check_db()
     data = budget.model_dump()
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
     data['user_id'] = user_id
     
-    response = supabase.table("budgets").upsert(data, on_conflict="user_id, month").execute()
-    if not response.data:
+    saved = await repos.budgets.upsert(data)
+    if not saved:
         raise HTTPException(status_code=400, detail="Failed to set budget")
-    return response.data[0]
+    summary_cache.invalidate(user_id, [budget.month])
+    return saved
+
+@router.post("/import", response_model=ImportResult)
+async def import_statement(file: UploadFile = File(...), format: str | None = None, user_id: str = Depends(get_current_user)):
+    check_db()
+    fmt = (format or (file.filename or "").rsplit(".", 1)[-1]).lower()
+    if fmt == "qfx":
+        fmt = "ofx"
+    if fmt not in ("csv", "ofx"):
+        raise HTTPException(status_code=400, detail="Unsupported format (expected csv or ofx)")
+    return await import_service.import_statement(user_id, file.file, fmt)
 
 @router.get("/summary/{month}", response_model=BudgetSummary)
-def get_summary(month: str, authorization: str | None = Header(default=None)):
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
-    return finance_service.calculate_summary(user_id, month)
+async def get_summary(month: str, slim: bool = False, user_id: str = Depends(get_current_user)):
+    # slim=true returns only aggregates; page through rows with /transactions
+    # The summary is validated when it is built; serialize it without re-validating
+    return model_response(await finance_service.calculate_summary(user_id, month, slim=slim))
+
+@router.get("/transactions/{kind}", response_model=TransactionPage)
+async def list_transactions(kind: str, limit: int = Query(default=50, ge=1, le=500), cursor: str | None = None,
+                            fields: str | None = None, start: datetime.date | None = None, end: datetime.date | None = None,
+                            user_id: str = Depends(get_current_user)):
+    check_kind(kind)
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        page = await finance_service.list_transactions(
+            user_id, kind, limit, cursor, field_list,
+            start.isoformat() if start else None, end.isoformat() if end else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(page)
+
+@router.get("/export")
+async def export(format: str = "csv", compress: str | None = None, start: datetime.date | None = None,
+                 end: datetime.date | None = None, user_id: str = Depends(get_current_user)):
+    # Rows are read page by page while the response streams, so memory stays flat
+    try:
+        media_type, filename = export_service.export_media(format, compress)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stream = export_service.stream_export(user_id, format, compress, start.isoformat() if start else None,
+                                          end.isoformat() if end else None)
+    return StreamingResponse(stream, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 @router.post("/auto_budget", response_model=BudgetResponse)
-def auto_budget(budget: BudgetCreate, authorization: str | None = Header(default=None)):
+async def auto_budget(budget: BudgetCreate, user_id: str = Depends(get_current_user)):
     check_db()
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
-    prof = supabase.table("profiles").select("*").eq("user_id", user_id).execute().data
+    prof = await repos.profiles.get(user_id)
     monthly_income = 0
     savings_rate = 0.2
     if prof:
-        monthly_income = float(prof[0].get("monthly_income") or 0)
-        savings_rate = float(prof[0].get("savings_rate") or 0.2)
+        monthly_income = float(prof.get("monthly_income") or 0)
+        savings_rate = float(prof.get("savings_rate") or 0.2)
     if monthly_income == 0:
-        incomes, _, _ = finance_service.get_monthly_data(user_id, budget.month)
-        monthly_income = sum(item['amount'] for item in incomes)
+        monthly_income, _, _ = await aggregate_service.get_month_aggregates(user_id, budget.month)
     alloc = monthly_income * (1 - savings_rate)
     payload = {"user_id": user_id, "month": budget.month, "total_budget": alloc}
-    resp = supabase.table("budgets").upsert(payload, on_conflict="user_id, month").execute()
-    if not resp.data:
+    saved = await repos.budgets.upsert(payload)
+    if not saved:
         raise HTTPException(status_code=400, detail="Failed to set auto budget")
-    return resp.data[0]
+    summary_cache.invalidate(user_id, [budget.month])
+    return saved
 
 @router.get("/history")
-def history(months: int = 6, authorization: str | None = Header(default=None)):
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
-    out = []
-    resp = supabase.table("budgets").select("*").eq("user_id", user_id).order("month", desc=False).limit(months).execute().data
-    for b in resp:
-        m = b["month"]
-        incomes, expenses, _ = finance_service.get_monthly_data(user_id, m)
-        out.append({
-            "month": m,
-            "income": sum(i["amount"] for i in incomes),
-            "expenses": sum(e["amount"] for e in expenses),
-            "budget": float(b.get("total_budget") or 0)
-        })
-    return out
+async def history(months: int = 6, start: str | None = None, end: str | None = None, user_id: str = Depends(get_current_user)):
+    # Explicit range: report every month between start and end
+    if start or end:
+        if not (start and end):
+            raise HTTPException(status_code=400, detail="Both start and end are required")
+        try:
+            return json_response(await finance_service.get_history(user_id, start, end))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    # Default: the first `months` months that have a budget
+    budgets = await repos.budgets.list(user_id, months, ["month", "total_budget"])
+    if not budgets:
+        return []
+    return json_response(await finance_service.get_history(user_id, budgets[0]["month"], budgets[-1]["month"], budgets=budgets))
+
+@router.get("/analytics", response_model=AnalyticsResponse)
+async def analytics(months: int = Query(default=12, ge=1, le=finance_service.MAX_HISTORY_MONTHS), end: str | None = None,
+                    user_id: str = Depends(get_current_user)):
+    # Imported on first use so NumPy stays off the startup path
+    from app.services import analytics_service
+    try:
+        return model_response(await analytics_service.get_analytics(user_id, months, end))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/budget_plan", response_model=BudgetPlanResponse)
-def budget_plan(req: BudgetPlanRequest, authorization: str | None = Header(default=None)):
+async def budget_plan(req: BudgetPlanRequest, user_id: str = Depends(get_current_user)):
     check_db()
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
-    prof = supabase.table("profiles").select("*").eq("user_id", user_id).execute().data
+    prof = await repos.profiles.get(user_id)
     monthly_income = 0.0
     if prof:
-        monthly_income = float(prof[0].get("monthly_income") or 0)
+        monthly_income = float(prof.get("monthly_income") or 0)
     if monthly_income == 0:
-        incomes, _, _ = finance_service.get_monthly_data(user_id, req.month)
-        monthly_income = sum(item["amount"] for item in incomes)
+        monthly_income, _, _ = await aggregate_service.get_month_aggregates(user_id, req.month)
     needs = monthly_income * 0.5
     wants = monthly_income * 0.3
     savings = monthly_income * 0.2
     total_budget = needs + wants
-    supabase.table("budgets").upsert({"user_id": user_id, "month": req.month, "total_budget": total_budget}, on_conflict="user_id, month").execute()
-    ctx = f"Month: {req.month}. Income: {monthly_income:.2f}. Needs: {needs:.2f}. Wants: {wants:.2f}. Savings: {savings:.2f}."
-    text = get_ai_response("Explain this 50/30/20 budget plan to the user in simple terms.", context=ctx)
+    await repos.budgets.upsert({"user_id": user_id, "month": req.month, "total_budget": total_budget})
+    summary_cache.invalidate(user_id, [req.month])
+    # The explanation is generated once for the context shape and filled in with this user's numbers
+    ctx = "Month: {month}. Income: {income}. Needs: {needs}. Wants: {wants}. Savings: {savings}."
+    values = {"month": req.month, "income": f"{monthly_income:.2f}", "needs": f"{needs:.2f}", "wants": f"{wants:.2f}", "savings": f"{savings:.2f}"}
+    try:
+        text = await get_templated_ai_response("Explain this 50/30/20 budget plan to the user in simple terms.", ctx, values)
+    except LLMBusy:
+        # The plan is already saved; fall back to the canned explanation
+        text = None
     if not isinstance(text, str):
         text = "Generated a 50/30/20 plan allocating 50% to needs, 30% to wants, and 20% to savings."
     return BudgetPlanResponse(month=req.month, needs=needs, wants=wants, savings=savings, total_budget=total_budget, explanation=text)
 
+# Batch routes are declared before /expenses/{id} and /income/{id} so "batch" is not read as an id
+@router.post("/{kind}/batch", response_model=BatchResult)
+async def create_batch(kind: str, batch: BatchRequest, user_id: str = Depends(get_current_user)):
+    check_kind(kind)
+    try:
+        return model_response(await batch_service.create_many(user_id, kind, batch.items))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/{kind}/batch", response_model=BatchResult)
+async def update_batch(kind: str, batch: BatchRequest, user_id: str = Depends(get_current_user)):
+    check_kind(kind)
+    try:
+        return model_response(await batch_service.update_many(user_id, kind, batch.items))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/{kind}", response_model=BatchResult)
+async def delete_batch(kind: str, ids: List[str] = Query(..., description="Row ids, repeated or comma-separated"),
+                       user_id: str = Depends(get_current_user)):
+    check_kind(kind)
+    id_list = [id.strip() for value in ids for id in value.split(",") if id.strip()]
+    try:
+        return model_response(await batch_service.delete_many(user_id, kind, id_list))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.delete("/expenses/{id}")
-def delete_expense(id: str, authorization: str | None = Header(default=None)):
+async def delete_expense(id: str, user_id: str = Depends(get_current_user)):
     check_db()
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
-    response = supabase.table("expenses").delete().eq("id", id).eq("user_id", user_id).execute()
+    deleted = await repos.expenses.delete(user_id, id)
+    await aggregate_service.apply_write_deltas(d for row in deleted for d in aggregate_service.expense_delta(row, -1))
+    summary_cache.invalidate(user_id, [month_of(row.get("date")) for row in deleted])
     return {"message": "Expense deleted"}
 
 @router.put("/expenses/{id}", response_model=ExpenseResponse)
-def update_expense(id: str, expense: ExpenseCreate, authorization: str | None = Header(default=None)):
+async def update_expense(id: str, expense: ExpenseCreate, user_id: str = Depends(get_current_user)):
     check_db()
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
     data = expense.model_dump()
     data['date'] = str(data.pop('entry_date'))
-    response = supabase.table("expenses").update(data).eq("id", id).eq("user_id", user_id).execute()
-    if not response.data:
+    # The old row comes back from the same statement, so concurrent updates each reverse what they replaced
+    pair = await repos.expenses.update(user_id, id, data)
+    if not pair:
         raise HTTPException(status_code=404, detail="Expense not found")
-    return response.data[0]
+    old, updated = pair
+    await aggregate_service.apply_write_deltas(
+        aggregate_service.expense_delta(old, -1) + aggregate_service.expense_delta(updated, 1)
+    )
+    summary_cache.invalidate(user_id, [month_of(old.get("date")), month_of(updated.get("date"))])
+    return updated
 
 @router.delete("/income/{id}")
-def delete_income(id: str, authorization: str | None = Header(default=None)):
+async def delete_income(id: str, user_id: str = Depends(get_current_user)):
     check_db()
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
-    response = supabase.table("income").delete().eq("id", id).eq("user_id", user_id).execute()
+    deleted = await repos.income.delete(user_id, id)
+    await aggregate_service.apply_write_deltas(d for row in deleted for d in aggregate_service.income_delta(row, -1))
+    summary_cache.invalidate(user_id, [month_of(row.get("date")) for row in deleted])
     return {"message": "Income deleted"}
 
 @router.put("/income/{id}", response_model=IncomeResponse)
-def update_income(id: str, income: IncomeCreate, authorization: str | None = Header(default=None)):
+async def update_income(id: str, income: IncomeCreate, user_id: str = Depends(get_current_user)):
     check_db()
-    user_id = get_user_by_token(authorization) if authorization else None
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Login required")
     data = income.model_dump()
     data['date'] = str(data.pop('entry_date'))
-    response = supabase.table("income").update(data).eq("id", id).eq("user_id", user_id).execute()
-    if not response.data:
+    # The old row comes back from the same statement, so concurrent updates each reverse what they replaced
+    pair = await repos.income.update(user_id, id, data)
+    if not pair:
         raise HTTPException(status_code=404, detail="Income not found")
-    return response.data[0]
+    old, updated = pair
+    await aggregate_service.apply_write_deltas(
+        aggregate_service.income_delta(old, -1) + aggregate_service.income_delta(updated, 1)
+    )
+    summary_cache.invalidate(user_id, [month_of(old.get("date")), month_of(updated.get("date"))])
+    return updated
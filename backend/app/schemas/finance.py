@@ -45,6 +45,15 @@ class BudgetResponse(BudgetBase):
     user_id: UUID
     created_at: str
 
+class SpendingForecast(BaseModel):
+    days_elapsed: int # Days of the month counted as spent so far
+    days_in_month: int
+    spent_to_date: float
+    projected_total: float # Projected month-end spending
+    projected_by_category: dict[str, float] # Highest first
+    projected_remaining_budget: Optional[float] = None # Budget minus projected total; None without a budget
+    projected_status: str # "On Track", "Projected Over Budget", "No Budget"
+
 class BudgetSummary(BaseModel):
     total_income: float
     total_expenses: float
@@ -58,6 +67,7 @@ class BudgetSummary(BaseModel):
     overspending_categories: list[str] | None = []
     recent_transactions: list[ExpenseResponse] | None = []
     income_sources: list[IncomeResponse] | None = []
+    forecast: Optional[SpendingForecast] = None
 
 class BudgetPlanRequest(BaseModel):
     month: str
@@ -69,3 +79,60 @@ class BudgetPlanResponse(BaseModel):
     savings: float
     total_budget: float
     explanation: str
+
+class TransactionPage(BaseModel):
+    items: list[dict] # Raw rows with the requested fields (always date and id)
+    next_cursor: Optional[str] = None # Pass back as ?cursor= for the next page; None on the last page
+
+# Bulk Import Schemas
+class ImportRowError(BaseModel):
+    row: int # 1-based data row (CSV) or transaction index (OFX)
+    error: str
+
+class ImportResult(BaseModel):
+    imported_income: int
+    imported_expenses: int
+    duplicates: int
+    errors: list[ImportRowError] = []
+
+# Batch Schemas
+class BatchRequest(BaseModel):
+    items: list[dict] # IncomeCreate/ExpenseCreate fields (plus id for updates), validated one by one
+
+class BatchItemResult(BaseModel):
+    index: int # Position in the request
+    id: Optional[str] = None
+    status: str # created, updated, deleted, invalid, not_found or failed
+    error: Optional[str] = None
+    row: Optional[dict] = None # The stored row after a create or update
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[BatchItemResult] # In request order
+
+# Analytics Schemas
+class AnalyticsMonth(BaseModel):
+    month: str # YYYY-MM
+    income: float
+    expenses: float
+    net: float # income - expenses
+    rolling_income: dict[str, Optional[float]] # window in months -> trailing average; None until the user has that much history
+    rolling_expenses: dict[str, Optional[float]]
+    category_totals: dict[str, float] # Categories with spending this month
+    category_deltas: dict[str, float] # Change against the previous month, for categories that changed
+
+class SpendingAnomaly(BaseModel):
+    id: str
+    date: str
+    category: str
+    amount: float
+    category_median: float
+    score: float # Robust z-score of the amount within its category
+
+class AnalyticsResponse(BaseModel):
+    start: str # First reported month
+    end: str # Last reported month
+    windows: list[int]
+    months: list[AnalyticsMonth]
+    anomalies: list[SpendingAnomaly] # Highest score first
@@ -0,0 +1,286 @@
+"""
+Aggregate service module.
+Maintains per-user monthly totals (income and per-category expenses) in the
+monthly_aggregates table so summaries read O(categories) rows instead of
+re-summing every transaction, and per-day expense totals in daily_spend for
+the month-end forecast.
+
+Run `python -m app.services.aggregate_service` to recompute the aggregates
+from raw rows and report drift; add `--fix` to write the corrected values.
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.repositories import repos
+
+logger = logging.getLogger(__name__)
+
+# Aggregate row kinds; income is stored with an empty category
+INCOME = "income"
+EXPENSE = "expense"
+INCOME_CATEGORY = ""
+
+# Totals closer than this are treated as equal when reconciling
+DRIFT_TOLERANCE = 0.005
+
+AggregateKey = Tuple[str, str, str, str]  # (user_id, month, kind, category)
+DailyKey = Tuple[str, str, str]  # (user_id, day, category)
+Delta = Tuple[AggregateKey, float, int, Optional[str]]  # (key, amount, count, day for daily_spend or None)
+MonthTotals = Tuple[float, float, Dict[str, float]]  # (total_income, total_expenses, category_breakdown)
+
+EMPTY_MONTH: MonthTotals = (0.0, 0.0, {})
+
+def income_delta(row: Optional[Dict], sign: int) -> List[Delta]:
+    """
+    Build the aggregate delta contributed by an income row.
+
+    Args:
+        row: Income row with user_id, amount and date (None yields no delta)
+        sign: +1 when the row is added, -1 when it is removed
+
+    Returns:
+        list: (key, amount, count, None) deltas; income has no daily totals
+    """
+    if not row:
+        return []
+    key = (str(row["user_id"]), str(row["date"])[:7], INCOME, INCOME_CATEGORY)
+    return [(key, sign * float(row["amount"]), sign, None)]
+
+def expense_delta(row: Optional[Dict], sign: int) -> List[Delta]:
+    """
+    Build the aggregate delta contributed by an expense row.
+
+    Args:
+        row: Expense row with user_id, amount, category and date (None yields no delta)
+        sign: +1 when the row is added, -1 when it is removed
+
+    Returns:
+        list: (key, amount, count, day) deltas
+    """
+    if not row:
+        return []
+    key = (str(row["user_id"]), str(row["date"])[:7], EXPENSE, row.get("category") or "Other")
+    return [(key, sign * float(row["amount"]), sign, str(row["date"])[:10])]
+
+async def apply_deltas(deltas: Iterable[Delta]) -> None:
+    """
+    Apply signed deltas to the aggregate tables in one round trip.
+
+    Deltas for the same key are combined first, so an update that leaves
+    an expense in the same month and category costs only its amount change.
+    Expense deltas also update the daily running totals of their day.
+
+    Args:
+        deltas: (key, amount, count, day) tuples from income_delta/expense_delta
+    """
+    combined: Dict[AggregateKey, List[float]] = {}
+    daily: Dict[DailyKey, List[float]] = {}
+    for key, amount, count, day in deltas:
+        acc = combined.setdefault(key, [0.0, 0])
+        acc[0] += amount
+        acc[1] += count
+        if day:
+            acc = daily.setdefault((key[0], day, key[3]), [0.0, 0])
+            acc[0] += amount
+            acc[1] += count
+
+    payload = [
+        {"user_id": k[0], "month": k[1], "kind": k[2], "category": k[3], "amount": round(amount, 2), "count": count}
+        for k, (amount, count) in combined.items()
+        if abs(amount) >= DRIFT_TOLERANCE or count
+    ]
+    daily_payload = [
+        {"user_id": k[0], "day": k[1], "category": k[2], "amount": round(amount, 2), "count": count}
+        for k, (amount, count) in daily.items()
+        if abs(amount) >= DRIFT_TOLERANCE or count
+    ]
+    if payload or daily_payload:
+        await repos.aggregates.apply_deltas(payload, daily_payload)
+
+async def apply_write_deltas(deltas: Iterable[Delta]) -> bool:
+    """
+    Apply the deltas of a row write that has already been stored.
+
+    The write cannot be undone at this point, so a failure is logged (with
+    the reconcile command that repairs it) instead of failing the request.
+
+    Args:
+        deltas: (key, amount, count, day) tuples from income_delta/expense_delta
+
+    Returns:
+        bool: False if the aggregates could not be updated
+    """
+    deltas = list(deltas)
+    try:
+        await apply_deltas(deltas)
+        return True
+    except Exception:
+        users = " ".join(sorted({key[0] for key, _, _, _ in deltas}))
+        logger.exception("Aggregate update failed after a write; run "
+                         "`python -m app.services.aggregate_service --user-id <id> --fix` for: %s", users)
+        return False
+
+def _totals_by_month(rows: Iterable[Dict]) -> Dict[str, MonthTotals]:
+    """Fold aggregate rows into per-month totals; keys that emptied out are skipped."""
+    by_month: Dict[str, List] = {}
+    for row in rows:
+        if not row["entry_count"]:
+            continue
+        acc = by_month.setdefault(row["month"], [0.0, 0.0, {}])
+        amount = float(row["total"])
+        if row["kind"] == INCOME:
+            acc[0] += amount
+        else:
+            acc[1] += amount
+            acc[2][row["category"]] = acc[2].get(row["category"], 0) + amount
+    return {month: tuple(acc) for month, acc in by_month.items()}
+
+async def get_month_aggregates(user_id: str, month: str) -> MonthTotals:
+    """
+    Read the maintained totals for a user's month.
+
+    Args:
+        user_id: UUID of the user
+        month: Month in YYYY-MM format
+
+    Returns:
+        tuple: (total_income, total_expenses, category_breakdown)
+    """
+    rows = await repos.aggregates.list_month(user_id, month)
+    return _totals_by_month(rows).get(month, EMPTY_MONTH)
+
+async def get_range_aggregates(user_id: str, start: str, end: str) -> Dict[str, MonthTotals]:
+    """
+    Read the maintained totals for a range of a user's months in one query.
+
+    Args:
+        user_id: UUID of the user
+        start: First month in YYYY-MM format
+        end: Last month in YYYY-MM format
+
+    Returns:
+        dict: month -> (total_income, total_expenses, category_breakdown);
+            months without transactions are absent
+    """
+    rows = await repos.aggregates.list_range(user_id, start, end)
+    return _totals_by_month(rows)
+
+async def reconcile(user_id: Optional[str] = None, fix: bool = False) -> List[Dict]:
+    """
+    Recompute aggregates from the transaction tables and report drift.
+
+    The sums are grouped in the database, so only one row per aggregate
+    key is transferred rather than every transaction.
+
+    Args:
+        user_id: Restrict the rebuild to one user (default: all users)
+        fix: Overwrite drifted aggregate rows with the recomputed values
+
+    Returns:
+        list: One dict per drifted key with expected and stored totals/counts
+    """
+    expected_rows, stored_rows = await asyncio.gather(
+        repos.aggregates.recompute(user_id),
+        repos.aggregates.scan(user_id),
+    )
+
+    def by_key(rows: List[Dict]) -> Dict[AggregateKey, Tuple[float, int]]:
+        return {
+            (str(r["user_id"]), r["month"], r["kind"], r["category"]): (float(r["total"]), int(r["entry_count"]))
+            for r in rows
+        }
+    expected = by_key(expected_rows)
+    stored = by_key(stored_rows)
+
+    drift = []
+    for key in expected.keys() | stored.keys():
+        exp_total, exp_count = expected.get(key, (0.0, 0))
+        got_total, got_count = stored.get(key, (0.0, 0))
+        if abs(exp_total - got_total) >= DRIFT_TOLERANCE or exp_count != got_count:
+            drift.append({
+                "user_id": key[0], "month": key[1], "kind": key[2], "category": key[3],
+                "expected_total": round(exp_total, 2), "stored_total": round(got_total, 2),
+                "expected_count": exp_count, "stored_count": got_count
+            })
+
+    if fix and drift:
+        await repos.aggregates.upsert_many([
+            {"user_id": d["user_id"], "month": d["month"], "kind": d["kind"], "category": d["category"],
+             "total": d["expected_total"], "entry_count": d["expected_count"]}
+            for d in drift
+        ])
+    return drift
+
+async def reconcile_daily(user_id: Optional[str] = None, fix: bool = False) -> List[Dict]:
+    """
+    Recompute daily_spend from the expenses table and report drift.
+
+    Args:
+        user_id: Restrict the rebuild to one user (default: all users)
+        fix: Overwrite drifted daily rows with the recomputed values
+
+    Returns:
+        list: One dict per drifted (user_id, day, category) with expected and stored totals/counts
+    """
+    expected_rows, stored_rows = await asyncio.gather(
+        repos.aggregates.recompute_daily(user_id),
+        repos.aggregates.scan_daily(user_id),
+    )
+
+    def by_key(rows: List[Dict]) -> Dict[DailyKey, Tuple[float, int]]:
+        return {(str(r["user_id"]), str(r["day"]), r["category"]): (float(r["total"]), int(r["entry_count"])) for r in rows}
+    expected = by_key(expected_rows)
+    stored = by_key(stored_rows)
+
+    drift = []
+    for key in expected.keys() | stored.keys():
+        exp_total, exp_count = expected.get(key, (0.0, 0))
+        got_total, got_count = stored.get(key, (0.0, 0))
+        if abs(exp_total - got_total) >= DRIFT_TOLERANCE or exp_count != got_count:
+            drift.append({
+                "user_id": key[0], "day": key[1], "category": key[2],
+                "expected_total": round(exp_total, 2), "stored_total": round(got_total, 2),
+                "expected_count": exp_count, "stored_count": got_count
+            })
+
+    if fix and drift:
+        await repos.aggregates.upsert_daily([
+            {"user_id": d["user_id"], "day": d["day"], "category": d["category"],
+             "total": d["expected_total"], "entry_count": d["expected_count"]}
+            for d in drift
+        ])
+    return drift
+
+async def reconcile_all(user_id: Optional[str] = None, fix: bool = False) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Run the monthly and daily reconcile passes one after the other.
+
+    Both share one event loop: the Supabase client and its pooled transport
+    are cached per process and bound to the loop they were first used on.
+
+    Returns:
+        tuple: (monthly drift, daily drift)
+    """
+    drift = await reconcile(user_id, fix=fix)
+    daily = await reconcile_daily(user_id, fix=fix)
+    return drift, daily
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild monthly and daily aggregates from raw rows and report drift.")
+    parser.add_argument("--user-id", help="Only reconcile this user")
+    parser.add_argument("--fix", action="store_true", help="Write the recomputed values")
+    args = parser.parse_args()
+
+    drift, daily = asyncio.run(reconcile_all(args.user_id, fix=args.fix))
+    for d in sorted(drift, key=lambda d: (d["user_id"], d["month"], d["kind"], d["category"])):
+        print(f"{d['user_id']} {d['month']} {d['kind']:<7} {d['category'] or '-':<15} "
+              f"stored={d['stored_total']:.2f}/{d['stored_count']} expected={d['expected_total']:.2f}/{d['expected_count']}")
+    for d in sorted(daily, key=lambda d: (d["user_id"], d["day"], d["category"])):
+        print(f"{d['user_id']} {d['day']} {'daily':<7} {d['category']:<15} "
+              f"stored={d['stored_total']:.2f}/{d['stored_count']} expected={d['expected_total']:.2f}/{d['expected_count']}")
+    print(f"{len(drift)} drifted aggregate(s), {len(daily)} drifted daily total(s){' fixed' if args.fix and (drift or daily) else ''}")
+
+if __name__ == "__main__":
+    main()
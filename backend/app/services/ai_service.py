@@ -3,23 +3,44 @@ AI service module using Google's Gemini AI.
 Provides financial literacy education through conversational AI.
 """
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
 from app.core.config import settings
+from app.core.metrics import metrics
+from cachetools import TTLCache
+from collections import deque
+from contextlib import asynccontextmanager
+from statistics import mean, quantiles
+from threading import Lock
+from typing import AsyncIterator, Callable, Dict, Optional
+import asyncio
+import hashlib
 import os
+import re
+import time
 
 # Validate API key availability
 if not settings.GOOGLE_API_KEY:
     print("Warning: GOOGLE_API_KEY not found.")
 
-# Initialize Gemini AI model
-# Using gemini-2.5-flash for fast, cost-effective responses
-# convert_system_message_to_human=True ensures compatibility with Gemini's message format
-llm = ChatGoogleGenerativeAI(
-    model="models/gemini-2.5-flash", 
-    google_api_key=settings.GOOGLE_API_KEY, 
-    convert_system_message_to_human=True
-)
+# Gemini AI model, prompt and the chain joining them, built on first use by
+# get_llm()/get_prompt()/get_chain() (LangChain and the Google SDK take over
+# a second to import)
+llm = None
+prompt = None
+chain = None
+
+def get_llm():
+    """Return the shared Gemini chat model, creating it on first use."""
+    global llm
+    if llm is None:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        # Using gemini-2.5-flash for fast, cost-effective responses
+        # convert_system_message_to_human=True ensures compatibility with Gemini's message format
+        llm = ChatGoogleGenerativeAI(
+            model="models/gemini-2.5-flash", 
+            google_api_key=settings.GOOGLE_API_KEY, 
+            convert_system_message_to_human=True
+        )
+    return llm
 
 # System prompt template for the AI assistant
 # This defines the AI's personality, boundaries, and behavior
@@ -40,10 +61,246 @@ Current Context:
 User Question: {question}
 """
 
-# Create prompt template for LangChain
-prompt = ChatPromptTemplate.from_template(system_template)
+def get_prompt():
+    """Return the shared LangChain prompt template, creating it on first use."""
+    global prompt
+    if prompt is None:
+        from langchain_core.prompts import ChatPromptTemplate
+        prompt = ChatPromptTemplate.from_template(system_template)
+    return prompt
+
+def get_chain():
+    """Return the shared prompt -> LLM chain, creating it on first use."""
+    global chain
+    if chain is None:
+        chain = get_prompt() | get_llm()
+    return chain
+
+class LLMBusy(Exception):
+    """Raised when the gateway sheds a call instead of queuing it."""
+
+class LLMGateway:
+    """
+    Admission control in front of the Gemini chain.
+
+    At most `max_concurrent` calls run at once. Up to `max_waiting` more
+    wait for a slot, each for at most `queue_timeout` seconds; anything
+    beyond that fails fast with LLMBusy rather than piling up. Identical
+    prompts already in flight share that call (single flight), and every
+    call is bounded by `timeout` seconds.
+
+    All state is touched from the event loop only, so it needs no lock.
+    """
+
+    def __init__(self, max_concurrent: int, max_waiting: int, timeout: float, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Prompt key -> task of the call every identical caller awaits
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.active = 0
+        self.waiting = 0
+        self.calls = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    async def invoke(self, question: str, context: str) -> str:
+        """
+        Run the chain, joining an identical call that is already in flight.
+
+        Raises:
+            LLMBusy: If the wait queue is full or no slot freed up in time
+            TimeoutError: If the call took longer than `timeout`
+        """
+        self._bind()
+        key = ResponseCache.key(question, context)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(question, context))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        # Shielded so one caller going away does not cancel the others' call
+        return await asyncio.shield(task)
+
+    async def stream(self, question: str, context: str) -> AsyncIterator[str]:
+        """
+        Stream the chain's output while holding a slot.
+
+        Streams are not coalesced. `timeout` bounds the wait for each chunk,
+        so a stalled stream fails while a long, steady answer does not.
+        """
+        async with self.slot():
+            self.calls += 1
+            chunks = get_chain().astream({"question": question, "context": context})
+            # Timed until the stream ends, so this is the full generation time
+            with metrics.track("llm", "stream"):
+                try:
+                    while True:
+                        try:
+                            async with asyncio.timeout(self.timeout):
+                                chunk = await anext(chunks)
+                        except StopAsyncIteration:
+                            return
+                        except TimeoutError:
+                            self.timeouts += 1
+                            raise TimeoutError(f"AI response timed out after {self.timeout:g}s") from None
+                        if chunk.text:
+                            yield chunk.text
+                finally:
+                    await chunks.aclose()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the concurrent call slots, waiting in the bounded queue if needed."""
+        semaphore = self._bind()
+        if semaphore.locked():
+            if self.waiting >= self.max_waiting:
+                self.rejected += 1
+                raise LLMBusy("AI service is busy, please retry shortly")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise LLMBusy("AI service is busy, please retry shortly") from None
+            finally:
+                self.waiting -= 1
+        else:
+            await semaphore.acquire()
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_waiting": self.max_waiting,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
+
+    def _bind(self) -> asyncio.Semaphore:
+        # The semaphore and in-flight tasks belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._inflight = {}
+        return self._semaphore
+
+    async def _call(self, question: str, context: str) -> str:
+        async with self.slot():
+            self.calls += 1
+            try:
+                with metrics.track("llm", "invoke"):
+                    response = await asyncio.wait_for(get_chain().ainvoke({"question": question, "context": context}), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise TimeoutError(f"AI response timed out after {self.timeout:g}s") from None
+        return response.content
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the error retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+class ResponseCache:
+    """
+    Bounded TTL cache of successful AI responses keyed by a normalized prompt.
+    
+    Only call sites that opt in (deterministic prompts such as budget plan
+    explanations) read or fill it. Error messages are never stored.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(question: str, context: str) -> str:
+        """Hash the prompt with whitespace and case normalized."""
+        normalized = " ".join(question.lower().split()) + "\x00" + " ".join(context.lower().split())
+        return hashlib.sha256(normalized.encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+    
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._cache[key] = value
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize
+            }
 
-def get_ai_response(question: str, context: str = ""):
+# Shared cache for opt-in deterministic prompts
+response_cache = ResponseCache(maxsize=settings.AI_CACHE_SIZE, ttl=settings.AI_CACHE_TTL_SECONDS)
+
+# Global gateway every Gemini call goes through
+llm_gateway = LLMGateway(
+    max_concurrent=settings.AI_MAX_CONCURRENT,
+    max_waiting=settings.AI_MAX_WAITING,
+    timeout=settings.AI_TIMEOUT_SECONDS,
+    queue_timeout=settings.AI_QUEUE_TIMEOUT_SECONDS
+)
+
+async def _invoke(question: str, context: str, cache: bool = False,
+                  accept: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Run the prompt -> LLM chain through the gateway, optionally through the
+    response cache.
+    
+    Raises on provider errors, so failures can never end up in the cache.
+    Replies that `accept` rejects are returned but not cached.
+    """
+    key = ResponseCache.key(question, context) if cache else None
+    if key:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+    
+    text = await llm_gateway.invoke(question, context)
+    if key and isinstance(text, str) and text and (accept is None or accept(text)):
+        response_cache.set(key, text)
+    return text
+
+async def get_ai_response(question: str, context: str = "", cache: bool = False):
     """
     Generate an AI response to a user's financial literacy question.
     
@@ -53,21 +310,164 @@ def get_ai_response(question: str, context: str = ""):
     Args:
         question: The user's question about finance
         context: Optional financial context (e.g., current budget status)
+        cache: Reuse a cached answer for the same normalized prompt; only
+            for prompts whose answer does not depend on conversation state
         
     Returns:
         str: AI-generated educational response
+        
+    Raises:
+        LLMBusy: If the gateway is saturated (other errors become the reply)
     """
     try:
         # Verify API key is configured
         if not settings.GOOGLE_API_KEY:
             return "AI service is not configured (Missing API Key)."
         
-        # Create LangChain chain: prompt -> LLM
-        chain = prompt | llm
-        
-        # Invoke the chain with user question and context
-        response = chain.invoke({"question": question, "context": context})
-        return response.content
+        return await _invoke(question, context, cache=cache)
+    except LLMBusy:
+        raise
     except Exception as e:
         # Return error message if AI service fails
         return f"Error communicating with AI: {str(e)}"
+
+def fill_template(skeleton: str, values: Dict[str, str]) -> str:
+    """
+    Substitute {placeholder} tokens in a cached explanation skeleton.
+    
+    Unknown braces are left untouched, so stray braces in the model's
+    output cannot break the substitution.
+    """
+    for name, value in values.items():
+        skeleton = skeleton.replace("{" + name + "}", value)
+    return skeleton
+
+NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+
+def _is_valid_skeleton(skeleton: str, values: Dict[str, str], prompt: str) -> bool:
+    """
+    Whether a templated reply can be shared: every placeholder is still
+    there and the model wrote no numbers beyond those already in the prompt.
+    """
+    if any("{" + name + "}" not in skeleton for name in values):
+        return False
+    allowed = set(NUMBER.findall(prompt))
+    return set(NUMBER.findall(fill_template(skeleton, dict.fromkeys(values, "")))) <= allowed
+
+async def get_templated_ai_response(question: str, template_context: str, values: Dict[str, str]):
+    """
+    Generate an explanation once per context shape and reuse it for every user.
+    
+    The model sees the context with {placeholder} tokens instead of the
+    user's numbers and is asked to keep those tokens verbatim. The resulting
+    skeleton is cached under the template (not the numbers) and filled in
+    with each caller's values, so warm calls skip the LLM entirely.
+    A reply that lost a placeholder or invented numbers is not cached; that
+    caller gets a plain answer generated from their real numbers instead.
+    
+    Args:
+        question: The instruction for the model
+        template_context: Context containing {name} placeholders
+        values: Placeholder name -> display value for this caller
+        
+    Returns:
+        str: The filled-in explanation, or an error message
+        
+    Raises:
+        LLMBusy: If the gateway is saturated
+    """
+    placeholders = ", ".join("{" + name + "}" for name in values)
+    context = (
+        f"{template_context}\n"
+        f"The values {placeholders} are placeholders for the user's numbers. "
+        f"Refer to them using exactly those tokens, braces included, and never invent numbers."
+    )
+    try:
+        if not settings.GOOGLE_API_KEY:
+            return "AI service is not configured (Missing API Key)."
+        
+        accept = lambda text: _is_valid_skeleton(text, values, question + "\n" + template_context)
+        skeleton = await _invoke(question, context, cache=True, accept=accept)
+        if isinstance(skeleton, str) and not accept(skeleton):
+            # The model dropped a placeholder or made up numbers; answer this
+            # caller with their real numbers and keep the reply out of the cache
+            return await _invoke(question, fill_template(template_context, values))
+    except LLMBusy:
+        raise
+    except Exception as e:
+        return f"Error communicating with AI: {str(e)}"
+    if not isinstance(skeleton, str):
+        return skeleton
+    return fill_template(skeleton, values)
+
+class LatencyWindow:
+    """
+    Rolling window of latency samples (milliseconds) with summary stats.
+    Used to track time-to-first-token of streamed responses.
+    """
+
+    def __init__(self, size: int = 1000):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+
+    def record(self, ms: float) -> None:
+        self._samples.append(ms)
+        self.count += 1
+
+    def stats(self) -> dict:
+        """
+        Summarize the samples currently in the window.
+
+        Returns:
+            dict: total count plus mean/p50/p95/max of the window (ms)
+        """
+        samples = list(self._samples)
+        if not samples:
+            return {"count": self.count, "mean": None, "p50": None, "p95": None, "max": None}
+        if len(samples) == 1:
+            p50 = p95 = samples[0]
+        else:
+            cuts = quantiles(samples, n=100, method="inclusive")
+            p50, p95 = cuts[49], cuts[94]
+        return {
+            "count": self.count,
+            "mean": round(mean(samples), 1),
+            "p50": round(p50, 1),
+            "p95": round(p95, 1),
+            "max": round(max(samples), 1)
+        }
+
+# Time-to-first-token of streamed responses
+ttft_window = LatencyWindow()
+
+async def stream_ai_response(question: str, context: str = "") -> AsyncIterator[str]:
+    """
+    Stream an AI response to a user's question token by token.
+    
+    Uses the chain's async streaming so the first tokens reach the user
+    while Gemini is still generating. The stream holds a gateway slot until
+    it ends. Cancelling the consumer (e.g. on client disconnect) cancels the
+    upstream request.
+    
+    Args:
+        question: The user's question about finance
+        context: Optional financial context (e.g., current budget status)
+        
+    Yields:
+        str: Text chunks of the AI response
+        
+    Raises:
+        LLMBusy: If the gateway is saturated
+        TimeoutError: If no chunk arrives within the gateway timeout
+    """
+    if not settings.GOOGLE_API_KEY:
+        yield "AI service is not configured (Missing API Key)."
+        return
+    
+    started = time.perf_counter()
+    first = True
+    async for text in llm_gateway.stream(question, context):
+        if first:
+            ttft_window.record((time.perf_counter() - started) * 1000)
+            first = False
+        yield text
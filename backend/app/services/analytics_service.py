@@ -0,0 +1,179 @@
+"""
+Analytics service module.
+Computes multi-month spending analytics (rolling averages, month-over-month
+category deltas and unusual transactions) from a single load of a user's
+rows. The rows are converted once into columnar NumPy arrays, so every series
+is a vectorized group-by instead of a per-month query or Python loop.
+"""
+
+import asyncio
+import calendar
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.repositories import repos
+from app.schemas.finance import AnalyticsResponse
+from app.services.finance_service import MAX_HISTORY_MONTHS
+
+# Trailing windows, in months, of the rolling averages
+ROLLING_WINDOWS = (3, 6, 12)
+
+# Robust z-score above which a transaction counts as unusual for its category
+ANOMALY_SCORE = 3.5
+# Categories with fewer transactions in the window are not scored
+ANOMALY_MIN_SAMPLES = 8
+MAX_ANOMALIES = 20
+
+# Scales the median absolute deviation to a standard deviation for normal data
+MAD_SCALE = 0.6745
+
+def _columns(rows: List[Dict], first: np.datetime64, count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert rows into columnar arrays.
+
+    Args:
+        rows: Rows with "date" and "amount"
+        first: First month of the window
+        count: Number of months in the window
+
+    Returns:
+        tuple: (indexes of the rows inside the window, their month offsets, their amounts)
+    """
+    months = np.array([str(r["date"])[:7] for r in rows], dtype="datetime64[M]")
+    offsets = (months - first).astype(np.int64)
+    amounts = np.fromiter((r["amount"] for r in rows), dtype=np.float64, count=len(rows))
+    kept = np.flatnonzero((offsets >= 0) & (offsets < count))
+    return kept, offsets[kept], amounts[kept]
+
+def _rolling(series: np.ndarray, window: int, first_active: int, report_from: int) -> List[Optional[float]]:
+    """
+    Trailing mean of `series` over `window` months for each reported month.
+
+    Months whose window reaches back before the user's first active month
+    get None rather than an average diluted by empty months.
+    """
+    sums = np.concatenate(([0.0], np.cumsum(series)))
+    ends = np.arange(report_from, len(series))
+    means = (sums[ends + 1] - sums[ends + 1 - window]) / window
+    return [round(m, 2) if e - window + 1 >= first_active else None for e, m in zip(ends.tolist(), means.tolist())]
+
+def _group_medians(values: np.ndarray, codes: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Median of `values` per group code (groups with no values get NaN)."""
+    ordered = values[np.lexsort((values, codes))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    low = ordered[np.minimum(starts + (counts - 1) // 2, len(ordered) - 1)] if len(ordered) else np.zeros(len(counts))
+    high = ordered[np.minimum(starts + counts // 2, len(ordered) - 1)] if len(ordered) else np.zeros(len(counts))
+    return np.where(counts > 0, (low + high) / 2, np.nan)
+
+def compute_analytics(incomes: List[Dict], expenses: List[Dict], end: str, months: int) -> AnalyticsResponse:
+    """
+    Compute analytics for the `months` months ending at `end`.
+
+    The rows must cover max(ROLLING_WINDOWS) - 1 extra months before the
+    first reported month, so every reported month has a full window and a
+    previous month to compare against.
+
+    Args:
+        incomes: Income rows with date and amount
+        expenses: Expense rows with id, date, amount and category
+        end: Last reported month in YYYY-MM format
+        months: Number of reported months
+
+    Returns:
+        AnalyticsResponse: Per-month series and the unusual transactions
+    """
+    lookback = max(ROLLING_WINDOWS) - 1
+    total = months + lookback
+    first = np.datetime64(end, "M") - (total - 1)
+
+    inc_rows, inc_month, inc_amount = _columns(incomes, first, total)
+    exp_rows, exp_month, exp_amount = _columns(expenses, first, total)
+    # Category codes in order of first appearance; a dict is far cheaper than np.unique on strings
+    codes: Dict[str, int] = {}
+    exp_code = np.fromiter((codes.setdefault(expenses[i]["category"] or "Other", len(codes)) for i in exp_rows.tolist()),
+                           dtype=np.int64, count=len(exp_rows))
+    names = list(codes)
+    n_cats = len(names)
+
+    # Month x category totals in one pass; every other series derives from these
+    income = np.bincount(inc_month, weights=inc_amount, minlength=total)
+    by_category = np.bincount(exp_month * n_cats + exp_code, weights=exp_amount, minlength=total * n_cats).reshape(total, n_cats)
+    spent = by_category.sum(axis=1)
+    deltas = by_category[lookback:] - by_category[lookback - 1:-1]
+
+    active = np.flatnonzero((income != 0) | (spent != 0))
+    first_active = int(active[0]) if len(active) else total
+    rolling_income = {str(w): _rolling(income, w, first_active, lookback) for w in ROLLING_WINDOWS}
+    rolling_expenses = {str(w): _rolling(spent, w, first_active, lookback) for w in ROLLING_WINDOWS}
+
+    month_names = np.arange(first + lookback, first + total, dtype="datetime64[M]").astype(str).tolist()
+    report = []
+    for i, month in enumerate(month_names):
+        row = by_category[lookback + i]
+        report.append({
+            "month": month,
+            "income": round(float(income[lookback + i]), 2),
+            "expenses": round(float(spent[lookback + i]), 2),
+            "net": round(float(income[lookback + i] - spent[lookback + i]), 2),
+            "rolling_income": {w: values[i] for w, values in rolling_income.items()},
+            "rolling_expenses": {w: values[i] for w, values in rolling_expenses.items()},
+            "category_totals": {names[c]: round(float(row[c]), 2) for c in np.flatnonzero(row).tolist()},
+            "category_deltas": {names[c]: round(float(deltas[i, c]), 2) for c in np.flatnonzero(np.abs(deltas[i]) >= 0.005).tolist()}
+        })
+
+    # Robust z-score per category: distance from the median in units of the
+    # scaled median absolute deviation, which a single outlier cannot inflate
+    counts = np.bincount(exp_code, minlength=n_cats)
+    medians = _group_medians(exp_amount, exp_code, counts)
+    mads = _group_medians(np.abs(exp_amount - medians[exp_code]), exp_code, counts)
+    scorable = (counts >= ANOMALY_MIN_SAMPLES) & (mads > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(scorable[exp_code], MAD_SCALE * (exp_amount - medians[exp_code]) / mads[exp_code], 0.0)
+    flagged = np.flatnonzero((scores > ANOMALY_SCORE) & (exp_month >= lookback))
+    flagged = flagged[np.argsort(-scores[flagged], kind="stable")][:MAX_ANOMALIES]
+    anomalies = []
+    for i in flagged.tolist():
+        row = expenses[int(exp_rows[i])]
+        anomalies.append({
+            "id": str(row.get("id")),
+            "date": str(row["date"]),
+            "category": names[exp_code[i]],
+            "amount": float(exp_amount[i]),
+            "category_median": round(float(medians[exp_code[i]]), 2),
+            "score": round(float(scores[i]), 2)
+        })
+
+    return AnalyticsResponse(
+        start=month_names[0], end=month_names[-1], windows=list(ROLLING_WINDOWS), months=report, anomalies=anomalies
+    )
+
+async def get_analytics(user_id: str, months: int = 12, end: Optional[str] = None) -> AnalyticsResponse:
+    """
+    Load a user's rows once and compute multi-month analytics.
+
+    Args:
+        user_id: UUID of the user
+        months: Number of months to report
+        end: Last reported month in YYYY-MM format (default: the current month)
+
+    Returns:
+        AnalyticsResponse: Per-month series and the unusual transactions
+
+    Raises:
+        ValueError: If end is malformed or months is out of range
+    """
+    end = end or date.today().strftime("%Y-%m")
+    datetime.strptime(end, "%Y-%m")
+    if not 1 <= months <= MAX_HISTORY_MONTHS:
+        raise ValueError(f"months must be between 1 and {MAX_HISTORY_MONTHS}")
+
+    # Extra history so the first reported month has full rolling windows
+    start = str(np.datetime64(end, "M") - (months + max(ROLLING_WINDOWS) - 2))
+    # A real last day: Postgres rejects dates like 2026-02-31
+    last_day = f"{end}-{calendar.monthrange(int(end[:4]), int(end[5:7]))[1]:02d}"
+    incomes, expenses = await asyncio.gather(
+        repos.income.list_range(user_id, f"{start}-01", last_day, ["amount", "date"]),
+        repos.expenses.list_range(user_id, f"{start}-01", last_day, ["id", "amount", "category", "date"]),
+    )
+    # The computation is CPU-bound (NumPy releases the GIL for most of it)
+    return await asyncio.get_running_loop().run_in_executor(None, compute_analytics, incomes, expenses, end, months)
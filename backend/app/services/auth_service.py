@@ -3,11 +3,14 @@ Authentication service module.
 Handles user registration, login, and token verification.
 """
 
-from app.core.config import supabase, settings
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.config import settings
+from app.repositories import repos
+from app.core.security import create_access_token
+from app.services.password_hasher import password_hasher
+from app.services.token_cache import token_cache
 from jose import jwt, JWTError
 
-def signup(username: str, password: str):
+async def signup(username: str, password: str):
     """
     Register a new user in the system.
     
@@ -17,28 +20,28 @@ def signup(username: str, password: str):
         
     Returns:
         dict: Created user object if successful, None if username already exists
+        
+    Raises:
+        PasswordHasherBusy: If too many hashes are already pending
     """
     # Check if username already exists
-    existing = supabase.table("users").select("id").eq("username", username).execute().data
+    existing = await repos.users.get_by_username(username)
     if existing:
         return None  # Username taken
     
     # Hash the password for secure storage
-    hashed_pw = get_password_hash(password)
+    # Argon2 is CPU/memory heavy, so it runs on the dedicated hashing pool
+    hashed_pw = await password_hasher.hash(password)
     
     # Create new user record
     # Note: salt field kept for schema compatibility (Argon2 handles salt internally)
-    created = supabase.table("users").insert({
+    return await repos.users.create({
         "username": username,
         "password_hash": hashed_pw,
         "salt": ""  # Schema compatibility if strict, otherwise ignore
-    }).execute().data
-    
-    if not created:
-        return None
-    return created[0]
+    })
 
-def login(username: str, password: str):
+async def login(username: str, password: str):
     """
     Authenticate a user and generate access token.
     
@@ -49,16 +52,17 @@ def login(username: str, password: str):
     Returns:
         dict: Contains access_token, token_type, and user_id if successful
         None: If authentication fails
+        
+    Raises:
+        PasswordHasherBusy: If too many hashes are already pending
     """
     # Fetch user from database
-    res = supabase.table("users").select("*").eq("username", username).execute().data
-    if not res:
+    user = await repos.users.get_by_username(username)
+    if not user:
         return None  # User not found
     
-    user = res[0]
-    
     # Verify password against stored hash
-    if not verify_password(password, user["password_hash"]):
+    if not await password_hasher.verify(password, user["password_hash"]):
         return None  # Invalid password
     
     # Generate JWT access token
@@ -69,6 +73,9 @@ def get_user_by_token(token: str | None):
     """
     Extract and verify user ID from JWT token.
     
+    Tokens verified before are answered from the token cache until they
+    expire, skipping the signature check.
+    
     Args:
         token: JWT token (with or without 'Bearer ' prefix)
         
@@ -84,9 +91,15 @@ def get_user_by_token(token: str | None):
         if token.lower().startswith("bearer "):
             token = token[7:]
         
+        cached = token_cache.get(token)
+        if cached is not None:
+            return cached
+        
         # Decode and verify JWT token
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
+        if user_id and payload.get("exp"):
+            token_cache.set(token, user_id, payload["exp"])
         return user_id
     except JWTError:
         return None  # Invalid or expired token
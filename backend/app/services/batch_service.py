@@ -0,0 +1,190 @@
+"""
+Batch service module.
+Creates, updates and deletes many income or expense rows per request. Items
+are validated (and expenses categorized) one by one so a bad item fails on
+its own; the valid ones are written with a single multi-row statement and
+the aggregates are adjusted in one round trip.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+from uuid import UUID, uuid4
+import httpx
+from pydantic import ValidationError
+from app.core.config import settings
+from app.repositories import repos
+from app.repositories.base import Row
+from app.schemas.finance import IncomeCreate, ExpenseCreate, BatchItemResult, BatchResult
+from app.services import aggregate_service
+from app.services.categorizer import categorize_many
+from app.services.summary_cache import summary_cache, month_of
+
+SCHEMAS = {"income": IncomeCreate, "expenses": ExpenseCreate}
+SUCCEEDED = ("created", "updated", "deleted")
+
+def _check_size(items: Sequence) -> None:
+    if not items:
+        raise ValueError("The batch is empty")
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise ValueError(f"At most {settings.BATCH_MAX_ITEMS} items per batch")
+
+def _parse_id(value) -> str:
+    try:
+        return str(UUID(str(value)))
+    except ValueError:
+        raise ValueError(f"id: {value!r} is not a valid id") from None
+
+def _validate(table: str, items: List[Dict], with_id: bool) -> Tuple[List[Tuple[int, Row]], List[BatchItemResult]]:
+    """
+    Validate items against the table's create schema.
+
+    Returns:
+        tuple: ((index, row) of valid items, results of the invalid ones)
+    """
+    schema = SCHEMAS[table]
+    valid, errors = [], []
+    seen = set()
+    for index, item in enumerate(items):
+        id = None
+        try:
+            if with_id:
+                id = _parse_id(item.get("id"))
+                if id in seen:
+                    raise ValueError("id: appears more than once in the batch")
+                seen.add(id)
+            data = schema.model_validate(item).model_dump()
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+            errors.append(BatchItemResult(index=index, id=id, status="invalid", error=message))
+            continue
+        except ValueError as e:
+            errors.append(BatchItemResult(index=index, id=id, status="invalid", error=str(e)))
+            continue
+        data["date"] = str(data.pop("entry_date"))
+        valid.append((index, {"id": id, **data} if with_id else data))
+
+    # Categorize the whole batch in one call, as the statement import does
+    if table == "expenses" and valid:
+        rows = [row for _, row in valid]
+        for row, category in zip(rows, categorize_many((r.get("description") for r in rows), (r.get("category") for r in rows))):
+            row["category"] = category
+    return valid, errors
+
+def _delta(table: str):
+    return aggregate_service.income_delta if table == "income" else aggregate_service.expense_delta
+
+def _result(results: List[BatchItemResult]) -> BatchResult:
+    succeeded = sum(1 for r in results if r.status in SUCCEEDED)
+    return BatchResult(succeeded=succeeded, failed=len(results) - succeeded, results=sorted(results, key=lambda r: r.index))
+
+def _write_failed(valid: List[Tuple[int, Row]], action: str, error: Exception) -> List[BatchItemResult]:
+    return [BatchItemResult(index=index, id=row.get("id"), status="failed", error=f"{action} failed: {error}") for index, row in valid]
+
+async def create_many(user_id: str, table: str, items: List[Dict]) -> BatchResult:
+    """
+    Insert the valid items in one statement.
+
+    Args:
+        user_id: UUID of the user
+        table: "income" or "expenses"
+        items: IncomeCreate/ExpenseCreate fields per item
+
+    Returns:
+        BatchResult: Per-item outcome; stored rows for created items
+
+    Raises:
+        ValueError: If the batch is empty or too large
+    """
+    _check_size(items)
+    valid, results = _validate(table, items, with_id=False)
+    for _, row in valid:
+        # Ids are assigned here so stored rows can be matched to their items
+        row["id"] = str(uuid4())
+        row["user_id"] = user_id
+    if valid:
+        try:
+            created = await repos.transactions(table).insert_many([row for _, row in valid])
+        except httpx.TransportError:
+            raise
+        except Exception as e:
+            # One statement: a row the database rejects fails the whole batch
+            return _result(results + _write_failed(valid, "Insert", e))
+        stored = {str(row["id"]): row for row in created}
+        results += [BatchItemResult(index=index, id=row["id"], status="created", row=stored.get(row["id"])) for index, row in valid]
+        await aggregate_service.apply_write_deltas(d for row in created for d in _delta(table)(row, 1))
+        summary_cache.invalidate(user_id, [month_of(row["date"]) for row in created])
+    return _result(results)
+
+async def update_many(user_id: str, table: str, items: List[Dict]) -> BatchResult:
+    """
+    Replace the valid items' fields in one statement (PUT semantics per item).
+
+    Args:
+        user_id: UUID of the user
+        table: "income" or "expenses"
+        items: id plus IncomeCreate/ExpenseCreate fields per item
+
+    Returns:
+        BatchResult: Per-item outcome; ids the user does not own are not_found
+
+    Raises:
+        ValueError: If the batch is empty or too large
+    """
+    _check_size(items)
+    valid, results = _validate(table, items, with_id=True)
+    if valid:
+        try:
+            pairs = await repos.transactions(table).update_many(user_id, [row for _, row in valid])
+        except httpx.TransportError:
+            raise
+        except Exception as e:
+            return _result(results + _write_failed(valid, "Update", e))
+        updated = {str(new["id"]): new for _, new in pairs}
+        for index, row in valid:
+            new = updated.get(row["id"])
+            if new is None:
+                results.append(BatchItemResult(index=index, id=row["id"], status="not_found", error="Not found"))
+            else:
+                results.append(BatchItemResult(index=index, id=row["id"], status="updated", row=new))
+        delta = _delta(table)
+        await aggregate_service.apply_write_deltas(d for old, new in pairs for d in delta(old, -1) + delta(new, 1))
+        summary_cache.invalidate(user_id, [month_of(row["date"]) for pair in pairs for row in pair])
+    return _result(results)
+
+async def delete_many(user_id: str, table: str, ids: List[str]) -> BatchResult:
+    """
+    Delete the user's rows with the given ids in one statement.
+
+    Args:
+        user_id: UUID of the user
+        table: "income" or "expenses"
+        ids: Row ids
+
+    Returns:
+        BatchResult: Per-id outcome; ids the user does not own are not_found
+
+    Raises:
+        ValueError: If the batch is empty or too large
+    """
+    _check_size(ids)
+    valid: List[Tuple[int, str]] = []
+    results: List[BatchItemResult] = []
+    seen = set()
+    for index, value in enumerate(ids):
+        try:
+            id = _parse_id(value)
+        except ValueError as e:
+            results.append(BatchItemResult(index=index, id=str(value), status="invalid", error=str(e)))
+            continue
+        if id in seen:
+            results.append(BatchItemResult(index=index, id=id, status="invalid", error="id: appears more than once in the batch"))
+            continue
+        seen.add(id)
+        valid.append((index, id))
+    if valid:
+        deleted = await repos.transactions(table).delete_many(user_id, [id for _, id in valid])
+        gone = {str(row["id"]) for row in deleted}
+        results += [BatchItemResult(index=index, id=id, status="deleted" if id in gone else "not_found",
+                                    error=None if id in gone else "Not found") for index, id in valid]
+        await aggregate_service.apply_write_deltas(d for row in deleted for d in _delta(table)(row, -1))
+        summary_cache.invalidate(user_id, [month_of(row.get("date")) for row in deleted])
+    return _result(results)
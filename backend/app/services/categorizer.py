@@ -0,0 +1,174 @@
+"""
+Expense categorizer module.
+Compiles the keyword rules from the category rules file into a single regex
+so each description is categorized in one pass, independent of how many
+rules are configured.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
+from pydantic import BaseModel
+from app.core.config import settings
+
+class CategoryRule(BaseModel):
+    """
+    One categorization rule from the rules file.
+
+    match controls where a keyword may occur in the description:
+    - "prefix": at the start of a word ("grocer" matches "groceries")
+    - "word": as a whole word ("bus" does not match "business")
+    - "substring": anywhere
+    When several rules match, the highest priority wins; ties go to the
+    rule listed first.
+    """
+    category: str
+    keywords: List[str]
+    match: Literal["prefix", "word", "substring"] = "prefix"
+    priority: int = 0
+
+def load_rules(path: str) -> List[CategoryRule]:
+    """
+    Load categorization rules from a JSON file.
+
+    Args:
+        path: Path to a file shaped like {"rules": [CategoryRule, ...]}
+
+    Returns:
+        list: Parsed rules in file order
+    """
+    with open(path, encoding="utf-8") as f:
+        return [CategoryRule(**rule) for rule in json.load(f)["rules"]]
+
+def _trie_pattern(words: Dict[str, str]) -> str:
+    """
+    Build a regex alternation shaped like a trie over the given keywords.
+
+    Longer continuations are tried before a keyword ends, so the longest
+    keyword starting at a position wins.
+
+    Args:
+        words: keyword -> regex suffix to require after it (e.g. word end)
+
+    Returns:
+        str: Regex source (empty if there are no words)
+    """
+    trie: Dict = {}
+    for word, tail in words.items():
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = tail
+
+    def render(node: Dict) -> str:
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            branches.append(node[""])
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return render(trie) if trie else ""
+
+class Categorizer:
+    """Single-pass multi-keyword matcher compiled from a list of rules."""
+
+    def __init__(self, rules: Iterable[CategoryRule]):
+        # keyword -> (priority, rule order, category); the first rule wins a
+        # keyword listed twice
+        self._keywords: Dict[str, Tuple[int, int, str]] = {}
+        bounded: Dict[str, str] = {}
+        unbounded: Dict[str, str] = {}
+        for order, rule in enumerate(rules):
+            for keyword in rule.keywords:
+                keyword = keyword.strip().lower()
+                if not keyword or keyword in self._keywords:
+                    continue
+                self._keywords[keyword] = (rule.priority, order, rule.category)
+                if rule.match == "substring":
+                    unbounded[keyword] = ""
+                else:
+                    bounded[keyword] = r"(?!\w)" if rule.match == "word" else ""
+
+        parts = []
+        if bounded:
+            parts.append(r"\b" + _trie_pattern(bounded))
+        if unbounded:
+            parts.append(_trie_pattern(unbounded))
+        self._pattern = re.compile("|".join(parts)) if parts else None
+
+    def categorize(self, description: Optional[str]) -> Optional[str]:
+        """
+        Find the category of the best matching rule for a description.
+
+        Args:
+            description: Free-text expense description
+
+        Returns:
+            str: Matched category, or None when no keyword matches
+        """
+        if not description or self._pattern is None:
+            return None
+        best = None
+        for match in self._pattern.finditer(description.lower()):
+            hit = self._keywords[match.group()]
+            # Higher priority first, then earlier rule
+            if best is None or (hit[0], -hit[1]) > (best[0], -best[1]):
+                best = hit
+        return best[2] if best else None
+
+    def categorize_many(self, descriptions: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """
+        Categorize a batch of descriptions (imports, recategorization jobs).
+
+        Args:
+            descriptions: Free-text descriptions (None entries allowed)
+
+        Returns:
+            list: Matched category or None, aligned with the input
+        """
+        categorize = self.categorize
+        return [categorize(d) for d in descriptions]
+
+@lru_cache(maxsize=1)
+def get_categorizer() -> Categorizer:
+    """Compile the configured rules file once per process."""
+    return Categorizer(load_rules(settings.CATEGORY_RULES_FILE))
+
+def auto_categorize(description: str | None, category: str | None) -> str:
+    """
+    Pick a category for an expense from its description.
+
+    Only expenses left as "Other" (or without a category) are
+    re-categorized; an explicit category is always kept.
+
+    Args:
+        description: Free-text expense description
+        category: Category chosen by the user
+
+    Returns:
+        str: The resolved category
+    """
+    cat = category or 'Other'
+    if cat == 'Other':
+        return get_categorizer().categorize(description) or cat
+    return cat
+
+def categorize_many(descriptions: Iterable[Optional[str]], categories: Iterable[Optional[str]] | None = None) -> List[str]:
+    """
+    Batch version of auto_categorize.
+
+    Args:
+        descriptions: Expense descriptions
+        categories: Matching user-chosen categories (default: all "Other")
+
+    Returns:
+        list: Resolved categories aligned with descriptions
+    """
+    descriptions = list(descriptions)
+    categories = list(categories) if categories is not None else [None] * len(descriptions)
+    matched = get_categorizer().categorize_many(
+        d if (c or 'Other') == 'Other' else None for d, c in zip(descriptions, categories)
+    )
+    return [m or c or 'Other' for m, c in zip(matched, categories)]
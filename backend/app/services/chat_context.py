@@ -0,0 +1,193 @@
+"""
+Chat context module.
+Builds the context block sent with each chat message: a compact digest of
+the user's month (totals, top categories, forecast, alerts) and a window of
+recent conversation turns, trimmed to a token budget. The digest and turns
+are cached per user so a chat message usually costs no database reads.
+"""
+
+import logging
+from collections import deque
+from datetime import date
+from threading import Lock
+from typing import Deque, Dict, Tuple
+from cachetools import TTLCache
+from app.core.config import settings
+from app.repositories import repos
+from app.schemas.finance import BudgetSummary
+from app.services.chat_writer import chat_writer
+from app.services.finance_service import calculate_summary
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate; Gemini averages about four characters per token for English text
+CHARS_PER_TOKEN = 4
+# Longest message kept verbatim in the turn window
+MAX_TURN_CHARS = 600
+TOP_CATEGORIES = 5
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+def format_digest(month: str, summary: BudgetSummary) -> str:
+    """
+    Render a summary as a few short lines of plain text.
+
+    Args:
+        month: Month in YYYY-MM format
+        summary: The month's summary (transactions are not used)
+
+    Returns:
+        str: The digest
+    """
+    budget = summary.remaining_budget + summary.total_expenses
+    lines = [
+        f"Financial status for {month}:",
+        f"Income {_money(summary.total_income)}, expenses {_money(summary.total_expenses)}"
+        + (f", budget {_money(budget)} ({_money(summary.remaining_budget)} left, {summary.status})." if budget else ", no budget set.")
+    ]
+    top = sorted(summary.category_breakdown.items(), key=lambda x: x[1], reverse=True)[:TOP_CATEGORIES]
+    if top:
+        lines.append("Top categories: " + ", ".join(f"{name} {_money(amount)}" for name, amount in top) + ".")
+    forecast = summary.forecast
+    if forecast and forecast.days_elapsed < forecast.days_in_month:
+        lines.append(
+            f"Projected month-end spending {_money(forecast.projected_total)} "
+            f"(day {forecast.days_elapsed} of {forecast.days_in_month}, {forecast.projected_status})."
+        )
+    if summary.alerts:
+        lines.append("Alerts: " + "; ".join(summary.alerts) + ".")
+    return "\n".join(lines)
+
+def _trim(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+class ChatContextBuilder:
+    """
+    Per-user cache of the financial digest and recent chat turns.
+
+    The digest is rebuilt whenever calculate_summary returns a different
+    summary object, so the summary cache's write invalidation (and TTL)
+    applies to it as well. Turns are loaded once and then appended to as
+    messages are sent, so later messages skip the chat_history query.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, token_budget: int, max_turns: int):
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        # user_id -> (month, summary the digest was built from, digest)
+        self._digests: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # user_id -> recent (role, content) turns, oldest first
+        self._turns: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = Lock()
+        self.prompts = 0
+        self.context_tokens = 0
+        self.digest_hits = 0
+        self.turn_hits = 0
+
+    async def build(self, user_id: str) -> str:
+        """
+        Build the context block for a signed-in user's next message.
+
+        The digest is always included; turns are added newest first until
+        the token budget is spent and then listed oldest first.
+
+        Args:
+            user_id: UUID of the user
+
+        Returns:
+            str: Context text for the prompt
+        """
+        digest = await self._digest(user_id)
+        turns = await self._recent_turns(user_id)
+
+        budget = self.token_budget - estimate_tokens(digest)
+        kept = []
+        for role, content in reversed(turns):
+            line = f"{'User' if role == 'user' else 'Assistant'}: {_trim(content, MAX_TURN_CHARS)}"
+            cost = estimate_tokens(line) + 1
+            if cost > budget:
+                break
+            kept.append(line)
+            budget -= cost
+        context = digest
+        if kept:
+            context += "\n\nRecent conversation (oldest first):\n" + "\n".join(reversed(kept))
+
+        tokens = estimate_tokens(context)
+        with self._lock:
+            self.prompts += 1
+            self.context_tokens += tokens
+        logger.info("Chat context for %s: ~%d tokens (%d chars), %d of %d turns", user_id, tokens, len(context), len(kept), len(turns))
+        return context
+
+    def record(self, user_id: str, role: str, content: str) -> None:
+        """Append a message to the user's cached turns (no-op if they are not cached)."""
+        with self._lock:
+            turns = self._turns.get(user_id)
+            if turns is not None:
+                turns.append((role, content))
+
+    def forget(self, user_id: str) -> None:
+        """Drop a user's cached digest and turns (e.g. after clearing history)."""
+        with self._lock:
+            self._digests.pop(user_id, None)
+            self._turns.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._digests.clear()
+            self._turns.clear()
+            self.prompts = self.context_tokens = self.digest_hits = self.turn_hits = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "prompts": self.prompts,
+                "avg_context_tokens": self.context_tokens / self.prompts if self.prompts else 0.0,
+                "digest_hits": self.digest_hits,
+                "turn_hits": self.turn_hits,
+                "size": len(self._turns)
+            }
+
+    async def _digest(self, user_id: str) -> str:
+        month = date.today().strftime("%Y-%m")
+        # The slim summary comes from the summary cache or the aggregates; no rows are loaded
+        summary = await calculate_summary(user_id, month, slim=True)
+        with self._lock:
+            entry = self._digests.get(user_id)
+            if entry is not None and entry[0] == month and entry[1] is summary:
+                self.digest_hits += 1
+                return entry[2]
+        digest = format_digest(month, summary)
+        with self._lock:
+            self._digests[user_id] = (month, summary, digest)
+        return digest
+
+    async def _recent_turns(self, user_id: str) -> list:
+        with self._lock:
+            turns = self._turns.get(user_id)
+            if turns is not None:
+                self.turn_hits += 1
+                return list(turns)
+        # Messages still queued by the writer are not in the table yet
+        pending = chat_writer.pending_for(user_id)
+        stored = await repos.chat_history.list_recent(user_id, self.max_turns)
+        stored_ids = {str(row["id"]) for row in stored}
+        rows = stored + [row for row in pending if row["id"] not in stored_ids]
+        turns: Deque[Tuple[str, str]] = deque(((r["role"], r["content"]) for r in rows), maxlen=self.max_turns)
+        with self._lock:
+            self._turns[user_id] = turns
+            return list(turns)
+
+# Global builder used by the chat router
+chat_context = ChatContextBuilder(
+    maxsize=settings.CHAT_CONTEXT_CACHE_SIZE,
+    ttl=settings.CHAT_CONTEXT_CACHE_TTL_SECONDS,
+    token_budget=settings.CHAT_CONTEXT_TOKEN_BUDGET,
+    max_turns=settings.CHAT_CONTEXT_MAX_TURNS
+)
@@ -0,0 +1,213 @@
+"""
+Chat history writer module.
+Persists chat messages in the background: handlers enqueue messages and a
+single task flushes them to chat_history in multi-row batches, retrying
+transient failures with backoff off the request path.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+from uuid import uuid4
+import httpx
+from postgrest.exceptions import APIError
+from app.core.config import settings
+from app.repositories import repos
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE classes PostgREST answers with a 5xx that may succeed on retry:
+# connection errors, rollbacks (serialization/deadlock), insufficient
+# resources, operator intervention (shutdown, cancel) and system errors
+TRANSIENT_SQLSTATE_CLASSES = ("08", "40", "53", "57", "58")
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Whether a failed insert is worth retrying unchanged.
+
+    APIError does not carry the HTTP status: a non-JSON error body (e.g.
+    from a gateway) reports it as the code, otherwise the code is
+    PostgREST's own (PGRST000-003 are its connection and pool errors) or
+    the SQLSTATE.
+    """
+    if isinstance(error, httpx.TransportError):
+        return True
+    if not isinstance(error, APIError):
+        return False
+    code = error.code
+    if isinstance(code, int) or (isinstance(code, str) and code.isdigit() and len(code) == 3):
+        return int(code) >= 500
+    code = str(code or "")
+    return code.startswith("PGRST00") or code[:2] in TRANSIENT_SQLSTATE_CLASSES
+
+class ChatHistoryWriter:
+    """
+    Bounded write-behind queue for chat_history rows.
+
+    Rows get their id and created_at when enqueued, so retries are
+    idempotent and ordering does not depend on when a batch lands.
+    Messages that are queued or in flight stay visible through
+    pending_for() so readers see their own writes.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int, max_retries: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._pending: Deque[Dict] = deque()
+        self._in_flight: List[Dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.flushed = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        """Start the background flusher if it is not running."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            # Synchronization primitives belong to the loop that runs the flusher
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Condition()
+            self._flush_lock = asyncio.Lock()
+            self._closing = False
+            self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and drain every pending message."""
+        if self._task is None:
+            # Nothing was ever queued (enqueue always starts the flusher)
+            return
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+        await self._flush_all()
+        self._task = None
+
+    async def enqueue(self, user_id: str, role: str, content: str) -> Dict:
+        """
+        Queue a chat message for persistence.
+
+        Waits for space when the queue is full, so a stalled database slows
+        chat down instead of growing memory without bound.
+
+        Args:
+            user_id: UUID of the user
+            role: "user" or "assistant"
+            content: Message text
+
+        Returns:
+            dict: The row as it will be stored
+        """
+        self.start()
+        row = {
+            "id": str(uuid4()),
+            "user_id": user_id,
+            "role": role,
+            "content": content,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        async with self._space:
+            await self._space.wait_for(lambda: len(self._pending) < self.max_pending)
+            self._pending.append(row)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return row
+
+    def pending_for(self, user_id: str) -> List[Dict]:
+        """Messages of a user that are not yet confirmed in the database."""
+        return [r for r in (*self._in_flight, *self._pending) if r["user_id"] == user_id]
+
+    async def discard(self, user_id: str) -> None:
+        """
+        Drop a user's queued messages and wait for any in-flight batch.
+
+        Called before clearing a user's history so nothing queued earlier
+        is written back afterwards.
+        """
+        self.start()
+        self._pending = deque(r for r in self._pending if r["user_id"] != user_id)
+        async with self._flush_lock:
+            pass
+        async with self._space:
+            self._space.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "flushed": self.flushed,
+            "dropped": self.dropped
+        }
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._flush_all()
+            except Exception:
+                logger.exception("Chat history flush failed")
+
+    async def _flush_all(self) -> None:
+        while self._pending:
+            await self._flush_batch()
+
+    async def _flush_batch(self) -> None:
+        async with self._flush_lock:
+            count = min(self.batch_size, len(self._pending))
+            self._in_flight = [self._pending.popleft() for _ in range(count)]
+            async with self._space:
+                self._space.notify_all()
+
+            try:
+                await self._insert(self._in_flight)
+            except Exception as e:
+                if _is_transient(e):
+                    # Retries are used up; the backend is down, not the rows
+                    self.dropped += len(self._in_flight)
+                    logger.exception("Dropping %d chat history message(s)", len(self._in_flight))
+                else:
+                    # A rejected row must not take other users' messages down with it
+                    logger.warning("Chat history batch rejected (%s); inserting %d row(s) one by one", e, len(self._in_flight))
+                    await self._insert_each(self._in_flight)
+            finally:
+                self._in_flight = []
+
+    async def _insert(self, rows: List[Dict]) -> None:
+        """Insert rows, retrying transient failures with exponential backoff."""
+        delay = 0.5
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Inserts skip existing ids, so a retried batch is idempotent
+                await repos.chat_history.insert_many(rows)
+                self.flushed += len(rows)
+                return
+            except Exception as e:
+                if attempt == self.max_retries or not _is_transient(e):
+                    raise
+                logger.warning("Chat history flush attempt %d failed (%s); retrying in %.1fs", attempt + 1, e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def _insert_each(self, rows: List[Dict]) -> None:
+        for row in rows:
+            try:
+                await self._insert([row])
+            except Exception:
+                self.dropped += 1
+                logger.exception("Dropping chat history message %s of user %s", row["id"], row["user_id"])
+
+# Global writer instance, started by the app lifespan (or lazily on first use)
+chat_writer = ChatHistoryWriter(
+    batch_size=settings.CHAT_WRITE_BATCH_SIZE,
+    flush_interval=settings.CHAT_WRITE_FLUSH_SECONDS,
+    max_pending=settings.CHAT_WRITE_MAX_PENDING,
+    max_retries=settings.CHAT_WRITE_MAX_RETRIES
+)
@@ -0,0 +1,144 @@
+"""
+Export service module.
+Streams a user's budgets, income and expenses as CSV or NDJSON, optionally
+gzip- or zstd-compressed on the fly. Transactions are read in keyset pages
+and each page is encoded, compressed and handed to the response before the
+next one is fetched, so memory stays flat however many rows a user has.
+"""
+
+import csv
+import io
+import zlib
+from datetime import date
+from typing import AsyncIterator, List, Optional, Tuple
+import orjson
+from app.core.config import settings
+from app.repositories import repos
+from app.repositories.base import Row
+from app.services.finance_service import TRANSACTION_FIELDS
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+# compression -> (file extension, media type)
+EXPORT_COMPRESSIONS = {"gzip": (".gz", "application/gzip"), "zstd": (".zst", "application/zstd")}
+
+# One CSV holds every record type; columns a type does not have stay empty
+CSV_COLUMNS = ("type", "id", "date", "month", "amount", "total_budget", "category", "description", "source", "created_at")
+
+BUDGET_FIELDS = ("id", "month", "total_budget", "created_at")
+
+def export_media(fmt: str, compression: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Media type and download file name of an export.
+
+    Args:
+        fmt: "csv" or "ndjson"
+        compression: None, "gzip" or "zstd"
+
+    Returns:
+        tuple: (media type, file name)
+
+    Raises:
+        ValueError: If the format or compression is unknown
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (expected {' or '.join(EXPORT_FORMATS)})")
+    name = f"financeflow-export-{date.today().isoformat()}.{fmt}"
+    if not compression:
+        return EXPORT_FORMATS[fmt], name
+    if compression not in EXPORT_COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r} (expected {' or '.join(EXPORT_COMPRESSIONS)})")
+    extension, media_type = EXPORT_COMPRESSIONS[compression]
+    return media_type, name + extension
+
+async def iter_record_pages(user_id: str, start: Optional[str] = None, end: Optional[str] = None,
+                            page_size: int = settings.EXPORT_PAGE_SIZE) -> AsyncIterator[Tuple[str, List[Row]]]:
+    """
+    Yield a user's records one page at a time.
+
+    Budgets (one row per month) come in a single page; income and expenses
+    are paged newest first on (date, id), the same keyset the transaction
+    listing uses.
+
+    Args:
+        user_id: UUID of the user
+        start: Optional earliest date (YYYY-MM-DD)
+        end: Optional latest date (YYYY-MM-DD)
+        page_size: Rows per query
+
+    Yields:
+        tuple: (record type, rows) with type "budget", "income" or "expense"
+    """
+    budgets = await repos.budgets.list_range(user_id, start[:7] if start else "0000-01", end[:7] if end else "9999-12",
+                                             BUDGET_FIELDS)
+    if budgets:
+        yield "budget", budgets
+    for table, kind in (("income", "income"), ("expenses", "expense")):
+        after = None
+        while True:
+            rows = await repos.transactions(table).list_page(user_id, page_size, after, TRANSACTION_FIELDS[table], start, end)
+            if rows:
+                yield kind, rows
+            if len(rows) < page_size:
+                break
+            after = (str(rows[-1]["date"]), str(rows[-1]["id"]))
+
+def _encode_csv(kind: str, rows: List[Row], buffer: io.StringIO, writer) -> bytes:
+    fields = CSV_COLUMNS[1:]
+    writer.writerows([kind, *(row.get(f) for f in fields)] for row in rows)
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text.encode()
+
+def _encode_ndjson(kind: str, rows: List[Row]) -> bytes:
+    return b"".join(orjson.dumps({"type": kind, **row}, default=str) + b"\n" for row in rows)
+
+def _compressor(compression: Optional[str]):
+    """A streaming compressor with compress()/flush(), or None."""
+    if compression == "gzip":
+        # wbits=31 writes the gzip header and trailer
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    return None
+
+async def stream_export(user_id: str, fmt: str, compression: Optional[str] = None,
+                        start: Optional[str] = None, end: Optional[str] = None) -> AsyncIterator[bytes]:
+    """
+    Stream a user's export as encoded (and optionally compressed) chunks.
+
+    Validate fmt and compression with export_media() first; this generator
+    only starts querying once the response starts sending.
+
+    Args:
+        user_id: UUID of the user
+        fmt: "csv" or "ndjson"
+        compression: None, "gzip" or "zstd"
+        start: Optional earliest date (YYYY-MM-DD)
+        end: Optional latest date (YYYY-MM-DD)
+
+    Yields:
+        bytes: Chunks of the file, about one page of rows each
+    """
+    compressor = _compressor(compression)
+    # Written ahead of the first page (and alone when there are no records)
+    pending = b""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+        pending = _encode_csv("", [], buffer, writer)
+
+    async for kind, rows in iter_record_pages(user_id, start, end):
+        data = pending + (_encode_csv(kind, rows, buffer, writer) if fmt == "csv" else _encode_ndjson(kind, rows))
+        pending = b""
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+
+    if compressor is not None:
+        pending = compressor.compress(pending) + compressor.flush()
+    if pending:
+        yield pending
@@ -3,14 +3,27 @@ Finance service module.
 Handles financial data retrieval and budget calculations.
 """
 
-from typing import List, Dict
-from app.core.config import supabase
+import asyncio
+import base64
+import json
+from datetime import date, datetime
+from typing import List, Dict, Optional, Tuple
+from uuid import UUID
+from app.repositories import repos
 from app.schemas.finance import BudgetSummary
+from app.services.summary_cache import summary_cache
+from app.services import aggregate_service, forecast_service
 
-def get_monthly_data(user_id: str, month: str):
+async def get_monthly_data(user_id: str, month: str):
     """
     Retrieve all financial data for a specific user and month.
     
+    This loads every transaction row of the month; callers that only need
+    totals should use aggregate_service.get_month_aggregates instead.
+    
+    The income, expenses and budget queries are independent, so they are
+    issued concurrently and the call costs roughly one round trip.
+    
     Args:
         user_id: UUID of the user
         month: Month in YYYY-MM format (e.g., "2026-01")
@@ -20,22 +33,153 @@ def get_monthly_data(user_id: str, month: str):
     """
     # Define date range for the month
     start_date = f"{month}-01"
+    end_date = f"{month}-31"
+    
+    # Fetch income, expense and budget records for the month concurrently
+    return await asyncio.gather(
+        repos.income.list_range(user_id, start_date, end_date),
+        repos.expenses.list_range(user_id, start_date, end_date),
+        repos.budgets.get(user_id, month),
+    )
+
+# Upper bound on how many months a single history request may span
+MAX_HISTORY_MONTHS = 120
+
+def month_range(start: str, end: str) -> List[str]:
+    """
+    List every month between two months, inclusive.
+    
+    Args:
+        start: First month in YYYY-MM format
+        end: Last month in YYYY-MM format
+        
+    Returns:
+        list: Months in YYYY-MM format, oldest first
+        
+    Raises:
+        ValueError: If a month is malformed, the range is reversed or too long
+    """
+    first = datetime.strptime(start, "%Y-%m")
+    last = datetime.strptime(end, "%Y-%m")
+    count = (last.year - first.year) * 12 + (last.month - first.month) + 1
+    if count < 1:
+        raise ValueError("start must not be after end")
+    if count > MAX_HISTORY_MONTHS:
+        raise ValueError(f"History range is limited to {MAX_HISTORY_MONTHS} months")
+    
+    months = []
+    year, mon = first.year, first.month
+    for _ in range(count):
+        months.append(f"{year:04d}-{mon:02d}")
+        year, mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return months
+
+async def _fetch_budgets(user_id: str, start: str, end: str) -> List[Dict]:
+    """Fetch the budget rows of a month range."""
+    return await repos.budgets.list_range(user_id, start, end, ["month", "total_budget"])
+
+async def get_history(user_id: str, start: str, end: str, budgets: List[Dict] | None = None) -> List[Dict]:
+    """
+    Build per-month income, expense and budget totals for a month range.
     
-    # Fetch income records for the month
-    income_response = supabase.table("income").select("*").eq("user_id", user_id).gte("date", start_date).lte("date", f"{month}-31").execute()
-    incomes = income_response.data
+    Income and expense totals come from the monthly aggregates (one row
+    per month and category), so no transaction rows are transferred.
     
-    # Fetch expense records for the month
-    expense_response = supabase.table("expenses").select("*").eq("user_id", user_id).gte("date", start_date).lte("date", f"{month}-31").execute()
-    expenses = expense_response.data
+    Args:
+        user_id: UUID of the user
+        start: First month in YYYY-MM format
+        end: Last month in YYYY-MM format
+        budgets: Optional pre-fetched budget rows; when given, only those
+            months are reported, otherwise every month in the range is
+        
+    Returns:
+        list: Dicts with month, income, expenses and budget, oldest first
+    """
+    if budgets is None:
+        report_months = month_range(start, end)
+        totals, budgets = await asyncio.gather(
+            aggregate_service.get_range_aggregates(user_id, start, end),
+            _fetch_budgets(user_id, start, end),
+        )
+    else:
+        report_months = [b["month"] for b in budgets]
+        totals = await aggregate_service.get_range_aggregates(user_id, start, end)
     
-    # Fetch budget settings for the month
-    budget_response = supabase.table("budgets").select("*").eq("user_id", user_id).eq("month", month).execute()
-    budget_data = budget_response.data[0] if budget_response.data else None
+    empty = aggregate_service.EMPTY_MONTH
+    budget_by_month = {b["month"]: float(b.get("total_budget") or 0) for b in budgets}
     
-    return incomes, expenses, budget_data
+    return [
+        {
+            "month": m,
+            "income": totals.get(m, empty)[0],
+            "expenses": totals.get(m, empty)[1],
+            "budget": budget_by_month.get(m, 0.0)
+        }
+        for m in report_months
+    ]
 
-def calculate_summary(user_id: str, month: str) -> BudgetSummary:
+# Columns that /finance/transactions may project, per table
+TRANSACTION_FIELDS = {
+    "income": ("id", "amount", "source", "date", "created_at"),
+    "expenses": ("id", "amount", "category", "description", "date", "created_at"),
+}
+
+def encode_cursor(row: Dict) -> str:
+    """Opaque keyset cursor pointing just past a row."""
+    return base64.urlsafe_b64encode(json.dumps([str(row["date"]), str(row["id"])]).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Parse a cursor produced by encode_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        entry_date, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        # Normalize both parts; they end up in a query filter
+        return date.fromisoformat(entry_date).isoformat(), str(UUID(id))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+async def list_transactions(user_id: str, table: str, limit: int, cursor: Optional[str] = None,
+                            fields: Optional[List[str]] = None, start: Optional[str] = None,
+                            end: Optional[str] = None) -> Dict:
+    """
+    Fetch one page of a user's income or expenses, newest first.
+    
+    Pages are keyed on (date, id) rather than offsets, so each page is an
+    index range scan no matter how deep the user scrolls, and rows added
+    meanwhile never shift later pages.
+    
+    Args:
+        user_id: UUID of the user
+        table: "income" or "expenses"
+        limit: Page size
+        cursor: next_cursor of the previous page
+        fields: Columns to return (date and id are always included)
+        start: Optional earliest date (YYYY-MM-DD)
+        end: Optional latest date (YYYY-MM-DD)
+        
+    Returns:
+        dict: items and next_cursor (None on the last page)
+        
+    Raises:
+        ValueError: If the cursor or a field name is invalid
+    """
+    if fields:
+        unknown = set(fields) - set(TRANSACTION_FIELDS[table])
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    columns = list(fields) if fields else list(TRANSACTION_FIELDS[table])
+    after = decode_cursor(cursor) if cursor else None
+    
+    # One extra row tells whether another page exists
+    rows = await repos.transactions(table).list_page(user_id, limit + 1, after, columns, start, end)
+    items = rows[:limit]
+    return {"items": items, "next_cursor": encode_cursor(items[-1]) if len(rows) > limit else None}
+
+async def calculate_summary(user_id: str, month: str, slim: bool = False) -> BudgetSummary:
     """
     Calculate comprehensive budget summary with insights and recommendations.
     
@@ -46,24 +190,49 @@ def calculate_summary(user_id: str, month: str) -> BudgetSummary:
     - Savings recommendations
     - Emergency fund recommendations
     - Alerts for overspending
+    - Month-end spending forecast
+    
+    Totals and the category breakdown come from the incrementally
+    maintained monthly aggregates rather than re-summing every row.
+    Results are served from the per-user summary cache when available;
+    write handlers invalidate the months they touch.
+    
+    The slim variant skips loading the month's rows, so recent_transactions
+    and income_sources are empty and its cost does not grow with the number
+    of transactions; use list_transactions to page through the rows.
     
     Args:
         user_id: UUID of the user
         month: Month in YYYY-MM format
+        slim: Return only aggregates, without the month's transactions
         
     Returns:
         BudgetSummary: Complete financial summary with all calculations
     """
     # Safety check for database connection
-    if not supabase:
+    if not repos:
         return BudgetSummary(total_income=0, total_expenses=0, remaining_budget=0, savings_recommendation=0, status="Database not connected", category_breakdown={}, emergency_fund_recommendation=0, alerts=[], insights="", overspending_categories=[])
 
-    # Retrieve all financial data for the month
-    incomes, expenses, budget_data = get_monthly_data(user_id, month)
+    # Serve from cache when possible
+    cached, epoch = summary_cache.get(user_id, month, slim)
+    if cached is not None:
+        return cached
     
-    # Calculate total income and expenses
-    total_income = sum(item['amount'] for item in incomes)
-    total_expenses = sum(item['amount'] for item in expenses)
+    if slim:
+        # Only the budget and the maintained totals
+        incomes, expenses = [], []
+        budget_data, (total_income, total_expenses, breakdown), daily = await asyncio.gather(
+            repos.budgets.get(user_id, month),
+            aggregate_service.get_month_aggregates(user_id, month),
+            forecast_service.load_daily(user_id, month),
+        )
+    else:
+        # Retrieve the month's rows for display and its maintained totals
+        (incomes, expenses, budget_data), (total_income, total_expenses, breakdown), daily = await asyncio.gather(
+            get_monthly_data(user_id, month),
+            aggregate_service.get_month_aggregates(user_id, month),
+            forecast_service.load_daily(user_id, month),
+        )
     
     # Get budget amount (if user has set one)
     budget_amount = budget_data['total_budget'] if budget_data else 0
@@ -81,12 +250,6 @@ def calculate_summary(user_id: str, month: str) -> BudgetSummary:
     elif total_expenses < budget_amount:
         status = "Under Budget"
     
-    # Create category-wise spending breakdown
-    breakdown = {}
-    for exp in expenses:
-        cat = exp['category']
-        breakdown[cat] = breakdown.get(cat, 0) + exp['amount']
-    
     # Generate alerts for financial issues
     alerts = []
     if total_expenses > total_income and total_income > 0:
@@ -94,6 +257,11 @@ def calculate_summary(user_id: str, month: str) -> BudgetSummary:
     if budget_amount and total_expenses > budget_amount:
         alerts.append("Expenses exceed budget")
     
+    # Project month-end spending from the daily running totals
+    forecast = forecast_service.build_forecast(daily, month, budget_amount)
+    if forecast.projected_status == "Projected Over Budget" and total_expenses <= budget_amount:
+        alerts.append("Spending is projected to exceed budget by month end")
+    
     # Calculate emergency fund recommendation (3 months of expenses)
     emergency_fund = total_expenses * 3
     
@@ -106,11 +274,11 @@ def calculate_summary(user_id: str, month: str) -> BudgetSummary:
     if overspending:
         insights_text = f"Top spending categories: {', '.join(overspending)}"
     
-    # Sort expenses by date (most recent first) for display
-    sorted_expenses = sorted(expenses, key=lambda x: x['date'], reverse=True)
+    # Rows arrive ordered by (date, id), so most recent first is the reverse
+    sorted_expenses = expenses[::-1]
     
-    # Return comprehensive budget summary
-    return BudgetSummary(
+    # Build comprehensive budget summary
+    summary = BudgetSummary(
         total_income=total_income, 
         total_expenses=total_expenses, 
         remaining_budget=remaining, 
@@ -122,5 +290,8 @@ def calculate_summary(user_id: str, month: str) -> BudgetSummary:
         insights=insights_text, 
         overspending_categories=overspending,
         recent_transactions=sorted_expenses,
-        income_sources=incomes
+        income_sources=incomes,
+        forecast=forecast
     )
+    summary_cache.set(user_id, month, summary, epoch, slim)
+    return summary
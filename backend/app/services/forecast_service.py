@@ -0,0 +1,134 @@
+"""
+Forecast service module.
+Projects month-end spending per category from the month's daily running
+totals (daily_spend) and the user's previous months, so a forecast reads
+O(days x categories) maintained rows instead of rescanning transactions.
+"""
+
+import calendar
+from datetime import date
+from typing import Dict, List, Optional
+from app.repositories import repos
+from app.schemas.finance import SpendingForecast
+
+# Previous months whose spending curve informs the projection
+FORECAST_HISTORY_MONTHS = 3
+# Cap on how far this month's pace may scale the historical remainder
+MAX_PACE_RATIO = 3.0
+
+def days_in_month(month: str) -> int:
+    year, mon = map(int, month.split("-"))
+    return calendar.monthrange(year, mon)[1]
+
+def shift_month(month: str, delta: int) -> str:
+    """Move a YYYY-MM month by `delta` months."""
+    year, mon = map(int, month.split("-"))
+    year, index = divmod(year * 12 + mon - 1 + delta, 12)
+    return f"{year:04d}-{index + 1:02d}"
+
+async def load_daily(user_id: str, month: str) -> List[Dict]:
+    """
+    Fetch the daily totals a forecast of `month` needs.
+
+    Args:
+        user_id: UUID of the user
+        month: Month in YYYY-MM format
+
+    Returns:
+        list: daily_spend rows (day, category, total, entry_count) of the
+            month and the FORECAST_HISTORY_MONTHS months before it
+    """
+    first = shift_month(month, -FORECAST_HISTORY_MONTHS)
+    return await repos.aggregates.list_daily(user_id, f"{first}-01", f"{month}-{days_in_month(month):02d}")
+
+def build_forecast(rows: List[Dict], month: str, budget: float = 0, today: Optional[date] = None) -> SpendingForecast:
+    """
+    Project end-of-month spending per category.
+
+    For each category the spend still to come is what previous months spent
+    after the same point of the month, scaled by this month's spending so
+    far relative to theirs; that ratio gets more weight as the month
+    progresses (none on day 0, all at month end). Categories without history
+    extrapolate their daily pace. Expenses already dated after today count
+    as a floor.
+
+    Args:
+        rows: daily_spend rows from load_daily
+        month: Month in YYYY-MM format
+        budget: The month's budget (0 when none is set)
+        today: Reference date (default: today); past months are reported as actuals
+
+    Returns:
+        SpendingForecast: Spend so far and the projected month-end totals
+    """
+    today = today or date.today()
+    days = days_in_month(month)
+    current = today.strftime("%Y-%m")
+    elapsed = days if month < current else 0 if month > current else today.day
+
+    # Daily spend per month and category: {month: {category: [day 1, ..., day N]}}
+    curves: Dict[str, Dict[str, List[float]]] = {}
+    lengths: Dict[str, int] = {}
+    for row in rows:
+        if not row["entry_count"]:
+            continue
+        day = str(row["day"])[:10]
+        by_category = curves.get(day[:7])
+        if by_category is None:
+            by_category = curves[day[:7]] = {}
+            lengths[day[:7]] = days_in_month(day[:7])
+        curve = by_category.get(row["category"])
+        if curve is None:
+            curve = by_category[row["category"]] = [0.0] * lengths[day[:7]]
+        curve[int(day[8:10]) - 1] += float(row["total"])
+
+    this_month = curves.get(month, {})
+    # Only complete months count; months before the user started tracking
+    # would drag the average to zero
+    history = [curves[m] for m in (shift_month(month, -i) for i in range(1, FORECAST_HISTORY_MONTHS + 1))
+               if m in curves and m < current]
+    weight = elapsed / days
+
+    projected = {}
+    spent_total = 0.0
+    for category in set(this_month).union(*history):
+        curve = this_month.get(category)
+        spent = sum(curve[:elapsed]) if curve else 0.0
+        scheduled = sum(curve[elapsed:]) if curve else 0.0
+        past_spent = past_remaining = 0.0
+        for past_curves in history:
+            past_curve = past_curves.get(category)
+            if past_curve:
+                # Align by the fraction of the month elapsed, since month lengths differ
+                cut = round(elapsed / days * len(past_curve))
+                past_spent += sum(past_curve[:cut])
+                past_remaining += sum(past_curve[cut:])
+        if history:
+            # Previous months' remaining spend, scaled by how this month compares
+            # with them so far; the comparison is trusted more as the month progresses
+            ratio = min(spent / past_spent, MAX_PACE_RATIO) if past_spent else 1.0
+            remaining = past_remaining / len(history) * (weight * ratio + 1 - weight)
+        else:
+            # No history yet: extrapolate the month's own daily pace
+            remaining = spent / elapsed * (days - elapsed) if elapsed else 0.0
+        remaining = max(remaining, scheduled)
+        spent_total += spent
+        if spent or remaining:
+            projected[category] = round(spent + remaining, 2)
+
+    total = round(sum(projected.values()), 2)
+    if not budget:
+        status = "No Budget"
+    elif total > budget:
+        status = "Projected Over Budget"
+    else:
+        status = "On Track"
+    return SpendingForecast(
+        days_elapsed=elapsed,
+        days_in_month=days,
+        spent_to_date=round(spent_total, 2),
+        projected_total=total,
+        projected_by_category=dict(sorted(projected.items(), key=lambda x: x[1], reverse=True)),
+        projected_remaining_budget=round(budget - total, 2) if budget else None,
+        projected_status=status
+    )
@@ -0,0 +1,310 @@
+"""
+Import service module.
+Parses bank statements (CSV or OFX) incrementally and writes them as income
+and expense rows in batched multi-row inserts.
+"""
+
+import asyncio
+import codecs
+import csv
+import io
+import re
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+from pydantic import ValidationError
+from app.core.config import settings
+from app.repositories import repos
+from app.schemas.finance import IncomeCreate, ExpenseCreate, ImportResult, ImportRowError
+from app.services import aggregate_service
+from app.services.categorizer import categorize_many
+from app.services.summary_cache import summary_cache, month_of
+
+# Accepted CSV header names (lower-cased) for each logical column
+CSV_COLUMNS = {
+    "date": ["date", "transaction date", "posted date", "booking date"],
+    "amount": ["amount", "value"],
+    "debit": ["debit", "withdrawal", "money out"],
+    "credit": ["credit", "deposit", "money in"],
+    "description": ["description", "memo", "name", "payee", "details", "narrative"],
+    "category": ["category"],
+    "type": ["type", "kind"],
+}
+
+# Bytes read per chunk when scanning OFX files
+OFX_CHUNK_SIZE = 64 * 1024
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+class RowError(ValueError):
+    """Raised for a statement row that cannot be imported."""
+
+def _parse_amount(value: str) -> float:
+    """Parse a bank amount such as '1,234.50', '(12.00)' or '-3.2'."""
+    text = value.strip().replace(",", "").replace("$", "")
+    negative = text.startswith("(") and text.endswith(")")
+    try:
+        amount = float(text.strip("()"))
+    except ValueError:
+        raise RowError(f"Invalid amount: {value!r}")
+    return -amount if negative else amount
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield normalized transactions from a CSV statement, one row at a time.
+
+    The file needs a header row. Amounts come from an `amount` column
+    (negative = expense) or from separate `debit`/`credit` columns; an
+    optional `type` column (income/expense) overrides the sign.
+
+    Args:
+        stream: Binary file object positioned at the start of the CSV
+
+    Yields:
+        tuple: (row number, dict with date/amount/description/category/kind)
+               or (row number, RowError) for rows that fail to parse
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if not header:
+            return
+        names = [h.strip().lower() for h in header]
+        cols = {}
+        for key, aliases in CSV_COLUMNS.items():
+            for alias in aliases:
+                if alias in names:
+                    cols[key] = names.index(alias)
+                    break
+        if "date" not in cols or not ("amount" in cols or "debit" in cols or "credit" in cols):
+            raise RowError("CSV header must include a date column and an amount (or debit/credit) column")
+
+        for row_number, row in enumerate(reader, start=1):
+            if not any(cell.strip() for cell in row):
+                continue
+            def get(key: str) -> str:
+                index = cols.get(key)
+                return row[index].strip() if index is not None and index < len(row) else ""
+
+            try:
+                if get("amount"):
+                    amount = _parse_amount(get("amount"))
+                else:
+                    debit, credit = get("debit"), get("credit")
+                    amount = -abs(_parse_amount(debit)) if debit else abs(_parse_amount(credit)) if credit else 0.0
+                kind = get("type").lower()
+                if kind in ("income", "credit"):
+                    kind = "income"
+                elif kind in ("expense", "debit"):
+                    kind = "expense"
+                else:
+                    kind = "expense" if amount < 0 else "income"
+                yield row_number, {
+                    "date": get("date"),
+                    "amount": abs(amount),
+                    "description": get("description") or None,
+                    "category": get("category") or None,
+                    "kind": kind,
+                }
+            except RowError as e:
+                yield row_number, e
+    finally:
+        # Leave the underlying upload open for the caller
+        text.detach()
+
+def iter_ofx_rows(stream: BinaryIO) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield normalized transactions from an OFX statement (SGML or XML).
+
+    The file is scanned in fixed-size chunks, so memory stays constant
+    regardless of file size or line layout.
+
+    Args:
+        stream: Binary file object positioned at the start of the OFX file
+
+    Yields:
+        tuple: (transaction number, dict with date/amount/description/kind)
+               or (transaction number, RowError) for unparseable transactions
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    current = None
+    row_number = 0
+    while True:
+        chunk = stream.read(OFX_CHUNK_SIZE)
+        buffer += decoder.decode(chunk, final=not chunk)
+        # Only tokenize up to the start of the last tag, whose value may
+        # continue in the next chunk
+        cut = buffer.rfind("<") if chunk else -1
+        if cut == -1:
+            ready, buffer = buffer, ""
+        else:
+            ready, buffer = buffer[:cut], buffer[cut:]
+
+        for closing, tag, value in OFX_TAG.findall(ready):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    current = {}
+                elif current is not None:
+                    row_number += 1
+                    yield row_number, _ofx_transaction(current)
+                    current = None
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+        if not chunk:
+            return
+
+def _ofx_transaction(fields: Dict[str, str]) -> Dict | RowError:
+    """Convert the leaf fields of one <STMTTRN> block into a transaction."""
+    try:
+        amount = _parse_amount(fields.get("TRNAMT", ""))
+    except RowError as e:
+        return e
+    posted = fields.get("DTPOSTED", "")[:8]
+    if len(posted) != 8 or not posted.isdigit():
+        return RowError(f"Invalid DTPOSTED: {fields.get('DTPOSTED')!r}")
+    description = " - ".join(v for v in (fields.get("NAME"), fields.get("MEMO")) if v) or None
+    return {
+        "date": f"{posted[:4]}-{posted[4:6]}-{posted[6:]}",
+        "amount": abs(amount),
+        "description": description,
+        "category": None,
+        "kind": "expense" if amount < 0 else "income",
+    }
+
+def _validate(user_id: str, tx: Dict) -> Tuple[str, Dict]:
+    """
+    Run a parsed transaction through the same schema as the single-row
+    endpoints (expenses are categorized per batch in _flush).
+
+    Returns:
+        tuple: (table name, row ready for insert)
+    """
+    if tx["kind"] == "income":
+        model = IncomeCreate(amount=tx["amount"], source=tx["description"] or "Imported", entry_date=tx["date"])
+        data = model.model_dump()
+        table = "income"
+    else:
+        model = ExpenseCreate(amount=tx["amount"], category=tx["category"] or "Other", description=tx["description"], entry_date=tx["date"])
+        data = model.model_dump()
+        table = "expenses"
+    data["date"] = str(data.pop("entry_date"))
+    data["user_id"] = user_id
+    if data["amount"] == 0:
+        raise RowError("Amount must not be zero")
+    return table, data
+
+def _dedupe_key(table: str, row: Dict) -> Tuple[str, float, str]:
+    """Identity used for duplicate detection: same date, amount and description."""
+    text = row.get("source") if table == "income" else row.get("description")
+    return str(row["date"]), round(float(row["amount"]), 2), (text or "").strip().lower()
+
+def _parse_rows(user_id: str, rows: Iterator[Tuple[int, Dict]], result: ImportResult,
+                limit: int) -> Tuple[List[Tuple[str, int, Dict]], bool]:
+    """
+    Pull up to `limit` valid rows from a statement iterator, recording the
+    errors of bad rows on the result. Runs in a worker thread.
+
+    Returns:
+        tuple: ([(table, row number, row)], whether the file is exhausted)
+    """
+    parsed = []
+    try:
+        for row_number, tx in rows:
+            if isinstance(tx, Exception):
+                result.errors.append(ImportRowError(row=row_number, error=str(tx)))
+                continue
+            try:
+                table, data = _validate(user_id, tx)
+            except ValidationError as e:
+                result.errors.append(ImportRowError(row=row_number, error="; ".join(err["msg"] for err in e.errors())))
+                continue
+            except RowError as e:
+                result.errors.append(ImportRowError(row=row_number, error=str(e)))
+                continue
+            parsed.append((table, row_number, data))
+            if len(parsed) >= limit:
+                return parsed, False
+    except RowError as e:
+        # File-level problem (e.g. missing header columns)
+        result.errors.append(ImportRowError(row=0, error=str(e)))
+    return parsed, True
+
+async def _flush(user_id: str, table: str, batch: List[Tuple[int, Dict]], result: ImportResult) -> None:
+    """
+    Insert one batch of validated rows, skipping duplicates of rows already
+    stored (including rows inserted by earlier batches of the same file).
+    """
+    if not batch:
+        return
+    text_col = "source" if table == "income" else "description"
+    dates = sorted({row["date"] for _, row in batch})
+    existing = await repos.transactions(table).list_on_dates(user_id, dates, ["date", "amount", text_col])
+    seen = {_dedupe_key(table, row) for row in existing}
+
+    # Categorize the whole batch in one call before duplicate detection
+    if table == "expenses":
+        categories = categorize_many((row.get("description") for _, row in batch), (row.get("category") for _, row in batch))
+        for (_, row), category in zip(batch, categories):
+            row["category"] = category
+
+    fresh = []
+    for row_number, row in batch:
+        key = _dedupe_key(table, row)
+        if key in seen:
+            result.duplicates += 1
+            continue
+        seen.add(key)
+        fresh.append((row_number, row))
+    if not fresh:
+        return
+
+    try:
+        inserted = await repos.transactions(table).insert_many([row for _, row in fresh])
+    except Exception as e:
+        result.errors.extend(ImportRowError(row=n, error=f"Insert failed: {e}") for n, _ in fresh)
+        return
+
+    delta = aggregate_service.income_delta if table == "income" else aggregate_service.expense_delta
+    await aggregate_service.apply_write_deltas(d for row in inserted for d in delta(row, 1))
+    summary_cache.invalidate(user_id, [month_of(row["date"]) for row in inserted])
+    if table == "income":
+        result.imported_income += len(inserted)
+    else:
+        result.imported_expenses += len(inserted)
+
+async def import_statement(user_id: str, stream: BinaryIO, fmt: str) -> ImportResult:
+    """
+    Import a bank statement for a user.
+
+    Rows are parsed one at a time and written in batches of
+    IMPORT_BATCH_SIZE; a bad row is reported and skipped without
+    aborting the rest of the file.
+
+    Args:
+        user_id: UUID of the user
+        stream: Binary file object with the statement contents
+        fmt: "csv" or "ofx"
+
+    Returns:
+        ImportResult: Counts of imported rows and duplicates plus per-row errors
+    """
+    result = ImportResult(imported_income=0, imported_expenses=0, duplicates=0, errors=[])
+    rows = iter_ofx_rows(stream) if fmt == "ofx" else iter_csv_rows(stream)
+    batches: Dict[str, List[Tuple[int, Dict]]] = {"income": [], "expenses": []}
+    loop = asyncio.get_running_loop()
+
+    done = False
+    while not done:
+        # Reading the spooled upload, parsing and validating block; keep them off the event loop
+        parsed, done = await loop.run_in_executor(None, _parse_rows, user_id, rows, result, settings.IMPORT_BATCH_SIZE)
+        for table, row_number, data in parsed:
+            batches[table].append((row_number, data))
+            if len(batches[table]) >= settings.IMPORT_BATCH_SIZE:
+                await _flush(user_id, table, batches[table], result)
+                batches[table] = []
+
+    for table, batch in batches.items():
+        await _flush(user_id, table, batch, result)
+    return result
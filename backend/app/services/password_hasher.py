@@ -0,0 +1,111 @@
+"""
+Password hasher module.
+Runs Argon2 hashing and verification on a small dedicated process pool so a
+burst of logins cannot occupy the threadpool (or the GIL) that every other
+endpoint depends on. Work beyond a fixed number of pending hashes is
+rejected immediately instead of queuing without bound.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.security import get_password_hash, verify_password
+
+logger = logging.getLogger(__name__)
+
+class PasswordHasherBusy(Exception):
+    """Raised when the pending-hash limit is reached."""
+
+class PasswordHasher:
+    """
+    Bounded process pool for Argon2.
+
+    `max_pending` counts hashes that are running or queued in the pool; a
+    hash whose caller went away still counts until it finishes, since it
+    still occupies a worker.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        """Create the worker processes if they are not running."""
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs threads is unsafe
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (pending hashes are cancelled)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured Argon2 parameters."""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against a stored hash."""
+        return await self._run(verify_password, password, hashed)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        self.start()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+            executor = self._executor
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._release(None)
+            self._reset(executor)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            with metrics.track("password_hash", fn.__name__):
+                return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); start a fresh pool for later calls
+            self._reset(executor)
+            raise
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self._pending -= 1
+            if future is not None:
+                self.completed += 1
+
+    def _reset(self, broken: ProcessPoolExecutor) -> None:
+        logger.error("Password hashing pool broke; restarting it")
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+# Global hasher, started by the app lifespan (or lazily on first use)
+password_hasher = PasswordHasher(workers=settings.PASSWORD_HASH_WORKERS, max_pending=settings.PASSWORD_HASH_MAX_PENDING)
@@ -0,0 +1,134 @@
+"""
+Summary cache module.
+Keeps recently computed monthly budget summaries in memory so repeated
+reads (dashboard refreshes, chat context) skip the database round trips.
+"""
+
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+from cachetools import TTLCache
+from app.core.config import settings
+from app.schemas.finance import BudgetSummary
+
+class SummaryCache:
+    """
+    Bounded LRU cache of BudgetSummary objects keyed by (user_id, month, slim).
+
+    Entries expire after a TTL so that writes made by other workers become
+    visible eventually; writes in this worker invalidate the affected months
+    immediately.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = Lock()
+        # Per-user epoch, bumped on every invalidation of that user so a
+        # summary computed before a write is never stored after it. Values
+        # come from one increasing counter; users whose epoch was trimmed
+        # read the floor, which is at least every epoch dropped so far.
+        self._epochs: Dict[str, int] = {}
+        self._counter = 0
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, month: str, slim: bool = False) -> Tuple[Optional[BudgetSummary], int]:
+        """
+        Look up a cached summary.
+
+        Args:
+            user_id: UUID of the user
+            month: Month in YYYY-MM format
+            slim: Look up the aggregates-only variant
+
+        Returns:
+            tuple: (summary or None, epoch token to pass back to set())
+        """
+        with self._lock:
+            summary = self._cache.get((user_id, month, slim))
+            if summary is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return summary, self._epochs.get(user_id, self._floor)
+
+    def set(self, user_id: str, month: str, summary: BudgetSummary, epoch: int, slim: bool = False) -> None:
+        """
+        Store a summary unless an invalidation happened since it was read.
+
+        Args:
+            user_id: UUID of the user
+            month: Month in YYYY-MM format
+            summary: The computed summary
+            epoch: Token returned by the get() that preceded the computation
+            slim: Whether this is the aggregates-only variant
+        """
+        with self._lock:
+            if epoch == self._epochs.get(user_id, self._floor):
+                self._cache[(user_id, month, slim)] = summary
+
+    def invalidate(self, user_id: str, months: Iterable[Optional[str]]) -> None:
+        """
+        Drop the cached summaries of the given months for a user.
+
+        Args:
+            user_id: UUID of the user
+            months: Months in YYYY-MM format; None entries are ignored
+        """
+        with self._lock:
+            self._counter += 1
+            # Re-insert so the dict stays ordered by last invalidation
+            self._epochs.pop(user_id, None)
+            self._epochs[user_id] = self._counter
+            if len(self._epochs) > self._cache.maxsize:
+                # Trim alongside the cache; the floor keeps stale tokens invalid
+                oldest = next(iter(self._epochs))
+                self._floor = max(self._floor, self._epochs.pop(oldest))
+            for month in set(months):
+                if month:
+                    self._cache.pop((user_id, month, False), None)
+                    self._cache.pop((user_id, month, True), None)
+
+    def clear(self) -> None:
+        """Drop every cached summary and reset the counters."""
+        with self._lock:
+            self._counter += 1
+            self._floor = self._counter
+            self._epochs.clear()
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: hits, misses, hit_rate and current size
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize
+            }
+
+def month_of(entry_date) -> str | None:
+    """
+    Extract the YYYY-MM month from a date or ISO date string.
+
+    Args:
+        entry_date: datetime.date or "YYYY-MM-DD" string
+
+    Returns:
+        str: Month in YYYY-MM format, or None if no date was given
+    """
+    if not entry_date:
+        return None
+    return str(entry_date)[:7]
+
+# Global cache instance shared by the finance service and routers
+summary_cache = SummaryCache(maxsize=settings.SUMMARY_CACHE_SIZE, ttl=settings.SUMMARY_CACHE_TTL_SECONDS)
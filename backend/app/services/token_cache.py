@@ -0,0 +1,78 @@
+"""
+Token cache module.
+Remembers access tokens whose signature has already been verified so repeat
+requests with the same bearer token skip the JWT decode.
+"""
+
+import hashlib
+import time
+from threading import Lock
+from typing import Dict, Optional
+from cachetools import TLRUCache
+from app.core.config import settings
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified tokens, keyed by a SHA-256 digest of the token.
+
+    Each entry expires at its token's own `exp` claim, so a cached token is
+    never accepted for longer than the token itself would be. Only tokens
+    that verified successfully are stored; raw tokens are never kept.
+    """
+
+    def __init__(self, maxsize: int):
+        # Values are (user_id, exp); the per-item expiry is the exp timestamp
+        self._cache: TLRUCache = TLRUCache(maxsize=maxsize, ttu=lambda _key, value, _now: value[1], timer=time.time)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[str]:
+        """Return the user id of a previously verified, unexpired token."""
+        key = self.key(token)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def set(self, token: str, user_id: str, exp: float) -> None:
+        """
+        Remember a verified token until its expiry.
+
+        Args:
+            token: The raw JWT (without the 'Bearer ' prefix)
+            user_id: The token's subject
+            exp: The token's exp claim (seconds since the epoch)
+        """
+        if exp <= time.time():
+            return
+        with self._lock:
+            self._cache[self.key(token)] = (user_id, exp)
+
+    def clear(self) -> None:
+        """Drop every cached token and reset the counters."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize
+            }
+
+# Global cache instance used by get_user_by_token
+token_cache = TokenCache(maxsize=settings.TOKEN_CACHE_SIZE)
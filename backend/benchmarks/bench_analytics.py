@@ -0,0 +1,156 @@
+"""
+Benchmark for the vectorized analytics engine.
+
+Generates a user with many transactions spread over several years and
+times analytics_service.compute_analytics (columnar NumPy) against a
+straightforward per-month Python implementation of the same series, after
+checking that both produce the same result. With --sqlite the rows are also
+loaded through the SQLite repository to show the end-to-end cost.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_analytics [--transactions 100000] [--months 12 36] [--runs 5] [--sqlite]
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from app.services import analytics_service
+from app.services.analytics_service import ANOMALY_MIN_SAMPLES, ANOMALY_SCORE, MAD_SCALE, ROLLING_WINDOWS
+
+CATEGORIES = ["Food", "Transport", "Utilities", "Entertainment", "Healthcare", "Shopping", "Other"]
+END_MONTH = "2026-06"
+
+def make_rows(transactions: int, years: int, rng: random.Random) -> tuple[list[dict], list[dict]]:
+    """Expense rows (with occasional outliers) and two incomes per month."""
+    last = datetime.date(2026, 6, 30)
+    days = years * 365
+    expenses = []
+    for _ in range(transactions):
+        category = rng.choice(CATEGORIES)
+        amount = rng.lognormvariate(3, 0.6) * (25 if rng.random() < 0.001 else 1)
+        expenses.append({"id": str(uuid.uuid4()), "amount": round(amount, 2), "category": category,
+                         "date": (last - datetime.timedelta(days=rng.randrange(days))).isoformat()})
+    incomes = []
+    for m in range(years * 12):
+        year, month = divmod(2026 * 12 + 5 - m, 12)
+        for day in (1, 15):
+            incomes.append({"amount": round(rng.uniform(1500, 2500), 2), "date": f"{year}-{month + 1:02d}-{day:02d}"})
+    return incomes, expenses
+
+def reference(incomes: list[dict], expenses: list[dict], end: str, months: int) -> dict:
+    """Per-month Python implementation, as repeated per-month queries would compute it."""
+    lookback = max(ROLLING_WINDOWS) - 1
+    year, month = map(int, end.split("-"))
+    window = []
+    for offset in range(months + lookback - 1, -1, -1):
+        y, m = divmod(year * 12 + month - 1 - offset, 12)
+        window.append(f"{y}-{m + 1:02d}")
+
+    income = [sum(r["amount"] for r in incomes if r["date"][:7] == m) for m in window]
+    by_category = [{} for _ in window]
+    for i, m in enumerate(window):
+        for r in expenses:
+            if r["date"][:7] == m:
+                by_category[i][r["category"]] = by_category[i].get(r["category"], 0) + r["amount"]
+    spent = [sum(c.values()) for c in by_category]
+    first_active = next((i for i in range(len(window)) if income[i] or spent[i]), len(window))
+
+    report = []
+    for i in range(lookback, len(window)):
+        report.append({
+            "month": window[i], "income": round(income[i], 2), "expenses": round(spent[i], 2),
+            "rolling_expenses": {str(w): round(sum(spent[i - w + 1:i + 1]) / w, 2) if i - w + 1 >= first_active else None
+                                 for w in ROLLING_WINDOWS},
+            "category_deltas": {c: round(by_category[i].get(c, 0) - by_category[i - 1].get(c, 0), 2)
+                                for c in by_category[i].keys() | by_category[i - 1].keys()
+                                if abs(by_category[i].get(c, 0) - by_category[i - 1].get(c, 0)) >= 0.005}
+        })
+
+    in_window = [r for r in expenses if window[0] <= r["date"][:7] <= window[-1]]
+    anomalies = []
+    for category in CATEGORIES:
+        amounts = [r["amount"] for r in in_window if r["category"] == category]
+        if len(amounts) < ANOMALY_MIN_SAMPLES:
+            continue
+        median = statistics.median(amounts)
+        mad = statistics.median(abs(a - median) for a in amounts)
+        if mad <= 0:
+            continue
+        for r in in_window:
+            if r["category"] == category and r["date"][:7] >= window[lookback]:
+                score = MAD_SCALE * (r["amount"] - median) / mad
+                if score > ANOMALY_SCORE:
+                    anomalies.append((round(score, 2), r["id"]))
+    return {"months": report, "anomalies": sorted(anomalies, reverse=True)}
+
+def check(result, expected: dict) -> None:
+    for got, want in zip(result.months, expected["months"], strict=True):
+        assert got.month == want["month"], (got.month, want["month"])
+        for key in ("income", "expenses"):
+            assert abs(getattr(got, key) - want[key]) < 0.015, (got.month, key)
+        for w, value in want["rolling_expenses"].items():
+            other = got.rolling_expenses[w]
+            assert (value is None) == (other is None) and (value is None or abs(value - other) < 0.015), (got.month, w)
+        assert got.category_deltas.keys() == want["category_deltas"].keys(), got.month
+    got_ids = [a.id for a in result.anomalies]
+    want_ids = [i for _, i in expected["anomalies"]][:len(got_ids)]
+    assert set(got_ids) == set(want_ids), "anomalies differ"
+
+def timed(fn, *args, runs: int) -> tuple[float, object]:
+    """Best-of-`runs` seconds and the last result."""
+    best, result = float("inf"), None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+async def seed_sqlite(incomes: list[dict], expenses: list[dict]) -> str:
+    """Insert the rows for a fresh user and return its id."""
+    from app.repositories import repos
+    user_id = str(uuid.uuid4())
+    await repos.income.insert_many([{**r, "user_id": user_id, "source": "Salary"} for r in incomes])
+    await repos.expenses.insert_many([{**r, "user_id": user_id} for r in expenses])
+    return user_id
+
+async def time_sqlite(user_id: str, months: int, runs: int) -> None:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        await analytics_service.get_analytics(user_id, months, END_MONTH)
+        best = min(best, time.perf_counter() - start)
+    print(f"  end to end via SQLite (load + compute): {best * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--years", type=int, default=5, help="Span the transactions are spread over")
+    parser.add_argument("--months", type=int, nargs="+", default=[12, 36])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--sqlite", action="store_true", help="Also time loading the rows from SQLite")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    incomes, expenses = make_rows(args.transactions, args.years, random.Random(args.seed))
+    print(f"{len(expenses):,} expenses and {len(incomes):,} incomes over {args.years} years")
+    user_id = asyncio.run(seed_sqlite(incomes, expenses)) if args.sqlite else None
+    for months in args.months:
+        numpy_s, result = timed(analytics_service.compute_analytics, incomes, expenses, END_MONTH, months, runs=args.runs)
+        python_s, expected = timed(reference, incomes, expenses, END_MONTH, months, runs=1)
+        check(result, expected)
+        print(f"{months:>3} months: numpy {numpy_s * 1000:8.1f} ms   per-month python {python_s * 1000:8.1f} ms   "
+              f"speedup {python_s / numpy_s:5.1f}x   anomalies {len(result.anomalies)}")
+        if args.sqlite:
+            asyncio.run(time_sqlite(user_id, months, args.runs))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+End-to-end API benchmark.
+
+Runs the FastAPI app in-process against the embedded SQLite backend and a
+fake chat model, both with configurable latency standing in for Supabase
+and Gemini round trips. Synthetic users are seeded with a realistic volume
+of transactions, then each route is driven at the requested concurrency
+levels. Throughput, p50/p95/p99 latency and backend round trips per request
+are printed and written as JSON; pass --compare to check a run against an
+earlier one and exit non-zero on regressions.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_api [--routes summary history chat] [--concurrency 1 8 32]
+        [--db-latency-ms 5] [--llm-latency-ms 300] [--output bench_api.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from statistics import quantiles
+from typing import Any, Callable, Dict, List
+
+ROUTES = ["summary", "history", "history_budgets", "add_expense", "chat", "chat_stream"]
+
+EXPENSE_WORDS = ["grocery store", "uber ride", "electricity bill", "netflix", "restaurant", "fuel station",
+                 "coffee", "pharmacy", "bus pass", "cinema", "internet", "hardware store"]
+CATEGORIES = ["Food", "Transport", "Utilities", "Entertainment", "Shopping", "Health", "Other"]
+
+class RoundTripCounter:
+    """Counts backend calls made through the latency proxies."""
+
+    def __init__(self):
+        self.db = 0
+        self.llm = 0
+
+class LatencyProxy:
+    """Wraps a repository so every call sleeps first and is counted as one round trip."""
+
+    def __init__(self, target: Any, delay: float, counter: RoundTripCounter):
+        self._target = target
+        self._delay = delay
+        self._counter = counter
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            self._counter.db += 1
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            return await attr(*args, **kwargs)
+        return call
+
+def make_fake_llm(latency: float, token_latency: float, counter: RoundTripCounter):
+    """Build a chat model that answers after a delay instead of calling Gemini."""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+    reply = ("Budgeting starts with tracking where your money goes. The 50/30/20 rule splits income into "
+             "needs, wants and savings, which is a simple way to check your spending.")
+    tokens = [t + " " for t in reply.split(" ")]
+
+    class FakeChatModel(BaseChatModel):
+        @property
+        def _llm_type(self) -> str:
+            return "benchmark-fake"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            counter.llm += 1
+            time.sleep(latency + token_latency * len(tokens))
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            counter.llm += 1
+            await asyncio.sleep(latency + token_latency * len(tokens))
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            counter.llm += 1
+            await asyncio.sleep(latency)
+            for token in tokens:
+                if token_latency:
+                    await asyncio.sleep(token_latency)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    return FakeChatModel()
+
+def recent_months(count: int) -> List[str]:
+    """The last `count` months (oldest first), ending with the current month."""
+    today = datetime.now(timezone.utc)
+    year, month = today.year, today.month
+    out = []
+    for _ in range(count):
+        out.append(f"{year:04d}-{month:02d}")
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return out[::-1]
+
+async def seed(repos, users: int, months: List[str], expenses_per_month: int, rng: random.Random) -> List[str]:
+    """Insert synthetic users with income, expenses and budgets; returns their ids."""
+    from uuid import uuid4
+    from app.services import aggregate_service
+
+    user_ids = []
+    for _ in range(users):
+        user_id = str(uuid4())
+        user_ids.append(user_id)
+        incomes, expenses, budgets = [], [], []
+        for month in months:
+            salary = rng.randint(2500, 8000)
+            incomes.append({"user_id": user_id, "amount": salary, "source": "Salary", "date": f"{month}-01"})
+            if rng.random() < 0.3:
+                incomes.append({"user_id": user_id, "amount": rng.randint(50, 900), "source": "Freelance", "date": f"{month}-15"})
+            for _ in range(expenses_per_month):
+                expenses.append({
+                    "user_id": user_id,
+                    "amount": round(rng.uniform(2, 250), 2),
+                    "category": rng.choice(CATEGORIES),
+                    "description": rng.choice(EXPENSE_WORDS),
+                    "date": f"{month}-{rng.randint(1, 28):02d}"
+                })
+            budgets.append({"user_id": user_id, "month": month, "total_budget": round(salary * 0.8, 2)})
+        await repos.income.insert_many(incomes)
+        for i in range(0, len(expenses), 500):
+            await repos.expenses.insert_many(expenses[i:i + 500])
+        for budget in budgets:
+            await repos.budgets.upsert(budget)
+    # Build the maintained aggregates from the raw rows
+    await aggregate_service.reconcile(fix=True)
+    return user_ids
+
+def make_requests(route: str, user_ids: List[str], tokens: Dict[str, str], months: List[str], rng: random.Random) -> Callable:
+    """Return a factory producing (method, url, kwargs) for one request of a route."""
+    def pick():
+        user_id = rng.choice(user_ids)
+        return {"Authorization": f"Bearer {tokens[user_id]}"}
+
+    if route == "summary":
+        return lambda: ("GET", f"/finance/summary/{rng.choice(months)}", {"headers": pick()})
+    if route == "history":
+        return lambda: ("GET", f"/finance/history?start={months[0]}&end={months[-1]}", {"headers": pick()})
+    if route == "history_budgets":
+        return lambda: ("GET", "/finance/history?months=6", {"headers": pick()})
+    if route == "add_expense":
+        return lambda: ("POST", "/finance/expenses", {"headers": pick(), "json": {
+            "amount": round(rng.uniform(2, 250), 2), "category": "Other",
+            "description": rng.choice(EXPENSE_WORDS), "entry_date": f"{rng.choice(months)}-{rng.randint(1, 28):02d}"
+        }})
+    if route == "chat":
+        return lambda: ("POST", "/chat/generate", {"headers": pick(), "json": {"message": "How can I save more each month?"}})
+    if route == "chat_stream":
+        return lambda: ("STREAM", "/chat/stream", {"headers": pick(), "json": {"message": "How can I save more each month?"}})
+    raise ValueError(f"Unknown route: {route}")
+
+async def drive(client, next_request: Callable, total: int, concurrency: int) -> Dict[str, Any]:
+    """Issue `total` requests with `concurrency` workers; returns latencies and errors."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = next_request()
+            start = time.perf_counter()
+            try:
+                if method == "STREAM":
+                    async with client.stream("POST", url, **kwargs) as response:
+                        async for _ in response.aiter_bytes():
+                            pass
+                else:
+                    response = await client.request(method, url, **kwargs)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"latencies": latencies, "errors": errors, "elapsed": time.perf_counter() - start}
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    if len(latencies) < 2:
+        value = latencies[0] * 1000 if latencies else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = quantiles(latencies, n=100, method="inclusive")
+    return {"p50_ms": round(cuts[49] * 1000, 2), "p95_ms": round(cuts[94] * 1000, 2), "p99_ms": round(cuts[98] * 1000, 2)}
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+    from app.main import app
+    from app.repositories import repos
+    from app.core.security import create_access_token
+    from app.services import ai_service
+    from app.services.chat_writer import chat_writer
+
+    rng = random.Random(args.seed)
+    counter = RoundTripCounter()
+    months = recent_months(args.months)
+
+    print(f"Seeding {args.users} users x {args.months} months x {args.expenses_per_month} expenses...", file=sys.stderr)
+    user_ids = await seed(repos, args.users, months, args.expenses_per_month, rng)
+    tokens = {user_id: create_access_token(user_id) for user_id in user_ids}
+
+    # Install the stand-ins only after seeding so setup is not counted or delayed
+    for name in ("users", "profiles", "income", "expenses", "budgets", "chat_history", "aggregates"):
+        setattr(repos, name, LatencyProxy(getattr(repos, name), args.db_latency_ms / 1000, counter))
+    ai_service.llm = make_fake_llm(args.llm_latency_ms / 1000, args.llm_token_ms / 1000, counter)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for route in args.routes:
+                next_request = make_requests(route, user_ids, tokens, months, rng)
+                # Warm up imports, caches and connections outside the measurement
+                await drive(client, next_request, min(args.concurrency[0] * 2, args.requests), args.concurrency[0])
+                for concurrency in args.concurrency:
+                    db_before, llm_before = counter.db, counter.llm
+                    outcome = await drive(client, next_request, args.requests, concurrency)
+                    # Let queued chat writes land so their round trips are attributed to this route
+                    await chat_writer._flush_all()
+                    count = len(outcome["latencies"])
+                    results.append({
+                        "route": route,
+                        "concurrency": concurrency,
+                        "requests": count,
+                        "errors": outcome["errors"],
+                        "throughput_rps": round(count / outcome["elapsed"], 2),
+                        **percentiles(outcome["latencies"]),
+                        "db_round_trips_per_request": round((counter.db - db_before) / count, 3),
+                        "llm_calls_per_request": round((counter.llm - llm_before) / count, 3)
+                    })
+                    print_row(results[-1])
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+        },
+        "results": results
+    }
+
+def print_row(r: Dict[str, Any]) -> None:
+    print(f"{r['route']:<16} {r['concurrency']:>5} {r['requests']:>6} {r['errors']:>6} {r['throughput_rps']:>9.1f} "
+          f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['db_round_trips_per_request']:>7.2f} "
+          f"{r['llm_calls_per_request']:>5.2f}")
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    List regressions of `current` against `baseline`.
+
+    A (route, concurrency) pair regresses when throughput drops, or p95
+    latency or round trips per request grow, by more than `tolerance`.
+    """
+    base = {(r["route"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        b = base.get((r["route"], r["concurrency"]))
+        if not b:
+            continue
+        label = f"{r['route']} @ {r['concurrency']}"
+        if r["throughput_rps"] < b["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {b['throughput_rps']} -> {r['throughput_rps']} rps")
+        if r["p95_ms"] > b["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {b['p95_ms']} -> {r['p95_ms']} ms")
+        if r["db_round_trips_per_request"] > b["db_round_trips_per_request"] * (1 + tolerance):
+            regressions.append(f"{label}: round trips {b['db_round_trips_per_request']} -> {r['db_round_trips_per_request']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=ROUTES)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route and concurrency level")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--expenses-per-month", type=int, default=60)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0, help="Added to every storage round trip")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Time to first token of the fake model")
+    parser.add_argument("--llm-token-ms", type=float, default=2.0, help="Delay between streamed tokens")
+    parser.add_argument("--cold-cache", action="store_true", help="Disable the summary cache (TTL 0)")
+    parser.add_argument("--sqlite-path", default=":memory:")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_api.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown when comparing")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure the stand-ins before importing the app
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = args.sqlite_path
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    if args.cold_cache:
+        os.environ["SUMMARY_CACHE_TTL_SECONDS"] = "0"
+
+    print(f"{'route':<16} {'conc':>5} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'db rt':>7} {'llm':>5}")
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
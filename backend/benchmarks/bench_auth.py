@@ -0,0 +1,67 @@
+"""
+Micro-benchmark for bearer token verification.
+
+Compares a full python-jose `jwt.decode` per request against
+get_user_by_token backed by the verified-token cache, for a pool of
+distinct tokens reused across requests (as a busy dashboard would).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_auth [--requests 50000] [--tokens 1 100 5000]
+"""
+
+import argparse
+import os
+import random
+import time
+
+# Token verification only needs settings; no network calls are made
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from jose import jwt
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.services.auth_service import get_user_by_token
+from app.services.token_cache import token_cache
+
+def decode_uncached(headers: list[str]) -> list[str]:
+    """The original per-request verification."""
+    out = []
+    for header in headers:
+        payload = jwt.decode(header[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        out.append(payload.get("sub"))
+    return out
+
+def decode_cached(headers: list[str]) -> list[str]:
+    return [get_user_by_token(header) for header in headers]
+
+def timed(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[1, 100, 5000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'tokens':>7} {'uncached req/s':>15} {'cached req/s':>13} {'hit rate':>9} {'speedup':>8} {'us/req saved':>13}")
+    for count in args.tokens:
+        rng = random.Random(args.seed)
+        headers = [f"Bearer {create_access_token(f'user-{i}')}" for i in range(count)]
+        stream = [rng.choice(headers) for _ in range(args.requests)]
+        token_cache.clear()
+
+        uncached_s, uncached = timed(decode_uncached, stream)
+        cached_s, cached = timed(decode_cached, stream)
+        assert uncached == cached
+
+        saved_us = (uncached_s - cached_s) / args.requests * 1e6
+        print(f"{count:>7} {args.requests / uncached_s:>15,.0f} {args.requests / cached_s:>13,.0f} "
+              f"{token_cache.stats()['hit_rate']:>9.1%} {uncached_s / cached_s:>7.1f}x {saved_us:>13.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Per-row versus batch write benchmark for income and expenses.
+
+Drives the app in-process (TestClient, embedded SQLite) and times creating,
+re-dating and deleting N expenses one request per row, then the same edits
+through the batch endpoints. Against Supabase every single-row request also
+pays an auth decode and a network round trip, so the in-process gap is a
+lower bound. The monthly aggregates are reconciled at the end.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_batch [--rows 50 500]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import aggregate_service
+
+def login(client: TestClient, username: str) -> dict:
+    client.post("/auth/signup", json={"username": username, "password": "benchmark-pw"})
+    token = client.post("/auth/login", json={"username": username, "password": "benchmark-pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def items(rows: int, day: int) -> list:
+    return [{"amount": 5 + i % 40, "category": "Other", "description": f"uber trip {i}",
+             "entry_date": f"2026-03-{day:02d}"} for i in range(rows)]
+
+def single(client: TestClient, headers: dict, rows: int) -> tuple:
+    start = time.perf_counter()
+    ids = [client.post("/finance/expenses", json=item, headers=headers).json()["id"] for item in items(rows, 1)]
+    created = time.perf_counter()
+    for id, item in zip(ids, items(rows, 8)):
+        client.put(f"/finance/expenses/{id}", json=item, headers=headers).raise_for_status()
+    updated = time.perf_counter()
+    for id in ids:
+        client.delete(f"/finance/expenses/{id}", headers=headers).raise_for_status()
+    return created - start, updated - created, time.perf_counter() - updated
+
+def batch(client: TestClient, headers: dict, rows: int) -> tuple:
+    start = time.perf_counter()
+    result = client.post("/finance/expenses/batch", json={"items": items(rows, 1)}, headers=headers).json()
+    assert result["succeeded"] == rows, result
+    ids = [r["id"] for r in result["results"]]
+    created = time.perf_counter()
+    updates = [{"id": id, **item} for id, item in zip(ids, items(rows, 8))]
+    assert client.put("/finance/expenses/batch", json={"items": updates}, headers=headers).json()["succeeded"] == rows
+    updated = time.perf_counter()
+    assert client.delete("/finance/expenses", params={"ids": ",".join(ids)}, headers=headers).json()["succeeded"] == rows
+    return created - start, updated - created, time.perf_counter() - updated
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 500], help="Rows per run (at most BATCH_MAX_ITEMS)")
+    args = parser.parse_args()
+    with TestClient(app) as client:
+        print(f"{'rows':>6} {'mode':>7} {'create ms':>10} {'update ms':>10} {'delete ms':>10}")
+        for rows in args.rows:
+            for mode, run in (("single", single), ("batch", batch)):
+                headers = login(client, f"bench-{mode}-{rows}")
+                timings = run(client, headers, rows)
+                print(f"{rows:>6} {mode:>7} " + " ".join(f"{t * 1e3:>10.1f}" for t in timings))
+        drift = asyncio.run(aggregate_service.reconcile())
+        print(f"aggregate drift: {len(drift)} rows")
+
+if __name__ == "__main__":
+    main()
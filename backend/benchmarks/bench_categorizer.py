@@ -0,0 +1,87 @@
+"""
+Micro-benchmark for the expense categorizer.
+
+Compares the compiled single-pass matcher against the naive nested
+`any(k in desc ...)` scan it replaced, for growing rule counts.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_categorizer [--descriptions 20000] [--rules 10 1000 5000]
+"""
+
+import argparse
+import os
+import random
+import string
+import time
+
+# The categorizer only needs settings; no network calls are made
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from app.services.categorizer import Categorizer, CategoryRule
+
+FILLER = ["payment", "card", "purchase", "store", "online", "ref", "pos", "debit", "monthly", "inc", "ltd", "london", "visa"]
+
+def make_rules(count: int, rng: random.Random) -> list[CategoryRule]:
+    """Generate `count` synthetic rules of 5 keywords each."""
+    rules = []
+    for i in range(count):
+        keywords = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10))) for _ in range(5)]
+        rules.append(CategoryRule(category=f"Category{i}", keywords=keywords, match="substring"))
+    return rules
+
+def make_descriptions(rules: list[CategoryRule], count: int, rng: random.Random) -> list[str]:
+    """Generate descriptions where roughly half contain a rule keyword."""
+    out = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(2, 6))
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(rng.choice(rules).keywords))
+        out.append(" ".join(words) + f" {rng.randint(1000, 9999)}")
+    return out
+
+def naive_categorize(mapping: list[tuple[str, list[str]]], descriptions: list[str]) -> list[str | None]:
+    """The original per-request nested substring scan."""
+    out = []
+    for description in descriptions:
+        desc = description.lower()
+        found = None
+        for cat, kws in mapping:
+            if any(k in desc for k in kws):
+                found = cat
+                break
+        out.append(found)
+    return out
+
+def timed(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--descriptions", type=int, default=20000)
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 1000, 5000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'rules':>6} {'keywords':>9} {'compile ms':>11} {'compiled desc/s':>16} {'naive desc/s':>13} {'speedup':>8}")
+    for count in args.rules:
+        rng = random.Random(args.seed)
+        rules = make_rules(count, rng)
+        descriptions = make_descriptions(rules, args.descriptions, rng)
+        mapping = [(r.category, r.keywords) for r in rules]
+
+        compile_s, categorizer = timed(Categorizer, rules)
+        compiled_s, compiled = timed(categorizer.categorize_many, descriptions)
+        naive_s, naive = timed(naive_categorize, mapping, descriptions)
+
+        # Both must agree on which descriptions matched at all
+        assert [c is None for c in compiled] == [n is None for n in naive]
+
+        print(f"{count:>6} {count * 5:>9} {compile_s * 1000:>11.1f} {len(descriptions) / compiled_s:>16,.0f} "
+              f"{len(descriptions) / naive_s:>13,.0f} {naive_s / compiled_s:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
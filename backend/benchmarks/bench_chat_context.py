@@ -0,0 +1,72 @@
+"""
+Prompt-size comparison for the chat context.
+
+Compares the context the chat endpoints used to send (the full month
+summary as JSON, recent transactions included) with the compact digest from
+chat_context, for months with a growing number of transactions. The full
+context the builder produces (digest plus recent turns, within the token
+budget) and its warm build time are reported alongside. Sizes use the same four-characters-per-token estimate the
+builder logs.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_chat_context [--transactions 10 100 1000] [--turns 10]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import deque
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from benchmarks.bench_serialization import make_summary
+from app.core.config import settings
+from app.services import chat_context as chat_context_module
+from app.services.chat_context import ChatContextBuilder, estimate_tokens, format_digest
+
+def conversation(turns: int, rng: random.Random) -> list[tuple[str, str]]:
+    words = "budget save spend month category income rent groceries plan goal why how much".split()
+    return [("user" if i % 2 == 0 else "assistant", " ".join(rng.choice(words) for _ in range(rng.randint(10, 120))))
+            for i in range(turns)]
+
+async def run(args):
+    rng = random.Random(args.seed)
+    turns = conversation(args.turns, rng)
+    print(f"{'transactions':>12} {'full JSON tokens':>17} {'digest tokens':>14} {'saved':>7} {'with turns':>11} {'build us':>9}")
+    for count in args.transactions:
+        summary = make_summary(count, rng)
+        old = f"User's Financial Status for 2026-01: {summary.model_dump_json()}"
+
+        async def cached_summary(user_id, month, slim=False):
+            return summary
+        # Serve the builder from in-memory fixtures; no storage is involved
+        chat_context_module.calculate_summary = cached_summary
+        builder = ChatContextBuilder(maxsize=10, ttl=60, token_budget=settings.CHAT_CONTEXT_TOKEN_BUDGET,
+                                     max_turns=settings.CHAT_CONTEXT_MAX_TURNS)
+        builder._turns["user"] = deque(turns, maxlen=builder.max_turns)
+        new = await builder.build("user")
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            await builder.build("user")
+        build_us = (time.perf_counter() - start) / args.repeat * 1e6
+
+        old_tokens, digest_tokens = estimate_tokens(old), estimate_tokens(format_digest("2026-01", summary))
+        print(f"{count:>12} {old_tokens:>17,} {digest_tokens:>14,} {1 - digest_tokens / old_tokens:>6.0%} "
+              f"{estimate_tokens(new):>11,} {build_us:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--turns", type=int, default=10, help="Conversation turns available to the builder")
+    parser.add_argument("--repeat", type=int, default=1000, help="Warm builds timed per size")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    # The per-build log line would dominate the timing
+    chat_context_module.logger.disabled = True
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
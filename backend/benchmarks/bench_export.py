@@ -0,0 +1,111 @@
+"""
+Memory and throughput benchmark for the streaming export.
+
+Seeds users with a growing number of expenses in the embedded SQLite
+backend, then drains export_service.stream_export for every format and
+compression, recording throughput, output size and peak Python memory
+(tracemalloc). Loading the same rows in one query and serializing them at
+once is measured alongside as the non-streaming baseline. Every export is
+decoded again and its record count checked.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_export [--rows 10000 100000]
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import os
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+import orjson
+import zstandard
+from app.repositories import repos
+from app.services import export_service
+
+VARIANTS = [("csv", None), ("csv", "gzip"), ("ndjson", None), ("ndjson", "zstd")]
+CATEGORIES = ["Food", "Transport", "Utilities", "Entertainment", "Shopping", "Health", "Other"]
+
+async def seed(rows: int, rng: random.Random) -> str:
+    user_id = str(uuid.uuid4())
+    first = date(2020, 1, 1)
+    batch = []
+    for i in range(rows):
+        batch.append({"user_id": user_id, "amount": round(rng.uniform(1, 300), 2), "category": rng.choice(CATEGORIES),
+                      "description": f"purchase {i}", "date": (first + timedelta(days=rng.randrange(2000))).isoformat()})
+        if len(batch) == 5000:
+            await repos.expenses.insert_many(batch)
+            batch = []
+    await repos.expenses.insert_many(batch)
+    await repos.income.insert_many([{"user_id": user_id, "amount": 3000, "source": "Salary",
+                                     "date": (first + timedelta(days=30 * m)).isoformat()} for m in range(60)])
+    return user_id
+
+def count_records(data: bytes, fmt: str, compression: str | None) -> int:
+    if compression == "gzip":
+        data = gzip.decompress(data)
+    elif compression == "zstd":
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if fmt == "csv":
+        return sum(1 for _ in csv.DictReader(io.StringIO(data.decode())))
+    return sum(1 for line in data.splitlines() if orjson.loads(line))
+
+async def measure(user_id: str, fmt: str, compression: str | None) -> tuple[float, int, int, bytes]:
+    """(seconds, output bytes, peak traced bytes, output) for one export."""
+    parts = []
+    size = peak = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    async for chunk in export_service.stream_export(user_id, fmt, compression):
+        size += len(chunk)
+        # Keep the output outside the measured footprint, as a socket would
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        parts.append(chunk)
+        tracemalloc.start()
+    elapsed = time.perf_counter() - start
+    peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return elapsed, size, peak, b"".join(parts)
+
+async def baseline(user_id: str) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = await repos.expenses.list_range(user_id, "0000-01-01", "9999-12-31")
+    orjson.dumps(rows)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+async def run(args):
+    rng = random.Random(args.seed)
+    print(f"{'rows':>8} {'variant':>12} {'rows/s':>10} {'output MB':>10} {'peak MB':>8}")
+    for rows in args.rows:
+        user_id = await seed(rows, rng)
+        expected = rows + 60
+        for fmt, compression in VARIANTS:
+            elapsed, size, peak, data = await measure(user_id, fmt, compression)
+            assert count_records(data, fmt, compression) == expected, (fmt, compression)
+            label = fmt + (f"+{compression}" if compression else "")
+            print(f"{rows:>8,} {label:>12} {expected / elapsed:>10,.0f} {size / 1e6:>10.2f} {peak / 1e6:>8.2f}")
+        elapsed, peak = await baseline(user_id)
+        print(f"{rows:>8,} {'load all':>12} {rows / elapsed:>10,.0f} {'':>10} {peak / 1e6:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="Expenses per seeded user")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Accuracy and speed benchmark for the month-end spending forecast.
+
+Generates synthetic spending histories (fixed bills, weekly shopping, daily
+small purchases and occasional large one-offs), then forecasts each of the
+last few months from the days before a cut-off day. The forecast's error is
+compared with two naive projections: the current month's linear run rate and
+last month's total. Timing compares build_forecast on the maintained daily
+totals with re-deriving those totals from the raw transactions first.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_forecast [--users 200] [--months 12] [--eval-months 6] [--days 5 10 15 20 25]
+"""
+
+import argparse
+import datetime
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from app.services.forecast_service import FORECAST_HISTORY_MONTHS, build_forecast, days_in_month, shift_month
+
+LAST_MONTH = "2026-06"
+
+def make_history(months: int, rng: random.Random) -> list[tuple[str, str, float]]:
+    """(date, category, amount) transactions of one synthetic user."""
+    scale = rng.uniform(0.5, 2.0)
+    rent = round(rng.uniform(600, 1500) * scale, 2)
+    bill_day = rng.randint(10, 25)
+    shop_weekday = rng.randrange(7)
+    rows = []
+    for i in range(months):
+        month = shift_month(LAST_MONTH, i - months + 1)
+        year, mon = map(int, month.split("-"))
+        for day in range(1, days_in_month(month) + 1):
+            when = datetime.date(year, mon, day)
+            iso = when.isoformat()
+            if day == 1:
+                rows.append((iso, "Rent", rent))
+            if day == bill_day:
+                rows.append((iso, "Utilities", round(rng.gauss(120, 25) * scale, 2)))
+            if when.weekday() == shop_weekday:
+                rows.append((iso, "Groceries", round(rng.gauss(90, 20) * scale, 2)))
+            for _ in range(rng.choices([0, 1, 2, 3], weights=[4, 3, 2, 1])[0]):
+                rows.append((iso, "Dining", round(rng.uniform(5, 30) * scale, 2)))
+            if rng.random() < 0.03:
+                rows.append((iso, "Shopping", round(rng.uniform(50, 400) * scale, 2)))
+    return rows
+
+def daily_totals(transactions: list[tuple[str, str, float]]) -> list[dict]:
+    """Collapse transactions into daily_spend-shaped rows."""
+    totals: dict[tuple[str, str], list] = {}
+    for day, category, amount in transactions:
+        acc = totals.setdefault((day, category), [0.0, 0])
+        acc[0] += amount
+        acc[1] += 1
+    return [{"day": d, "category": c, "total": t, "entry_count": n} for (d, c), (t, n) in totals.items()]
+
+def mape(errors: list[float]) -> str:
+    return f"{statistics.mean(errors) * 100:6.1f}%"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--months", type=int, default=12, help="History length per user")
+    parser.add_argument("--eval-months", type=int, default=6, help="Months forecast per user (the most recent ones)")
+    parser.add_argument("--days", type=int, nargs="+", default=[5, 10, 15, 20, 25], help="Cut-off days to forecast from")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    users = [make_history(args.months, rng) for _ in range(args.users)]
+    errors = {day: {"forecast": [], "run rate": [], "last month": []} for day in args.days}
+    maintained_s = rescan_s = 0.0
+    forecasts = rows_read = transactions_read = 0
+
+    for transactions in users:
+        daily = daily_totals(transactions)
+        monthly: dict[str, float] = {}
+        for day, _, amount in transactions:
+            monthly[day[:7]] = monthly.get(day[:7], 0.0) + amount
+        for i in range(args.eval_months):
+            month = shift_month(LAST_MONTH, -i)
+            first = f"{shift_month(month, -FORECAST_HISTORY_MONTHS)}-01"
+            window = [r for r in daily if first <= r["day"] <= f"{month}-31"]
+            raw = [t for t in transactions if first <= t[0] <= f"{month}-31"]
+            actual = monthly[month]
+            days = days_in_month(month)
+            for cut in args.days:
+                today = datetime.date.fromisoformat(f"{month}-{cut:02d}")
+                # Only what had been recorded by the cut-off day is visible
+                visible = [r for r in window if r["day"] <= today.isoformat()]
+                visible_raw = [t for t in raw if t[0] <= today.isoformat()]
+
+                start = time.perf_counter()
+                forecast = build_forecast(visible, month, today=today)
+                maintained_s += time.perf_counter() - start
+                start = time.perf_counter()
+                build_forecast(daily_totals(visible_raw), month, today=today)
+                rescan_s += time.perf_counter() - start
+                forecasts += 1
+                rows_read += len(visible)
+                transactions_read += len(visible_raw)
+
+                spent = sum(r["total"] for r in visible if r["day"][:7] == month)
+                errors[cut]["forecast"].append(abs(forecast.projected_total - actual) / actual)
+                errors[cut]["run rate"].append(abs(spent / cut * days - actual) / actual)
+                errors[cut]["last month"].append(abs(monthly.get(shift_month(month, -1), 0.0) - actual) / actual)
+
+    print(f"{args.users} users x {args.eval_months} months; mean absolute percentage error of the month-end total")
+    print(f"{'day':>4} {'forecast':>9} {'run rate':>9} {'last month':>11}")
+    for cut in args.days:
+        e = errors[cut]
+        print(f"{cut:>4} {mape(e['forecast']):>9} {mape(e['run rate']):>9} {mape(e['last month']):>11}")
+    print()
+    print(f"per forecast: {maintained_s / forecasts * 1e6:8.1f} us from daily totals ({rows_read / forecasts:.0f} rows), "
+          f"{rescan_s / forecasts * 1e6:8.1f} us re-deriving them ({transactions_read / forecasts:.0f} transactions)")
+
+if __name__ == "__main__":
+    main()
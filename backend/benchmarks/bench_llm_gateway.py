@@ -0,0 +1,91 @@
+"""
+Load benchmark for the LLM gateway.
+
+Fires a burst of concurrent prompts, many of them identical (as when a lot
+of users ask for the same budget plan explanation at once), at a fake chain
+with a fixed latency. Calling the chain directly is compared with going
+through LLMGateway: provider calls made, peak concurrency the provider sees,
+calls shed with LLMBusy, and the time the burst takes.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_llm_gateway [--requests 500] [--distinct 25] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from app.services import ai_service
+from app.services.ai_service import LLMBusy, LLMGateway
+
+class FakeChain:
+    """Stands in for prompt | llm; records how many calls overlap."""
+
+    class Message:
+        def __init__(self, content: str):
+            self.content = content
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, inputs: dict):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.active -= 1
+        return self.Message(f"answer to {inputs['question']}")
+
+async def burst(call, prompts: list[str]) -> tuple[int, int, float]:
+    """Run every prompt at once; returns (answered, shed, seconds)."""
+    start = time.perf_counter()
+    results = await asyncio.gather(*(call(p, "ctx") for p in prompts), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    shed = sum(isinstance(r, LLMBusy) for r in results)
+    errors = [r for r in results if isinstance(r, Exception) and not isinstance(r, LLMBusy)]
+    if errors:
+        raise errors[0]
+    return len(results) - shed, shed, elapsed
+
+async def run(args):
+    rng = random.Random(args.seed)
+    prompts = [f"question {rng.randrange(args.distinct)}" for _ in range(args.requests)]
+
+    print(f"{args.requests} concurrent prompts ({args.distinct} distinct), {args.latency * 1000:.0f} ms per provider call")
+    print(f"{'':>22} {'provider calls':>15} {'peak concurrent':>16} {'answered':>9} {'shed':>5} {'seconds':>8}")
+
+    chain = FakeChain(args.latency)
+    direct = lambda q, c: chain.ainvoke({"question": q, "context": c})
+    answered, shed, elapsed = await burst(direct, prompts)
+    print(f"{'direct':>22} {chain.calls:>15} {chain.peak:>16} {answered:>9} {shed:>5} {elapsed:>8.2f}")
+
+    for max_waiting in args.max_waiting:
+        chain = ai_service.chain = FakeChain(args.latency)
+        gateway = LLMGateway(max_concurrent=args.max_concurrent, max_waiting=max_waiting, timeout=10, queue_timeout=args.queue_timeout)
+        answered, shed, elapsed = await burst(gateway.invoke, prompts)
+        label = f"gateway (wait <= {max_waiting})"
+        print(f"{label:>22} {chain.calls:>15} {chain.peak:>16} {answered:>9} {shed:>5} {elapsed:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=25, help="Distinct prompts among the requests")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per provider call")
+    parser.add_argument("--max-concurrent", type=int, default=8)
+    parser.add_argument("--max-waiting", type=int, nargs="+", default=[32, 4])
+    parser.add_argument("--queue-timeout", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
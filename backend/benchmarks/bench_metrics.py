@@ -0,0 +1,96 @@
+"""
+Overhead benchmark for the metrics layer.
+
+Calls a FastAPI app with one trivial route directly through ASGI (no HTTP
+client in the way), with and without MetricsMiddleware, and times the
+per-call cost of Metrics.track() and an instrumented repository method.
+Rendering /metrics is timed too, with a realistic number of series.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_metrics [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from fastapi import FastAPI
+from app.core.metrics import InstrumentedRepository, Metrics, MetricsMiddleware
+
+def make_app(metrics: Metrics | None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{id}")
+    async def item(id: str):
+        return {"id": id}
+
+    if metrics is not None:
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+    return app
+
+async def drive(app, requests: int) -> float:
+    """Seconds per request through the full ASGI stack."""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i: int) -> dict:
+        return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+                "path": f"/items/{i}", "raw_path": f"/items/{i}".encode(), "query_string": b"", "root_path": "",
+                "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80)}
+
+    # Build the middleware stack before timing
+    await app(scope(0), receive, send)
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scope(i), receive, send)
+    return (time.perf_counter() - start) / requests
+
+class Repository:
+    async def get(self, id: str):
+        return id
+
+async def run(args):
+    bare = await drive(make_app(None), args.requests)
+    instrumented = await drive(make_app(Metrics()), args.requests)
+    print(f"request through ASGI: {bare * 1e6:7.1f} us bare, {instrumented * 1e6:7.1f} us with MetricsMiddleware "
+          f"(+{(instrumented - bare) * 1e6:.1f} us)")
+
+    metrics = Metrics()
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        with metrics.track("db", "expenses.list_range"):
+            pass
+    print(f"Metrics.track():      {(time.perf_counter() - start) / args.requests * 1e6:7.2f} us per call")
+
+    repository, proxied = Repository(), InstrumentedRepository("items", Repository(), metrics)
+    for label, target in (("plain", repository), ("instrumented", proxied)):
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            await target.get("x")
+        print(f"repository call ({label}): {(time.perf_counter() - start) / args.requests * 1e6:6.2f} us")
+
+    # 30 routes x 3 methods and 40 backend operations
+    for route in range(30):
+        for method in ("GET", "POST", "DELETE"):
+            metrics.requests.inc(method, f"/route/{route}", "200")
+            metrics.request_seconds.observe(0.01, method, f"/route/{route}")
+    for op in range(40):
+        metrics.call_seconds.observe(0.003, "db", f"repo.op{op}")
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"render /metrics:      {(time.perf_counter() - start) * 1e3:7.2f} ms for {len(text.splitlines())} lines")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
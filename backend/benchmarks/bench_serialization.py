@@ -0,0 +1,120 @@
+"""
+Micro-benchmark for response serialization.
+
+Serves the same large BudgetSummary and /finance/history payloads through
+two in-process FastAPI apps and compares per-request time:
+
+  * default: handlers return the model / list of dicts, so FastAPI validates
+    it against response_model (or runs jsonable_encoder) and json.dumps it
+  * fast: handlers return model_response / json_response as the finance
+    router does, so the payload is serialized once by pydantic-core or orjson
+
+No storage or network is involved; the difference is serialization alone.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serialization [--transactions 200 2000 10000] [--months 120] [--requests 200]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import time
+import uuid
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from app.core.responses import model_response, json_response
+from app.schemas.finance import BudgetSummary
+
+CATEGORIES = ["Food", "Transport", "Utilities", "Entertainment", "Healthcare", "Shopping", "Other"]
+
+def make_summary(transactions: int, rng: random.Random) -> BudgetSummary:
+    """A summary with `transactions` expenses and a tenth as many incomes."""
+    user_id = str(uuid.uuid4())
+    start = datetime.date(2024, 1, 1)
+
+    def row(**extra):
+        day = start + datetime.timedelta(days=rng.randrange(365))
+        return {"id": str(uuid.uuid4()), "user_id": user_id, "amount": round(rng.uniform(1, 500), 2),
+                "entry_date": day.isoformat(), "created_at": f"{day.isoformat()}T12:00:00+00:00", **extra}
+
+    expenses = [row(category=rng.choice(CATEGORIES), description=f"purchase {i}") for i in range(transactions)]
+    incomes = [row(source="Salary") for _ in range(max(1, transactions // 10))]
+    breakdown = {c: round(sum(e["amount"] for e in expenses if e["category"] == c), 2) for c in CATEGORIES}
+    return BudgetSummary(
+        total_income=sum(i["amount"] for i in incomes), total_expenses=sum(breakdown.values()),
+        remaining_budget=1000.0, savings_recommendation=200.0, status="On Track",
+        category_breakdown=breakdown, alerts=["Food spending is high"], insights="",
+        overspending_categories=["Food"], recent_transactions=expenses, income_sources=incomes
+    )
+
+def make_history(months: int, rng: random.Random) -> list[dict]:
+    return [{"month": f"{2000 + m // 12}-{m % 12 + 1:02d}", "income": round(rng.uniform(2000, 6000), 2),
+             "expenses": round(rng.uniform(1000, 5000), 2), "budget": 4000.0} for m in range(months)]
+
+def build_apps(summary: BudgetSummary, history: list[dict]) -> tuple[FastAPI, FastAPI]:
+    default = FastAPI()
+
+    @default.get("/summary", response_model=BudgetSummary)
+    async def default_summary():
+        return summary
+
+    @default.get("/history")
+    async def default_history():
+        return history
+
+    fast = FastAPI(default_response_class=ORJSONResponse)
+
+    @fast.get("/summary", response_model=BudgetSummary)
+    async def fast_summary():
+        return model_response(summary)
+
+    @fast.get("/history")
+    async def fast_history():
+        return json_response(history)
+
+    return default, fast
+
+async def time_route(app: FastAPI, path: str, requests: int) -> tuple[float, bytes]:
+    """Mean seconds per request (after one warm-up request) and the last body."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        body = (await client.get(path)).content
+        start = time.perf_counter()
+        for _ in range(requests):
+            body = (await client.get(path)).content
+        return (time.perf_counter() - start) / requests, body
+
+async def run(args):
+    rng = random.Random(args.seed)
+    history = make_history(args.months, rng)
+
+    print(f"{'payload':<22} {'size KB':>8} {'default ms':>11} {'fast ms':>8} {'speedup':>8}")
+    cases = [(f"summary {n} txns", make_summary(n, rng), "/summary") for n in args.transactions]
+    cases.append((f"history {args.months} months", None, "/history"))
+    for label, summary, path in cases:
+        default, fast = build_apps(summary or make_summary(1, rng), history)
+        default_s, default_body = await time_route(default, path, args.requests)
+        fast_s, fast_body = await time_route(fast, path, args.requests)
+        # Both paths must produce the same document
+        assert json.loads(default_body) == json.loads(fast_body), f"{label}: responses differ"
+        print(f"{label:<22} {len(fast_body) / 1024:>8.1f} {default_s * 1000:>11.3f} {fast_s * 1000:>8.3f} "
+              f"{default_s / fast_s:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", type=int, nargs="+", default=[200, 2000, 10000],
+                        help="Expense rows in each BudgetSummary (incomes are a tenth of this)")
+    parser.add_argument("--months", type=int, default=120, help="Rows in the /finance/history payload")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
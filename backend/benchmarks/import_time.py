@@ -0,0 +1,90 @@
+"""
+Startup import-time profiler and budget check.
+
+Imports a module (app.main by default) in fresh interpreters with
+`python -X importtime`, then reports the slowest modules by cumulative time
+and the self time spent per top-level package. With --check it exits
+non-zero when the best-of-N import time exceeds the budget, so CI can catch
+a heavy import creeping back onto the startup path.
+
+Usage (from the backend directory):
+    python -m benchmarks.import_time [--module app.main] [--runs 3] [--top 25]
+    python -m benchmarks.import_time --check [--budget-ms 1500]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Import budget for app.main; override with --budget-ms or IMPORT_BUDGET_MS
+DEFAULT_BUDGET_MS = 1500.0
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+ImportRow = Tuple[str, int, float, float]  # (module, depth, self ms, cumulative ms)
+
+def profile_once(module: str) -> List[ImportRow]:
+    """Import `module` in a fresh interpreter and parse its -X importtime output."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, (len(indent) - 1) // 2, int(self_us) / 1000, int(cumulative_us) / 1000))
+    return rows
+
+def total_ms(rows: List[ImportRow], module: str) -> float:
+    return next((cumulative for name, depth, _, cumulative in rows if name == module and depth == 0), 0.0)
+
+def by_package(rows: List[ImportRow]) -> Dict[str, float]:
+    """Sum self time per top-level package."""
+    totals: Dict[str, float] = {}
+    for name, _, self_ms, _ in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + self_ms
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to try; the fastest is reported")
+    parser.add_argument("--top", type=int, default=25, help="How many modules and packages to list")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if the import time exceeds the budget")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    args = parser.parse_args()
+
+    # Import timings are noisy; the fastest run is the least disturbed one
+    runs = [profile_once(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda rows: total_ms(rows, args.module))
+    total = total_ms(best, args.module)
+
+    if not args.check:
+        print(f"Slowest modules by cumulative import time ({args.module}):")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for name, depth, self_ms, cumulative in sorted(best, key=lambda r: r[3], reverse=True)[:args.top]:
+            print(f"{cumulative:>14.1f} {self_ms:>9.1f}  {'  ' * min(depth, 8)}{name}")
+        print()
+        print("Self time by top-level package:")
+        for package, self_ms in sorted(by_package(best).items(), key=lambda x: x[1], reverse=True)[:args.top]:
+            print(f"{self_ms:>14.1f}  {package}")
+        print()
+
+    print(f"{args.module} import: {total:.1f} ms (best of {args.runs}), budget {args.budget_ms:.0f} ms")
+    if args.check and total > args.budget_ms:
+        print(f"FAIL: {args.module} import time is over budget by {total - args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
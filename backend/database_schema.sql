@@ -43,6 +43,10 @@ CREATE TABLE IF NOT EXISTS expenses (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
 );
 
+-- Month-range reads and keyset-paginated listing (newest first by date, id)
+CREATE INDEX IF NOT EXISTS idx_income_user_date_id ON income (user_id, date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_expenses_user_date_id ON expenses (user_id, date DESC, id DESC);
+
 -- 3. Budgets Table (Monthly Budget Summaries)
 CREATE TABLE IF NOT EXISTS budgets (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -62,6 +66,111 @@ CREATE TABLE IF NOT EXISTS chat_history (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
 );
 
+-- 5. Monthly Aggregates (incrementally maintained totals per month and category)
+-- Income rows use kind = 'income' and an empty category.
+CREATE TABLE IF NOT EXISTS monthly_aggregates (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL, -- References auth.users(id)
+    month VARCHAR(7) NOT NULL, -- Format: 'YYYY-MM'
+    kind TEXT NOT NULL CHECK (kind IN ('income', 'expense')),
+    category TEXT NOT NULL DEFAULT '',
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    UNIQUE(user_id, month, kind, category)
+);
+
+-- 6. Daily Spend (running expense totals per day and category, maintained with monthly_aggregates)
+CREATE TABLE IF NOT EXISTS daily_spend (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL, -- References auth.users(id)
+    day DATE NOT NULL,
+    category TEXT NOT NULL,
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    UNIQUE(user_id, day, category)
+);
+
+-- Applies a batch of signed deltas to both aggregate tables atomically.
+-- p_deltas: [{"user_id", "month", "kind", "category", "amount", "count"}, ...] with unique keys
+-- p_daily: [{"user_id", "day", "category", "amount", "count"}, ...] with unique keys
+DROP FUNCTION IF EXISTS apply_aggregate_deltas(JSONB);
+CREATE OR REPLACE FUNCTION apply_aggregate_deltas(p_deltas JSONB, p_daily JSONB DEFAULT '[]'::JSONB) RETURNS VOID AS $$
+    INSERT INTO monthly_aggregates (user_id, month, kind, category, total, entry_count)
+    SELECT (d->>'user_id')::UUID, d->>'month', d->>'kind', d->>'category',
+           (d->>'amount')::DECIMAL, (d->>'count')::INTEGER
+    FROM jsonb_array_elements(p_deltas) AS d
+    ON CONFLICT (user_id, month, kind, category) DO UPDATE
+    SET total = monthly_aggregates.total + EXCLUDED.total,
+        entry_count = monthly_aggregates.entry_count + EXCLUDED.entry_count,
+        updated_at = timezone('utc'::text, now());
+    INSERT INTO daily_spend (user_id, day, category, total, entry_count)
+    SELECT (d->>'user_id')::UUID, (d->>'day')::DATE, d->>'category',
+           (d->>'amount')::DECIMAL, (d->>'count')::INTEGER
+    FROM jsonb_array_elements(p_daily) AS d
+    ON CONFLICT (user_id, day, category) DO UPDATE
+    SET total = daily_spend.total + EXCLUDED.total,
+        entry_count = daily_spend.entry_count + EXCLUDED.entry_count,
+        updated_at = timezone('utc'::text, now());
+$$ LANGUAGE sql;
+
+-- Recomputes monthly_aggregates' values from the transaction tables (used to check for drift).
+-- p_user_id: restrict to one user; NULL for every user
+CREATE OR REPLACE FUNCTION transaction_monthly_totals(p_user_id UUID DEFAULT NULL)
+RETURNS TABLE (user_id UUID, month TEXT, kind TEXT, category TEXT, total DECIMAL, entry_count BIGINT) AS $$
+    SELECT i.user_id, to_char(i.date, 'YYYY-MM'), 'income', '', SUM(i.amount), COUNT(*)
+    FROM income i
+    WHERE p_user_id IS NULL OR i.user_id = p_user_id
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT e.user_id, to_char(e.date, 'YYYY-MM'), 'expense', COALESCE(NULLIF(e.category, ''), 'Other'), SUM(e.amount), COUNT(*)
+    FROM expenses e
+    WHERE p_user_id IS NULL OR e.user_id = p_user_id
+    GROUP BY 1, 2, 4;
+$$ LANGUAGE sql STABLE;
+
+-- Recomputes daily_spend's values from the expenses table (used to check for drift).
+CREATE OR REPLACE FUNCTION expense_daily_totals(p_user_id UUID DEFAULT NULL)
+RETURNS TABLE (user_id UUID, day DATE, category TEXT, total DECIMAL, entry_count BIGINT) AS $$
+    SELECT e.user_id, e.date, COALESCE(NULLIF(e.category, ''), 'Other'), SUM(e.amount), COUNT(*)
+    FROM expenses e
+    WHERE p_user_id IS NULL OR e.user_id = p_user_id
+    GROUP BY 1, 2, 3;
+$$ LANGUAGE sql STABLE;
+
+-- Batch updates of a user's transactions, one statement each (single-row updates use them too).
+-- p_rows: [{"id", <every column of the table below>}, ...] with unique ids; ids the user does not own are skipped
+-- Returns every updated row before and after the update. The old rows are locked first: a plain
+-- self-join would re-check a concurrently updated row against its stale pre-update version.
+CREATE OR REPLACE FUNCTION update_income_batch(p_user_id UUID, p_rows JSONB)
+RETURNS TABLE (old JSONB, new JSONB) AS $$
+    WITH o AS (
+        SELECT x.* FROM income x
+        WHERE x.user_id = p_user_id AND x.id IN (SELECT (e->>'id')::UUID FROM jsonb_array_elements(p_rows) e)
+        FOR UPDATE
+    )
+    UPDATE income t
+    SET amount = r.amount, source = r.source, date = r.date
+    FROM jsonb_to_recordset(p_rows) AS r(id UUID, amount DECIMAL, source TEXT, date DATE), o
+    WHERE t.id = r.id AND o.id = t.id
+    RETURNING to_jsonb(o), to_jsonb(t);
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION update_expenses_batch(p_user_id UUID, p_rows JSONB)
+RETURNS TABLE (old JSONB, new JSONB) AS $$
+    WITH o AS (
+        SELECT x.* FROM expenses x
+        WHERE x.user_id = p_user_id AND x.id IN (SELECT (e->>'id')::UUID FROM jsonb_array_elements(p_rows) e)
+        FOR UPDATE
+    )
+    UPDATE expenses t
+    SET amount = r.amount, category = r.category, description = r.description, date = r.date
+    FROM jsonb_to_recordset(p_rows) AS r(id UUID, amount DECIMAL, category TEXT, description TEXT, date DATE), o
+    WHERE t.id = r.id AND o.id = t.id
+    RETURNING to_jsonb(o), to_jsonb(t);
+$$ LANGUAGE sql;
+
 -- Row Level Security (RLS) policies should be enabled in a real production app
 -- to ensure users can only see their own data.
 -- ALTER TABLE income ENABLE ROW LEVEL SECURITY;